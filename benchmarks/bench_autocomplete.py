@@ -0,0 +1,42 @@
+import argparse
+import random
+import time
+
+from benchmarks.bench_fuzzy_search import make_documents
+from core.infra.indexes.prefix import PrefixIndex
+
+
+"""Бенчмарк автодополнения: построение PrefixIndex и время ответа на запрос 10 дополнений
+для префиксов длиной 1-4 символа.
+
+Запуск: python -m benchmarks.bench_autocomplete --books 1000000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    documents = make_documents(args.books, rng)
+
+    index = PrefixIndex()
+    started = time.perf_counter()
+    index.rebuild(documents)
+    print(f'books: {args.books}, build: {time.perf_counter() - started:.1f} s')
+
+    print(f'{"field":>7} {"prefix":>7} {"us per query":>13}')
+    for field in ('author', 'title'):
+        for length in (1, 2, 4):
+            prefixes = [rng.choice(documents)[field][:length] for _ in range(args.queries)]
+            started = time.perf_counter()
+            for prefix in prefixes:
+                index.complete(prefix, field)
+            elapsed = time.perf_counter() - started
+            print(f'{field:>7} {length:>7} {elapsed / args.queries * 1e6:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Бенчмарк фильтров по статусу и году: полный просмотр каталога против битовых индексов.
+
+Запуск: python -m benchmarks.bench_bitmap_filters --books 200000
+"""
+
+
+def timed(function, repeat: int = 5) -> tuple[float, object]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    args = parser.parse_args()
+
+    books = [
+        Book(
+            title=Title(f'Книга номер {index}'),
+            author=Author(f'Автор {index % 1000}'),
+            year=Year(str(1950 + index % 70)),
+            status=Status(index % 3 != 0),
+        )
+        for index in range(args.books)
+    ]
+    filters = BookFilters(year='2006', status=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'))
+        repository.add_books(books)
+
+        scan, found = timed(lambda: repository.get_books(filters))
+
+        index = BitmapIndex()
+        started = time.perf_counter()
+        repository.attach_index(index)
+        build = time.perf_counter() - started
+
+        indexed, indexed_found = timed(lambda: repository.get_books(filters))
+        count, counted = timed(lambda: index.count(filters), repeat=1000)
+
+        assert len(found) == len(indexed_found) == counted
+
+        print(f'books: {args.books}, matching: {counted}, index build: {build * 1000:.0f} ms')
+        print(f'get_books scan:    {scan * 1000:>9.2f} ms')
+        print(f'get_books bitmap:  {indexed * 1000:>9.2f} ms')
+        print(f'count by popcount: {count * 1000:>9.4f} ms')
+
+
+if __name__ == '__main__':
+    main()
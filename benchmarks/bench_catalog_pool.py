@@ -0,0 +1,76 @@
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.pool import CatalogRepositoryPool
+from benchmarks.bench_fuzzy_search import make_documents
+
+
+"""Бенчмарк пула каталогов: обращения к многим небольшим каталогам с неравномерной популярностью
+(распределение Ципфа) при разных бюджетах памяти. Показывает долю обращений к уже открытым каталогам,
+количество вытеснений и среднее время обращения.
+
+Запуск: python -m benchmarks.bench_catalog_pool --catalogs 200 --books 2000 --requests 20000
+"""
+
+
+def make_catalogs(directory: str, catalogs: int, books: int, rng: random.Random) -> None:
+    for number in range(catalogs):
+        repository = MemoryJsonBooksRepository(f'{directory}/library-{number}.json', flush_every=None)
+        repository.add_books(
+            Book(
+                title=Title(document['title']),
+                author=Author(document['author']),
+                year=Year(str(rng.randint(1950, 2019))),
+            )
+            for document in make_documents(books, rng)
+        )
+        repository.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--catalogs', type=int, default=200)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        rng = random.Random(1)
+        make_catalogs(directory, args.catalogs, args.books, rng)
+
+        weights = [1 / (rank + 1) for rank in range(args.catalogs)]
+        requests = [f'library-{number}' for number in rng.choices(range(args.catalogs), weights, k=args.requests)]
+
+        pool = CatalogRepositoryPool(directory)
+        with pool.lease('library-0'):
+            catalog_bytes = pool.stats.resident_bytes
+        pool.close()
+
+        print(f'catalog estimate: {catalog_bytes / 2 ** 20:.1f} MiB')
+        print(f'{"open share":>10} {"budget MiB":>10} {"hit ratio":>9} {"evictions":>9} {"ms/request":>10}')
+        for share in (0.05, 0.1, 0.25, 0.5, 1.0):
+            pool = CatalogRepositoryPool(directory, memory_budget=int(catalog_bytes * args.catalogs * share))
+
+            started = time.perf_counter()
+            for catalog_id in requests:
+                with pool.lease(catalog_id) as repository:
+                    repository.count_books()
+            elapsed = time.perf_counter() - started
+
+            stats = pool.stats
+            print(f'{share:>10.2f} {stats.memory_budget / 2 ** 20:>10.1f} {1 - stats.opened / len(requests):>9.3f} '
+                  f'{stats.evictions:>9} {elapsed / len(requests) * 1000:>10.3f}')
+            pool.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
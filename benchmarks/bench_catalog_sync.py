@@ -0,0 +1,78 @@
+import argparse
+import random
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.converters.books import convert_book_to_document
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.repositories.memory import InMemoryBooksRepository
+from core.infra.transfer.sync import diff_catalogs, sync_catalogs
+from benchmarks.bench_fuzzy_search import make_documents
+
+
+"""Бенчмарк синхронизации каталогов по деревьям хешей: сравнение деревьев и применение различий
+против сравнения всех документов двух каталогов.
+
+Запуск: python -m benchmarks.bench_catalog_sync --books 200000 --changes 100
+"""
+
+
+def full_diff(source: InMemoryBooksRepository, target: InMemoryBooksRepository) -> int:
+    """Наивное сравнение: все документы обоих каталогов"""
+    source_documents = {book.oid: convert_book_to_document(book) for book in source.iter_books()}
+    target_documents = {book.oid: convert_book_to_document(book) for book in target.iter_books()}
+
+    return sum(
+        1 for oid in source_documents.keys() | target_documents.keys()
+        if source_documents.get(oid, {}).get('status') != target_documents.get(oid, {}).get('status')
+        or (oid in source_documents) != (oid in target_documents)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--changes', type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    books = [
+        Book(
+            title=Title(document['title']),
+            author=Author(document['author']),
+            year=Year(str(rng.randint(1950, 2019))),
+            status=Status(True),
+        )
+        for document in make_documents(args.books, rng)
+    ]
+
+    source, target = InMemoryBooksRepository(), InMemoryBooksRepository()
+    for repository in (source, target):
+        repository.attach_index(MerkleIndex())
+        repository.add_books(books)
+
+    for book in rng.sample(books, args.changes):
+        book.status = Status(False)
+        source.update_book(book)
+
+    started = time.perf_counter()
+    naive = full_diff(source, target)
+    naive_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    diff = diff_catalogs(source.indexes[0], target.indexes[0])
+    tree_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    sync_catalogs(source, target)
+    sync_seconds = time.perf_counter() - started
+
+    print(f'books: {args.books}, changed: {args.changes}')
+    print(f'full comparison: {naive_seconds:.3f} s, {naive} differences')
+    print(f'tree comparison: {tree_seconds * 1000:.1f} ms, {len(diff)} differences, {diff.compared_nodes} nodes')
+    print(f'sync (compare + apply): {sync_seconds * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
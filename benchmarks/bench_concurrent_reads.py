@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Бенчмарк читателей MemoryJsonBooksRepository: пропускная способность get_book_by_oid
+при разном числе потоков-читателей и одном постоянно пишущем потоке.
+
+Читатели работают со снимком и не берут блокировку, поэтому пишущий поток их не тормозит.
+Рост с числом потоков ограничен GIL: цифры показывают отсутствие деградации, а не линейное ускорение.
+
+Запуск: python -m benchmarks.bench_concurrent_reads --threads 1 2 4 8 --books 10000
+"""
+
+
+def run(repository: MemoryJsonBooksRepository, oids: list[str], threads: int, duration: float) -> dict:
+    stop = threading.Event()
+    counters = [0] * threads
+    writes = [0]
+
+    def read(slot: int) -> None:
+        index = 0
+        while not stop.is_set():
+            repository.get_book_by_oid(oids[index % len(oids)])
+            index += 1
+        counters[slot] = index
+
+    def write() -> None:
+        while not stop.is_set():
+            repository.add_book(Book(title=Title('Новая книга'), author=Author('Автор'), year=Year('2020')))
+            writes[0] += 1
+
+    workers = [threading.Thread(target=read, args=(slot,)) for slot in range(threads)]
+    workers.append(threading.Thread(target=write))
+
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    return {
+        'threads': threads,
+        'reads_per_second': sum(counters) / duration,
+        'writes_per_second': writes[0] / duration,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'), flush_every=None)
+        books = [
+            Book(title=Title(f'Книга {index}'), author=Author(f'Автор {index % 100}'), year=Year('2006'))
+            for index in range(args.books)
+        ]
+        repository.add_books(books)
+        oids = [book.oid for book in books]
+
+        print(f'{"threads":>8} {"reads/s":>10} {"writes/s":>9}')
+        for threads in args.threads:
+            result = run(repository, oids, threads, args.duration)
+            print(
+                f'{result["threads"]:>8} {result["reads_per_second"]:>10.0f} {result["writes_per_second"]:>9.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
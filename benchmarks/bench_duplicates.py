@@ -0,0 +1,60 @@
+import argparse
+import random
+import time
+
+from core.infra.duplicates.books import find_duplicates
+from benchmarks.bench_fuzzy_search import LETTERS, make_documents
+
+
+"""Бенчмарк поиска дублей через MinHash и LSH: время на каталогах растущего размера (должно расти
+почти линейно) и доля найденных внесенных дублей с опечатками.
+
+Запуск: python -m benchmarks.bench_duplicates --books 1000000 --duplicates 0.05
+"""
+
+
+def make_typo(text: str, rng: random.Random) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice(LETTERS) + text[position + 1:]
+
+
+def make_catalog(count: int, duplicate_share: float, rng: random.Random) -> tuple[list[tuple[str, str, str]], set]:
+    documents = make_documents(count, rng)
+    books = [(document['oid'], document['title'], document['author']) for document in documents]
+
+    pairs = set()
+    for number, (oid, title, author) in enumerate(rng.sample(books, int(count * duplicate_share))):
+        duplicate_oid = f'duplicate-{number}'
+        books.append((duplicate_oid, make_typo(title, rng), author))
+        pairs.add((oid, duplicate_oid))
+
+    return books, pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--duplicates', type=float, default=0.05)
+    parser.add_argument('--threshold', type=float, default=0.7)
+    args = parser.parse_args()
+
+    print(f'{"books":>9} {"seconds":>8} {"us/book":>8} {"clusters":>9} {"recall":>7}')
+    count = max(1000, args.books // 8)
+    while count <= args.books:
+        rng = random.Random(1)
+        books, pairs = make_catalog(count, args.duplicates, rng)
+
+        started = time.perf_counter()
+        clusters = find_duplicates(books, threshold=args.threshold)
+        elapsed = time.perf_counter() - started
+
+        cluster_of = {oid: number for number, cluster in enumerate(clusters) for oid in cluster.oids}
+        found = sum(1 for first, second in pairs if cluster_of.get(first, -1) == cluster_of.get(second, -2))
+
+        print(f'{len(books):>9} {elapsed:>8.1f} {elapsed / len(books) * 1e6:>8.1f} {len(clusters):>9} '
+              f'{found / len(pairs):>7.3f}')
+        count *= 2
+
+
+if __name__ == '__main__':
+    main()
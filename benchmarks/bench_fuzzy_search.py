@@ -0,0 +1,115 @@
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from core.infra.indexes.fuzzy import TrigramIndex
+
+
+"""Бенчмарк нечеткого поиска: построение TrigramIndex, задержка поиска по запросам с опечатками,
+доля запросов, для которых искомая книга попала в выдачу, и стоимость инкрементальных изменений.
+
+Запуск: python -m benchmarks.bench_fuzzy_search --books 1000000
+"""
+
+
+FIRST_NAMES = [
+    'Александр', 'Алексей', 'Анна', 'Борис', 'Вера', 'Виктор', 'Галина', 'Дмитрий', 'Евгений', 'Елена',
+    'Иван', 'Ирина', 'Константин', 'Лев', 'Людмила', 'Михаил', 'Наталья', 'Николай', 'Ольга', 'Павел',
+    'Сергей', 'Светлана', 'Татьяна', 'Фёдор', 'Юрий',
+]
+SYLLABLES = [
+    'ба', 'ва', 'го', 'да', 'ев', 'жу', 'за', 'ки', 'ло', 'ма', 'не', 'ор', 'па', 'ро', 'са', 'ту', 'фе',
+    'хо', 'це', 'чи', 'ша', 'щу', 'ян', 'бе', 'ви', 'гу', 'ды', 'ле', 'ми', 'ну', 'по', 'ре', 'си', 'то',
+]
+SURNAME_SUFFIXES = ['ов', 'ев', 'ин', 'ский', 'ович', 'енко']
+LETTERS = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def make_word(rng: random.Random, syllables: int) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def make_documents(count: int, rng: random.Random) -> list[dict]:
+    authors = [
+        f'{rng.choice(FIRST_NAMES)} {make_word(rng, rng.randint(2, 3)).capitalize()}{rng.choice(SURNAME_SUFFIXES)}'
+        for _ in range(max(1, count // 10))
+    ]
+    vocabulary = [make_word(rng, rng.randint(2, 4)) for _ in range(50000)]
+
+    return [
+        {
+            'oid': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(2, 5))).capitalize(),
+            'author': rng.choice(authors),
+        }
+        for _ in range(count)
+    ]
+
+
+def misspell(text: str, rng: random.Random) -> str:
+    """Одна опечатка: замена, пропуск или перестановка соседних букв"""
+    position = rng.randrange(1, len(text) - 1)
+    kind = rng.choice(('replace', 'delete', 'swap'))
+    if kind == 'replace':
+        return text[:position] + rng.choice(LETTERS) + text[position + 1:]
+    if kind == 'delete':
+        return text[:position] + text[position + 1:]
+    return text[:position - 1] + text[position] + text[position - 1] + text[position + 1:]
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = make_documents(args.books, rng)
+    by_oid = {document['oid']: document for document in documents}
+
+    index = TrigramIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.rebuild(documents)
+    build = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'books: {args.books}, indexed values: {len(index)}')
+    print(f'build: {build:.1f} s, index memory: {memory / 2 ** 20:.0f} MiB')
+
+    print(f'{"field":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"found@10":>9}')
+    for field in ('author', 'title'):
+        latencies, found = [], 0
+        for document in rng.sample(documents, args.queries):
+            query = misspell(document[field], rng)
+            started = time.perf_counter()
+            matches = index.search(query, limit=10, fields=[field])
+            latencies.append((time.perf_counter() - started) * 1000)
+            # У автора много книг с одинаковой похожестью, поэтому для автора достаточно найти любую из них
+            found += any(by_oid[match.oid][field] == document[field] for match in matches)
+        print(
+            f'{field:>7} {statistics.median(latencies):>8.2f} {percentile(latencies, 0.95):>8.2f} '
+            f'{percentile(latencies, 0.99):>8.2f} {found / args.queries:>9.0%}'
+        )
+
+    changed = make_documents(1000, rng)
+    started = time.perf_counter()
+    for document in changed:
+        index.add(document)
+    for document in changed:
+        index.remove(document)
+    elapsed = time.perf_counter() - started
+    print(f'incremental add + remove: {elapsed / len(changed) * 1e6:.0f} us per book')
+
+
+if __name__ == '__main__':
+    main()
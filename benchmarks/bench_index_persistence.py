@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.indexes.prefix import PrefixIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from benchmarks.bench_fuzzy_search import make_documents
+
+
+"""Бенчмарк перезапуска json репозитория с индексами: построение индексов по каталогу
+против загрузки из файлов рядом с каталогом (persist_indexes).
+
+Запуск: python -m benchmarks.bench_index_persistence --books 200000
+"""
+
+
+INDEX_TYPES = (TrigramIndex, PrefixIndex, BitmapIndex)
+
+
+def open_repository(path: str) -> dict[str, float]:
+    """Открывает репозиторий и подключает индексы, возвращает время каждого этапа"""
+    timings = {}
+
+    started = time.perf_counter()
+    repository = MemoryJsonBooksRepository(path, persist_indexes=True)
+    timings['catalog'] = time.perf_counter() - started
+
+    for index_type in INDEX_TYPES:
+        started = time.perf_counter()
+        repository.attach_index(index_type())
+        timings[index_type.__name__] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    repository.save_indexes()
+    timings['save'] = time.perf_counter() - started
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    books = [
+        Book(
+            title=Title(document['title']),
+            author=Author(document['author']),
+            year=Year(str(rng.randint(1950, 2019))),
+            status=Status(rng.random() < 0.75),
+        )
+        for document in make_documents(args.books, rng)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'books.json')
+        MemoryJsonBooksRepository(path).add_books(books)
+        del books
+
+        cold = open_repository(path)
+        warm = open_repository(path)
+
+        sizes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory) if name.endswith('.idx'))
+        print(f'books: {args.books}, index files: {sizes / 2 ** 20:.0f} MiB')
+        print(f'{"stage":>13} {"cold s":>8} {"warm s":>8}')
+        for stage in cold:
+            print(f'{stage:>13} {cold[stage]:>8.2f} {warm[stage]:>8.2f}')
+        print(f'{"indexes":>13} {sum(cold[name.__name__] for name in INDEX_TYPES):>8.2f} '
+              f'{sum(warm[name.__name__] for name in INDEX_TYPES):>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import random
+import time
+import uuid
+
+from core.infra.filters.ordering import order_documents, order_key, parse_order_by, encode_cursor
+
+
+"""Бенчмарк сортировки выдачи: первые limit книг через кучу (heapq.nsmallest) против полной сортировки
+и среза, а также получение страницы по курсору глубоко в выдаче.
+
+Запуск: python -m benchmarks.bench_ordering --books 1000000
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--order-by', default='-year,title')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    documents = [
+        {
+            'oid': str(uuid.UUID(int=rng.getrandbits(128))),
+            'title': f'Книга {rng.randrange(args.books)}',
+            'author': f'Автор {rng.randrange(1000)}',
+            'year': str(rng.randint(1900, 2024)),
+            'status': rng.random() < 0.5,
+        }
+        for _ in range(args.books)
+    ]
+
+    def timed(function) -> float:
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
+
+    full_sort = timed(lambda: order_documents(documents, args.order_by)[:args.limit])
+    top_k = timed(lambda: order_documents(documents, args.order_by, limit=args.limit))
+
+    orders = parse_order_by(args.order_by)
+    middle = sorted(documents, key=order_key(orders))[args.books // 2]
+    cursor = encode_cursor(middle, orders)
+    page = timed(lambda: order_documents(documents, args.order_by, limit=args.limit, after=cursor))
+
+    print(f'books: {args.books}, limit: {args.limit}, order by: {args.order_by}')
+    print(f'full sort + slice: {full_sort:.2f} s')
+    print(f'heap top-k:        {top_k:.2f} s')
+    print(f'cursor page (mid): {page:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status, value_cache
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Бенчмарк списка книг: полные Book против ленивых BookView с проекцией (oid и название).
+Показывает время получения списка и чтения названий всех книг, а также память (tracemalloc),
+которую занимает список, и количество блоков памяти в нем.
+
+Запуск: python -m benchmarks.bench_projection --books 200000
+"""
+
+
+def measure(function) -> tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    listing = function()
+    elapsed = time.perf_counter() - started
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del listing
+    stats = snapshot.statistics('filename')
+    return elapsed, sum(stat.count for stat in stats), sum(stat.size for stat in stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    args = parser.parse_args()
+
+    books = [
+        Book(
+            title=Title(f'Книга номер {index}'),
+            author=Author(f'Автор {index % 1000}'),
+            year=Year(str(1950 + index % 70)),
+            status=Status(index % 3 != 0),
+        )
+        for index in range(args.books)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'))
+        repository.add_books(books)
+        del books
+
+        def listing(fields):
+            books = repository.get_books(fields=fields)
+            for book in books:
+                book.oid, book.title.as_generic_type()
+            return books
+
+        cases = (('Book', lambda: listing(None)), ('BookView', lambda: listing(['title'])))
+
+        print(f'{"listing":>9} {"seconds":>8} {"blocks":>10} {"MiB":>7}')
+        for label, function in cases:
+            value_cache.clear()
+            elapsed, blocks, size = measure(function)
+            print(f'{label:>9} {elapsed:>8.2f} {blocks:>10} {size / 2 ** 20:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
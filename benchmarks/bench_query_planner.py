@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.filters.planner import QueryPlan, QueryPlanner
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from benchmarks.bench_fuzzy_search import make_documents
+
+
+"""Бенчмарк планировщика выборки: полный просмотр с проверкой фильтров в порядке полей
+против плана QueryPlanner (порядок предикатов по селективности, BitmapIndex и TrigramIndex).
+Для каждого фильтра выводится время get_books и выбранный план.
+
+Запуск: python -m benchmarks.bench_query_planner --books 200000
+"""
+
+
+class FullScanPlanner(QueryPlanner):
+    def plan(self, filters, documents, indexes=()) -> QueryPlan:
+        return QueryPlan.full_scan(filters, len(documents))
+
+
+def timed(function, repeat: int = 3) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    books = [
+        Book(
+            title=Title(document['title']),
+            author=Author(document['author']),
+            year=Year(str(rng.randint(1950, 2019))),
+            status=Status(rng.random() < 0.75),
+        )
+        for document in make_documents(args.books, rng)
+    ]
+    sample = books[len(books) // 2]
+    title_word = sample.title.as_generic_type().split()[1]
+
+    filters = [
+        BookFilters(status=True, year='2000'),
+        BookFilters(status=True),
+        BookFilters(title=title_word),
+        BookFilters(status=True, author=sample.author.as_generic_type()[-8:]),
+        BookFilters(title=title_word, year=sample.year.as_generic_type()),
+        BookFilters(title='а', author='ов', status=False),
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'))
+        repository.add_books(books)
+        del books
+        repository.attach_index(BitmapIndex())
+        repository.attach_index(TrigramIndex())
+        planner = repository.planner
+
+        for book_filters in filters:
+            repository.planner = FullScanPlanner()
+            scan, expected = timed(lambda: repository.get_books(book_filters, fields=['title']))
+            repository.planner = planner
+            planned, found = timed(lambda: repository.get_books(book_filters, fields=['title']))
+
+            assert sorted(book.oid for book in found) == sorted(book.oid for book in expected)
+
+            print(book_filters)
+            print(f'full scan: {scan * 1000:.1f} ms, planned: {planned * 1000:.1f} ms')
+            print(repository.explain(book_filters), end='\n\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.records import RecordStoreBooksRepository
+from benchmarks.bench_fuzzy_search import make_documents
+
+
+"""Бенчмарк репозитория с ограниченной памятью: память после открытия каталога по сравнению с json
+репозиторием, чтения по oid с неравномерным распределением (20% книг получают 80% запросов)
+и полный просмотр, который не должен вытеснять горячие книги из кэша.
+
+Запуск: python -m benchmarks.bench_record_store --books 200000 --budget-mb 16
+"""
+
+
+def measure_open(factory) -> tuple[object, float, float]:
+    """Открывает репозиторий, возвращает его, время открытия и выделенную память в MiB"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    repository = factory()
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+
+    return repository, elapsed, memory
+
+
+def read_hot(repository: RecordStoreBooksRepository, oids: list[str], reads: int, rng: random.Random) -> float:
+    hot = oids[:len(oids) // 5]
+    started = time.perf_counter()
+    for _ in range(reads):
+        repository.get_book_by_oid(rng.choice(hot) if rng.random() < 0.8 else rng.choice(oids))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--budget-mb', type=int, default=16)
+    parser.add_argument('--reads', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    books = [
+        Book(
+            title=Title(document['title']),
+            author=Author(document['author']),
+            year=Year(str(rng.randint(1950, 2019))),
+            status=Status(rng.random() < 0.75),
+        )
+        for document in make_documents(args.books, rng)
+    ]
+    oids = [book.oid for book in books]
+    rng.shuffle(oids)
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'books.json')
+        records_path = os.path.join(directory, 'books.records')
+        MemoryJsonBooksRepository(json_path).add_books(books)
+        writer = RecordStoreBooksRepository(records_path)
+        writer.add_books(books)
+        writer.close()
+        del books, writer
+
+        _, json_seconds, json_memory = measure_open(lambda: MemoryJsonBooksRepository(json_path))
+        repository, records_seconds, records_memory = measure_open(
+            lambda: RecordStoreBooksRepository(records_path, memory_budget=args.budget_mb * 2 ** 20)
+        )
+
+        print(f'books: {args.books}, cache budget: {args.budget_mb} MiB')
+        print(f'{"repository":>12} {"open s":>8} {"memory MiB":>11}')
+        print(f'{"json":>12} {json_seconds:>8.2f} {json_memory:>11.1f}')
+        print(f'{"records":>12} {records_seconds:>8.2f} {records_memory:>11.1f}')
+
+        cold = read_hot(repository, oids, args.reads, rng)
+        warm = read_hot(repository, oids, args.reads, rng)
+        before_scan = repository.cache_stats
+
+        started = time.perf_counter()
+        matched = repository.count_books(BookFilters(status=False))
+        scan = time.perf_counter() - started
+
+        after_scan = read_hot(repository, oids, args.reads, rng)
+        stats = repository.cache_stats
+
+        print(f'reads: cold {cold:.2f} s, warm {warm:.2f} s, after scan {after_scan:.2f} s ({args.reads} each)')
+        print(f'scan: {scan:.2f} s, {matched} books, cache {before_scan.resident_records} -> '
+              f'{stats.resident_records} records, {stats.resident_bytes / 2 ** 20:.1f} MiB')
+        print(f'hit ratio: {stats.hit_ratio:.2f}, evictions: {stats.evictions}')
+
+        repository.close()
+
+
+if __name__ == '__main__':
+    main()
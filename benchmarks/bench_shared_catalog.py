@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.shared_memory import SharedMemoryCatalogPublisher, SharedMemoryBooksRepository
+
+
+"""Бенчмарк старта воркера: собственная копия каталога из json против подключения к каталогу
+в разделяемой памяти. Показывает время старта, выделенную Python память и время фильтрации.
+
+Запуск: python -m benchmarks.bench_shared_catalog --books 100000
+"""
+
+
+def measure(factory) -> tuple[object, float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    repository = factory()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return repository, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=100000)
+    args = parser.parse_args()
+
+    books = [
+        Book(title=Title(f'Книга номер {index}'), author=Author(f'Автор {index % 1000}'), year=Year(str(1950 + index % 70)))
+        for index in range(args.books)
+    ]
+    filters = BookFilters(title='номер 12', year='2000')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'books.json')
+        MemoryJsonBooksRepository(path).add_books(books)
+
+        publisher = SharedMemoryCatalogPublisher(f'bench_{uuid.uuid4().hex[:8]}')
+        try:
+            publisher.publish(books)
+
+            print(f'{"worker":>14} {"startup ms":>11} {"python MiB":>11} {"filter ms":>10} {"found":>6}')
+            for label, factory in (
+                ('json copy', lambda: MemoryJsonBooksRepository(path)),
+                ('shared memory', lambda: SharedMemoryBooksRepository(publisher.name)),
+            ):
+                repository, startup, peak = measure(factory)
+                started = time.perf_counter()
+                found = repository.get_books(filters)
+                filtering = time.perf_counter() - started
+                print(f'{label:>14} {startup * 1000:>11.1f} {peak / 2 ** 20:>11.1f} {filtering * 1000:>10.1f} {len(found):>6}')
+                if isinstance(repository, SharedMemoryBooksRepository):
+                    repository.close()
+        finally:
+            publisher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status, value_cache
+from core.infra.converters.books import convert_document_to_book
+
+
+"""Бенчмарк загрузки каталога с общим кэшем значений и без него: память (tracemalloc), занятая
+книгами поверх уже загруженных документов, и время конвертации документов в книги.
+
+Запуск: python -m benchmarks.bench_value_interning --books 1000000
+"""
+
+
+def convert_without_cache(document: dict) -> Book:
+    return Book(
+        oid=document['oid'],
+        title=Title(document['title']),
+        author=Author(document['author']),
+        year=Year(document['year']),
+        status=Status(document['status']),
+        version=document.get('version', 0),
+    )
+
+
+def make_documents(count: int, authors: int) -> list[dict]:
+    # Строки создаются заново для каждого документа, как при разборе json
+    return [
+        {
+            'oid': str(uuid.uuid4()),
+            'title': f'Книга номер {index}',
+            'author': ''.join(['Автор ', str(index % authors)]),
+            'year': str(1950 + index % 70),
+            'status': index % 3 != 0,
+            'version': 0,
+        }
+        for index in range(count)
+    ]
+
+
+def measure(documents: list[dict], convert) -> tuple[float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    books = [convert(document) for document in documents]
+    elapsed = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    return elapsed, memory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=1000000)
+    parser.add_argument('--authors', type=int, default=10000)
+    args = parser.parse_args()
+
+    documents = make_documents(args.books, args.authors)
+
+    print(f'{"load path":>12} {"seconds":>8} {"books MiB":>10}')
+    for label, convert in (('no cache', convert_without_cache), ('value cache', convert_document_to_book)):
+        value_cache.clear()
+        elapsed, memory = measure(documents, convert)
+        print(f'{label:>12} {elapsed:>8.2f} {memory / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.exceptions.books import BookVersionConflictException
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Бенчмарк оптимистичной блокировки: доля конфликтов и пропускная способность при конкурентных
+переключениях статуса небольшого набора "горячих" книг.
+
+Запуск: python -m benchmarks.bench_version_conflicts --threads 1 2 4 8 --hot-books 4
+"""
+
+
+def _toggle_with_retry(repository: MemoryJsonBooksRepository, oids: list[str], operations: int, stats: dict) -> None:
+    for _ in range(operations):
+        oid = random.choice(oids)
+        while True:
+            stats['attempts'] += 1
+            book = repository.get_book_by_oid(oid)
+            time.sleep(0)  # Отдаем GIL между чтением и записью, как при настоящей гонке
+            book.status = Status(not book.status.as_generic_type())
+            try:
+                repository.update_book(book)
+                break
+            except BookVersionConflictException:
+                stats['conflicts'] += 1
+
+
+def run(threads: int, hot_books: int, operations: int, flush_every: int | None) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'), flush_every=flush_every)
+        books = [
+            Book(title=Title(f'Книга {index}'), author=Author('Автор'), year=Year('2006'))
+            for index in range(hot_books)
+        ]
+        repository.add_books(books)
+        oids = [book.oid for book in books]
+
+        stats = [{'attempts': 0, 'conflicts': 0} for _ in range(threads)]
+        workers = [
+            threading.Thread(target=_toggle_with_retry, args=(repository, oids, operations, stats[index]))
+            for index in range(threads)
+        ]
+
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        repository.flush()
+        final_versions = sum(book.version for book in repository.get_books())
+
+    attempts = sum(item['attempts'] for item in stats)
+    conflicts = sum(item['conflicts'] for item in stats)
+    updates = threads * operations
+
+    # Ни одно обновление не потеряно: каждая успешная запись увеличила версию ровно на 1
+    assert final_versions == updates
+
+    return {
+        'threads': threads,
+        'attempts': attempts,
+        'conflicts': conflicts,
+        'conflict_rate': conflicts / attempts,
+        'updates_per_second': updates / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--hot-books', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=2000, help='Обновлений на поток')
+    parser.add_argument('--flush-every', type=int, default=None, help='По умолчанию файл пишется один раз в конце')
+    args = parser.parse_args()
+
+    print(f'{"threads":>8} {"attempts":>10} {"conflicts":>10} {"conflict %":>11} {"updates/s":>12}')
+    for threads in args.threads:
+        result = run(threads, args.hot_books, args.operations, args.flush_every)
+        print(
+            f'{result["threads"]:>8} {result["attempts"]:>10} {result["conflicts"]:>10} '
+            f'{result["conflict_rate"] * 100:>10.2f}% {result["updates_per_second"]:>12.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import tempfile
+import time
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Бенчмарк отложенной записи MemoryJsonBooksRepository: стоимость update_book при разном размере каталога.
+
+Запись без сохранения в файл публикует читателям только свои документы, поэтому ее стоимость не должна
+расти с размером каталога. Колонка reads/s показывает чтение сразу после каждой записи: такому читателю
+приходится собирать новый снимок, и оно линейно по каталогу.
+
+Запуск: python -m benchmarks.bench_write_behind --books 1000 10000 100000 --updates 2000
+"""
+
+
+def run(books_count: int, updates: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        repository = MemoryJsonBooksRepository(os.path.join(directory, 'books.json'), flush_every=None)
+        books = [
+            Book(title=Title(f'Книга {index}'), author=Author(f'Автор {index % 100}'), year=Year('2006'))
+            for index in range(books_count)
+        ]
+        repository.add_books(books)
+
+        started = time.perf_counter()
+        for index in range(updates):
+            book = books[index % books_count]
+            book.status = Status(not book.status.as_generic_type())
+            repository.update_book(book)
+        write_elapsed = time.perf_counter() - started
+
+        reads = min(updates, 200)
+        started = time.perf_counter()
+        for index in range(reads):
+            book = books[index % books_count]
+            repository.update_book(book)
+            repository.get_book_by_oid(book.oid)
+        read_elapsed = time.perf_counter() - started
+
+        repository.flush()
+
+    return {
+        'books': books_count,
+        'updates_per_second': updates / write_elapsed,
+        'reads_per_second': reads / read_elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--updates', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f'{"books":>8} {"updates/s":>10} {"reads/s":>9}')
+    for books_count in args.books:
+        result = run(books_count, args.updates)
+        print(f'{result["books"]:>8} {result["updates_per_second"]:>10.0f} {result["reads_per_second"]:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
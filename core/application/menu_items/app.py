@@ -7,11 +7,13 @@ from core.application.menu_items.exceptions import ToMainMenuException
 from core.domain.entities.books import Book
 from core.domain.values.base import BaseValueObject
 from core.domain.values.books import Title, Author, Year
-from core.infra.exceptions.books import BookNotFoundException
+from core.infra.converters.books import BOOK_FIELDS
+from core.infra.exceptions.books import BookNotFoundException, BookVersionConflictException, UnknownBookFieldException
 from core.logic.commands.books import GetBooksCommand, AddBookCommand, DeleteBookCommand, FindBookCommand, \
-    UpdateBookStatusCommand
+    UpdateBookStatusCommand, CompleteBookFieldCommand
 from core.logic.container import init_container
 from core.logic.mediator import Mediator
+from core.settings.config import Config
 from core.domain.exceptions.books import (
     BookTitleTooShortException,
     BookTitleTooLongException,
@@ -25,7 +27,7 @@ from core.domain.exceptions.books import (
     BookYearMustBeFourDigitsException,
 )
 
-from core.application.menu_items.utils import print_book
+from core.application.menu_items.utils import print_book, print_books, completion
 
 
 """Классы, представляющие элементы меню приложения"""
@@ -34,16 +36,33 @@ from core.application.menu_items.utils import print_book
 BT = TypeVar('BT', bound=BaseValueObject)
 
 
+def input_with_completion(field: str | None = None) -> str:
+    """input() с дополнением по Tab значениями поля книги из каталога"""
+    if field is None:
+        return input()
+
+    mediator: Mediator = init_container().resolve(Mediator)
+
+    def complete(prefix: str) -> list[str]:
+        completions, *_ = mediator.handle_command(CompleteBookFieldCommand(prefix, field))
+        return completions
+
+    with completion(complete):
+        return input()
+
+
 class GetBooksMenuItem(BaseMenuItem):
 
     def handle(self) -> None:
         container: Container = init_container()
         mediator: Mediator = container.resolve(Mediator)
 
-        books, *_ = mediator.handle_command(GetBooksCommand())
+        config: Config = container.resolve(Config)
 
-        for book in books:
-            print_book(book)
+        # Ленивые представления: объекты-значения создаются только для показанных страниц
+        books, *_ = mediator.handle_command(GetBooksCommand(fields=BOOK_FIELDS))
+
+        print_books(books, page_size=config.cli_page_size, layout=config.cli_layout)
 
     def to_str_for_menu(self):
         return 'Просмотреть все книги'
@@ -130,7 +149,7 @@ class AddBookMenuItem(BaseMenuItem):
             return title, author, year
 
     def _init_book_param(self, param_type: Type[BT]) -> BaseValueObject:
-        value = input()
+        value = input_with_completion({Title: 'title', Author: 'author'}.get(param_type))
         if value == 'x' or value == 'х':  # Русская и английская
             raise ToMainMenuException()
 
@@ -177,44 +196,54 @@ class FindBookMenuItem(BaseMenuItem):
         mediator: Mediator = container.resolve(Mediator)
 
         try:
-            title, author, year = self.get_books_params()
+            title, author, year, order_by = self.get_books_params()
         except ToMainMenuException:
             return
 
         books: list[Book]
-        books, *_ = mediator.handle_command(
-            FindBookCommand(
-                title=title,
-                author=author,
-                year=year
+        try:
+            books, *_ = mediator.handle_command(
+                FindBookCommand(
+                    title=title,
+                    author=author,
+                    year=year,
+                    fields=BOOK_FIELDS,
+                    order_by=order_by,
+                )
             )
-        )
+        except UnknownBookFieldException as exception:
+            print(f'Нельзя сортировать по полю "{exception.field}". Доступны: title, author, year, status')
+            return
 
         if len(books) == 0:
             print('Книги не найдены')
             return
 
+        config: Config = container.resolve(Config)
+
         print('Результаты поиска:')
-        for book in books:
-            print_book(book)
+        print_books(books, page_size=config.cli_page_size, layout=config.cli_layout)
 
     def to_str_for_menu(self):
         return 'Найти книгу'
 
-    def get_books_params(self) -> tuple[str, str, str]:
+    def get_books_params(self) -> tuple[str, str, str, str]:
         print('Введите название (Чтобы не искать по этому фильтру введите пустое значение):')
-        title = self._init_book_param()
+        title = self._init_book_param('title')
 
         print('Введите автора (Чтобы не искать по этому фильтру введите пустое значение):')
-        author = self._init_book_param()
+        author = self._init_book_param('author')
 
         print('Введите год издания (Чтобы не искать по этому фильтру введите пустое значение):')
         year = self._init_book_param()
 
-        return title, author, year
+        print('Введите сортировку, например "-year,title" (минус - по убыванию, пустое значение - без сортировки):')
+        order_by = self._init_book_param()
 
-    def _init_book_param(self) -> str:
-        value = input()
+        return title, author, year, order_by
+
+    def _init_book_param(self, field: str | None = None) -> str:
+        value = input_with_completion(field)
         if value == 'x' or value == 'х':  # Русская и английская
             raise ToMainMenuException()
 
@@ -236,8 +265,12 @@ class UpdateStatusMenuItem(BaseMenuItem):
 
         try:
             mediator.handle_command(UpdateBookStatusCommand(oid))
-        except BookNotFoundException(oid):
+        except BookNotFoundException:
             print(f'Книга с ID "{oid}" не найдена')
+            return
+        except BookVersionConflictException:
+            print('Книгу только что изменил другой пользователь. Попробуйте еще раз.')
+            return
 
         print('Статус книги успешно обновлен!')
 
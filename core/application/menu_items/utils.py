@@ -1,15 +1,206 @@
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence, TextIO
+
+try:
+    import readline
+except ImportError:  # Windows без pyreadline
+    readline = None
+
 from core.domain.entities.books import Book
 
 
-def print_book(book: Book):
-    print()
-    print(f'ID: {book.oid}')
-    print(f'Название: {book.title.as_generic_type()}')
-    print(f'Автор: {book.author.as_generic_type()}')
-    print(f'Год издания: {book.year.as_generic_type()}')
-    print(f'Статус: {status_to_str(book.status.as_generic_type())}')
-    print()
+"""Отрисовка книг в консоли.
+
+Книги форматируются пачкой в одну строку на страницу и выводятся одним вызовом write,
+а не семью print() на книгу. Отрисованные книги кэшируются до изменения книги.
+"""
+
+
+FULL_LAYOUT = 'full'
+COMPACT_LAYOUT = 'compact'
+
+_COMPACT_HEADER = f'{"ID":<36}  {"Название":<40}  {"Автор":<25}  {"Год":>4}  Статус\n'
 
 
 def status_to_str(status: bool) -> str:
     return 'В наличии' if status else 'Нет в наличии'
+
+
+class BookRenderer:
+    """Форматирует книги с LRU кэшем готовых строк. Ключ кэша включает все поля, поэтому изменение книги его сбрасывает"""
+
+    def __init__(self, max_cache_size: int = 10000) -> None:
+        self.max_cache_size = max_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple, str] = OrderedDict()
+
+    @staticmethod
+    def _format(book: Book, layout: str) -> str:
+        title = book.title.as_generic_type()
+        author = book.author.as_generic_type()
+        year = book.year.as_generic_type()
+        status = status_to_str(book.status.as_generic_type())
+
+        if layout == COMPACT_LAYOUT:
+            return f'{book.oid:<36}  {title:<40.40}  {author:<25.25}  {year:>4}  {status}\n'
+
+        return f'\nID: {book.oid}\nНазвание: {title}\nАвтор: {author}\nГод издания: {year}\nСтатус: {status}\n\n'
+
+    def render(self, book: Book, layout: str = FULL_LAYOUT) -> str:
+        key = (layout, book.oid, book.version, book.title.value, book.author.value, book.year.value, book.status.value)
+
+        rendered = self._cache.get(key)
+        if rendered is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return rendered
+
+        self.misses += 1
+        rendered = self._cache[key] = self._format(book, layout)
+        if len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+
+        return rendered
+
+    def render_many(self, books: Sequence[Book], layout: str = FULL_LAYOUT) -> str:
+        rendered = ''.join(self.render(book, layout) for book in books)
+        return _COMPACT_HEADER + rendered if layout == COMPACT_LAYOUT else rendered
+
+
+renderer = BookRenderer()
+
+
+def print_book(book: Book, output: TextIO | None = None) -> None:
+    output = output or sys.stdout
+    output.write(renderer.render(book))
+    output.flush()
+
+
+class BookPager:
+    """
+    Постраничный вывод книг.
+
+    Каждая страница форматируется целиком и выводится одним вызовом write.
+    В интерактивном режиме поддерживаются переход на следующую (n) и предыдущую (p) страницу,
+    переход по номеру страницы, переключение компактного вида (t) и выход (x).
+    """
+
+    def __init__(
+            self,
+            books: Sequence[Book],
+            page_size: int = 20,
+            layout: str = FULL_LAYOUT,
+            output: TextIO | None = None,
+            book_renderer: BookRenderer = renderer,
+    ) -> None:
+        self.books = books
+        self.page_size = page_size
+        self.layout = layout
+        self.output = output or sys.stdout
+        self.renderer = book_renderer
+        self.page = 0
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.books) // self.page_size))
+
+    def next(self) -> None:
+        self.page = min(self.page + 1, self.page_count - 1)
+
+    def prev(self) -> None:
+        self.page = max(self.page - 1, 0)
+
+    def jump(self, page_number: int) -> None:
+        """Переход на страницу по номеру, начиная с 1"""
+        self.page = min(max(page_number - 1, 0), self.page_count - 1)
+
+    def toggle_layout(self) -> None:
+        self.layout = COMPACT_LAYOUT if self.layout == FULL_LAYOUT else FULL_LAYOUT
+
+    def render_page(self) -> str:
+        start = self.page * self.page_size
+        return self.renderer.render_many(self.books[start:start + self.page_size], self.layout)
+
+    def write_page(self) -> None:
+        self.output.write(self.render_page() + f'\nСтраница {self.page + 1} из {self.page_count}\n')
+        self.output.flush()
+
+    def write_all(self) -> None:
+        """Неинтерактивный вывод (например, в pipe): все страницы подряд, по одной записи на страницу"""
+        for page in range(self.page_count):
+            self.page = page
+            self.output.write(self.render_page())
+        self.output.flush()
+
+    def interact(self, read: Callable[[str], str] = input) -> None:
+        if not self.books:
+            return
+
+        while True:
+            self.write_page()
+            if self.page_count == 1:
+                return
+
+            choice = read('n - следующая, p - предыдущая, номер - перейти, t - сменить вид, x - выход: ').strip().lower()
+
+            if choice in ('x', 'х'):  # Русская и английская
+                return
+            elif choice in ('n', ''):
+                if self.page == self.page_count - 1:
+                    return
+                self.next()
+            elif choice == 'p':
+                self.prev()
+            elif choice == 't':
+                self.toggle_layout()
+            elif choice.isdigit():
+                self.jump(int(choice))
+
+
+def print_books(books: Sequence[Book], page_size: int = 20, layout: str = FULL_LAYOUT) -> None:
+    """Выводит книги постранично в терминал или целиком, если ввод или вывод перенаправлен"""
+    pager = BookPager(books, page_size=page_size, layout=layout)
+
+    if sys.stdin.isatty() and sys.stdout.isatty():
+        pager.interact()
+    else:
+        pager.write_all()
+
+
+def make_completer(complete: Callable[[str], list[str]]) -> Callable[[str, int], str | None]:
+    """
+        Completer для readline. readline вызывает его с state = 0, 1, 2, ... и ждет None после последнего
+        варианта. Варианты запрашиваются у complete один раз, при state = 0.
+    """
+    matches: list[str] = []
+
+    def completer(text: str, state: int) -> str | None:
+        nonlocal matches
+        if state == 0:
+            matches = complete(text)
+        return matches[state] if state < len(matches) else None
+
+    return completer
+
+
+@contextmanager
+def completion(complete: Callable[[str], list[str]]) -> Iterator[None]:
+    """Включает дополнение по Tab для input() внутри блока. complete получает всю введенную строку"""
+    if readline is None or not sys.stdin.isatty():
+        yield
+        return
+
+    completer = make_completer(complete)
+
+    previous_completer, previous_delims = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(completer)
+    readline.set_completer_delims('')  # Дополняется вся строка, а не последнее слово
+    readline.parse_and_bind('tab: complete')
+    try:
+        yield
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
@@ -1,16 +1,24 @@
-import uuid
 from dataclasses import dataclass, field
 
+from core.domain.entities.ids import new_oid
+
 
 """Абстрактный класс представляющий сущности предметной области"""
 
 
 @dataclass
 class BaseEntity:
+    # uuid4 или uuid7 в зависимости от set_oid_format
     oid: str = field(
-        default_factory=lambda: str(uuid.uuid4()),
+        default_factory=new_oid,
         kw_only=True
     )
+    # Версия сохраненного документа для оптимистичной блокировки. Не участвует в сравнении сущностей
+    version: int = field(
+        default=0,
+        kw_only=True,
+        compare=False
+    )
 
     def __hash__(self) -> int:
         return hash(self.oid)
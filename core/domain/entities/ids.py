@@ -0,0 +1,103 @@
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+
+"""Идентификаторы сущностей.
+
+Идентификатор хранится и передается строкой в каноническом виде UUID, поэтому старые случайные uuid4
+и новые упорядоченные по времени uuid7 живут в одном каталоге. Внутри индексов идентификатор можно
+держать 128-битным целым (oid_to_int) и превращать обратно в строку только на выходе (int_to_oid).
+
+uuid7: 48 бит - миллисекунды unix time, 4 бита - версия, 12 бит - счетчик внутри миллисекунды,
+2 бита - вариант, 62 бита - случайные. Идентификаторы, созданные в одном процессе, строго возрастают,
+а их строки сортируются так же, как числа.
+"""
+
+
+_uuid7_lock = threading.Lock()
+_last_timestamp_ms = 0
+_last_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    global _last_timestamp_ms, _last_counter
+
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+
+        if timestamp_ms <= _last_timestamp_ms:
+            # Та же миллисекунда (или часы ушли назад): продолжаем счетчик, при переполнении занимаем следующую
+            timestamp_ms, counter = _last_timestamp_ms, _last_counter + 1
+            if counter > 0xFFF:
+                timestamp_ms, counter = timestamp_ms + 1, 0
+        else:
+            # Старший бит счетчика свободен, чтобы в одной миллисекунде поместилось не меньше 2048 идентификаторов
+            counter = secrets.randbits(11)
+
+        _last_timestamp_ms, _last_counter = timestamp_ms, counter
+
+    return uuid.UUID(int=(timestamp_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62))
+
+
+def new_random_oid() -> str:
+    return str(uuid.uuid4())
+
+
+def new_time_ordered_oid() -> str:
+    return str(uuid7())
+
+
+OID_FORMATS: dict[str, Callable[[], str]] = {
+    'uuid4': new_random_oid,
+    'uuid7': new_time_ordered_oid,
+}
+
+_oid_factory: Callable[[], str] = new_random_oid
+
+
+def new_oid() -> str:
+    return _oid_factory()
+
+
+def set_oid_format(oid_format: str) -> None:
+    """Выбирает формат идентификаторов новых сущностей: 'uuid4' или 'uuid7'"""
+    global _oid_factory
+    _oid_factory = OID_FORMATS[oid_format]
+
+
+def oid_to_int(oid: str) -> int | None:
+    """128-битное представление идентификатора или None, если идентификатор не UUID"""
+    try:
+        return uuid.UUID(oid).int
+    except ValueError:
+        return None
+
+
+def int_to_oid(value: int) -> str:
+    return str(uuid.UUID(int=value))
+
+
+def is_time_ordered(value: int) -> bool:
+    return (value >> 76) & 0xF == 7
+
+
+def oid_timestamp_ms(value: int) -> int:
+    return value >> 80
+
+
+def oid_created_at(oid: str) -> datetime | None:
+    """Время создания для uuid7, для остальных идентификаторов - None"""
+    value = oid_to_int(oid)
+    if value is None or not is_time_ordered(value):
+        return None
+
+    return datetime.fromtimestamp(oid_timestamp_ms(value) / 1000, tz=timezone.utc)
+
+
+def min_oid_int_at(moment: datetime) -> int:
+    """Наименьший uuid7, созданный не раньше moment. Нижняя граница для выборки по диапазону"""
+    return (int(moment.timestamp() * 1000) << 80) | (0x7 << 76)
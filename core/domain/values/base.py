@@ -1,6 +1,8 @@
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Type, TypeVar
 
 
 VT = TypeVar('VT', bound=Any)
@@ -23,3 +25,51 @@ class BaseValueObject(ABC, Generic[VT]):
     @abstractmethod
     def as_generic_type(self) -> VT:
         ...
+
+
+BVT = TypeVar('BVT', bound=BaseValueObject)
+
+
+class ValueObjectCache:
+    """
+    Ограниченный LRU кэш значений (приспособленец).
+
+    Значения неизменяемы, поэтому равные значения могут разделять один экземпляр, а проверка
+    validate выполняется только при первом создании. В ключ входит тип исходного значения,
+    чтобы, например, Status(1) не подменился закэшированным Status(True).
+    """
+
+    def __init__(self, max_size: int = 65536) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple, BaseValueObject] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, value_type: Type[BVT], value: Any) -> BVT:
+        key = (value_type, type(value), value)
+
+        with self._lock:
+            instance = self._cache.get(key)
+            if instance is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return instance
+
+        # Создаем вне блокировки: validate может выбросить исключение
+        instance = value_type(value)
+
+        with self._lock:
+            self.misses += 1
+            instance = self._cache.setdefault(key, instance)
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return instance
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
@@ -11,7 +11,7 @@ from core.domain.exceptions.books import (
     BookYearMoreThanCurrentYearException, BookYearMustBeFourDigitsException, BookStatusIsEmptyException,
     BookStatusMustBeBooleanException
 )
-from core.domain.values.base import BaseValueObject, VT
+from core.domain.values.base import BaseValueObject, ValueObjectCache, VT
 
 
 """Значения для книг"""
@@ -96,3 +96,7 @@ class Status(BaseValueObject[bool]):
 
     def as_generic_type(self) -> bool:
         return bool(self.value)
+
+
+# Общий кэш значений для загрузки каталога: у многих книг один автор, год и статус
+value_cache = ValueObjectCache()
@@ -0,0 +1,331 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator
+
+from core.infra.exceptions.books import ChangeFeedGapException
+
+
+"""Лента изменений каталога книг.
+
+Репозиторий передает подключенным лентам (attach_feed) изменения парами (старый документ, новый документ)
+после того, как они видны читателям и сохранены: при отложенной записи - после сброса в файл. Поэтому
+в ленту попадают только зафиксированные и сохраненные изменения и в порядке их фиксации. Каждое
+изменение получает следующий номер.
+
+Потребители внутри процесса подписываются (subscribe) и получают изменения через очередь, другие
+процессы читают файл ленты (по json строке на изменение) через tail_changes, как tail -f.
+И те и другие могут продолжить с номера последнего обработанного изменения. Очередь подписки
+ограничена: отставшего потребителя лента отключает, а не копит изменения и не задерживает запись.
+
+Лента видит только изменения, сделанные через репозиторий, к которому она подключена. В файл ленты
+должен писать один процесс.
+"""
+
+
+ADDED = 'added'
+UPDATED = 'updated'
+DELETED = 'deleted'
+CLEARED = 'cleared'
+
+_BLOCK = 1 << 16
+
+
+@dataclass(frozen=True)
+class BookChange:
+    """
+    Изменение каталога.
+
+    Атрибуты:
+    - sequence: Номер изменения, возрастает на 1 с каждым изменением.
+    - type: ADDED, UPDATED, DELETED или CLEARED (каталог очищен, oid и document - None).
+    - oid: Идентификатор книги.
+    - document: Новый документ книги, для DELETED и CLEARED - None.
+    """
+    sequence: int
+    type: str
+    oid: str | None
+    document: dict | None
+
+    @classmethod
+    def from_documents(cls, sequence: int, old_document: dict | None, new_document: dict | None) -> 'BookChange':
+        if new_document is None:
+            if old_document is None:
+                return cls(sequence, CLEARED, None, None)
+            return cls(sequence, DELETED, old_document['oid'], None)
+
+        change_type = ADDED if old_document is None else UPDATED
+        return cls(sequence, change_type, new_document['oid'], new_document)
+
+    def encode(self) -> bytes:
+        record = {'sequence': self.sequence, 'type': self.type, 'oid': self.oid, 'document': self.document}
+        return json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    @classmethod
+    def decode(cls, line: bytes) -> 'BookChange':
+        return cls(**json.loads(line))
+
+
+def _rfind_newline(file: BinaryIO, end: int) -> int:
+    """Смещение последнего перевода строки до end или -1. Файл читается с конца блоками"""
+    position = end
+    while position > 0:
+        start = max(0, position - _BLOCK)
+        file.seek(start)
+        found = file.read(position - start).rfind(b'\n')
+        if found >= 0:
+            return start + found
+        position = start
+
+    return -1
+
+
+def _recover_log(path: str) -> int:
+    """Отбрасывает оборванную при сбое последнюю запись и возвращает номер последнего изменения в файле"""
+    with open(path, 'r+b') as file:
+        end = _rfind_newline(file, file.seek(0, os.SEEK_END))
+        file.truncate(end + 1)
+        if end < 0:
+            return 0
+
+        start = _rfind_newline(file, end) + 1
+        file.seek(start)
+        return BookChange.decode(file.read(end - start)).sequence
+
+
+def _offset_after(file: BinaryIO, after: int) -> int:
+    """
+        Смещение, начиная с которого в файле нет изменений с номером не больше after, кроме, возможно,
+        нескольких первых строк. Номера в файле возрастают, поэтому смещение ищется бинарным поиском по байтам.
+    """
+    low, high = 0, file.seek(0, os.SEEK_END)
+
+    while high - low > _BLOCK:
+        middle = (low + high) // 2
+        file.seek(middle)
+        file.readline()
+        start = file.tell()
+        line = file.readline()
+
+        if line.endswith(b'\n') and BookChange.decode(line).sequence <= after:
+            low = start + len(line)
+        else:
+            high = middle
+
+    return low
+
+
+def _read_log(path: str, after: int, last: int, limit: int | None) -> list[BookChange]:
+    with open(path, 'rb') as file:
+        file.seek(_offset_after(file, after))
+        changes = (BookChange.decode(line) for line in file if line.endswith(b'\n'))
+        changes = (change for change in changes if after < change.sequence <= last)
+        return list(islice(changes, limit))
+
+
+def _wait(stop: threading.Event | None, timeout: float) -> bool:
+    """Ждет timeout секунд, возвращает True, если за это время установлен stop"""
+    if stop is None:
+        time.sleep(timeout)
+        return False
+
+    return stop.wait(timeout)
+
+
+def tail_changes(
+        path: str,
+        after: int = 0,
+        poll_interval: float = 0.5,
+        stop: threading.Event | None = None,
+) -> Iterator[BookChange]:
+    """
+        Отдает изменения из файла ленты с номером больше after и затем ждет новые, как tail -f.
+        Останавливается, когда установлен stop. Может работать в другом процессе, чем пишущий ленту.
+    """
+    while not os.path.exists(path):
+        if _wait(stop, poll_interval):
+            return
+
+    with open(path, 'rb') as file:
+        file.seek(_offset_after(file, after))
+        pending = b''
+
+        while stop is None or not stop.is_set():
+            line = file.readline()
+            if not line:
+                _wait(stop, poll_interval)
+                continue
+
+            # Запись могла быть прочитана раньше, чем дописана целиком
+            pending += line
+            if not pending.endswith(b'\n'):
+                continue
+
+            change, pending = BookChange.decode(pending), b''
+            if change.sequence > after:
+                yield change
+
+
+class ChangeSubscription:
+    """
+    Подписка на ленту изменений внутри процесса.
+
+    Изменения складываются в очередь подписки и забираются get() или перебором в потоке потребителя,
+    поэтому медленный потребитель не задерживает запись в репозиторий. После close() перебор завершается.
+
+    В очереди ждут не больше max_pending новых изменений. Если потребитель отстал сильнее, лента
+    закрывает подписку и выставляет overflowed: потребитель дочитывает очередь и подписывается снова
+    с after равным номеру последнего обработанного изменения, пропущенные берутся из памяти или файла ленты.
+    """
+
+    def __init__(self, feed: 'ChangeFeed', max_pending: int) -> None:
+        self._feed = feed
+        self._queue: queue.SimpleQueue[BookChange | None] = queue.SimpleQueue()
+        self.max_pending = max_pending
+        self.closed = False
+        self.overflowed = False
+
+    def _deliver(self, changes: list[BookChange], bounded: bool = True) -> bool:
+        """Кладет изменения в очередь. False, если подписка отстала и закрыта"""
+        if bounded and self._queue.qsize() + len(changes) > self.max_pending:
+            self.overflowed = self.closed = True
+            self._queue.put(None)
+            return False
+
+        for change in changes:
+            self._queue.put(change)
+        return True
+
+    def get(self, timeout: float | None = None) -> BookChange | None:
+        """Следующее изменение или None, если подписка закрыта или за timeout секунд изменений не было"""
+        if self.closed and self._queue.empty():
+            return None
+
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self) -> Iterator[BookChange]:
+        while (change := self.get()) is not None:
+            yield change
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self._feed._unsubscribe(self)
+        self.closed = True
+        self._queue.put(None)
+
+    def __enter__(self) -> 'ChangeSubscription':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ChangeFeed:
+    """
+    Лента изменений каталога.
+
+    Атрибуты:
+    - path: Файл ленты или None, если лента хранится только в памяти.
+    - buffer_size: Сколько последних изменений хранится в памяти.
+
+    Методы:
+    - publish(self, changes) -> list[BookChange]: Нумерует изменения (пары документов), дописывает их
+      в файл одной записью и раздает подписчикам. Вызывается репозиторием.
+    - read(self, after=0, limit=None) -> list[BookChange]: Изменения с номером больше after. Берутся из памяти,
+      а если их там уже нет - из файла. Без файла выбрасывает ChangeFeedGapException.
+    - subscribe(self, after=None) -> ChangeSubscription: Подписка на новые изменения. С after сначала
+      получает изменения после after, так что между прочитанными ранее и новыми нет пропусков.
+      Очередь подписки ограничена max_pending изменениями, по умолчанию buffer_size.
+    """
+
+    def __init__(self, path: str | None = None, buffer_size: int = 10000) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._changes: deque[BookChange] = deque(maxlen=buffer_size)
+        self._subscriptions: list[ChangeSubscription] = []
+        self._sequence = 0
+        self._file: BinaryIO | None = None
+
+        if path is not None:
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            self._sequence = _recover_log(path)
+            self._file = open(path, 'ab')
+
+    @property
+    def last_sequence(self) -> int:
+        return self._sequence
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def publish(self, changes: Iterable[tuple[dict | None, dict | None]]) -> list[BookChange]:
+        with self._lock:
+            published = []
+            for old_document, new_document in changes:
+                self._sequence += 1
+                published.append(BookChange.from_documents(self._sequence, old_document, new_document))
+
+            if not published:
+                return published
+
+            if self._file is not None:
+                self._file.write(b''.join(change.encode() for change in published))
+                self._file.flush()
+
+            self._changes.extend(published)
+            for subscription in list(self._subscriptions):
+                if not subscription._deliver(published):
+                    self._subscriptions.remove(subscription)
+
+        return published
+
+    def _read_unlocked(self, after: int, limit: int | None) -> list[BookChange]:
+        if after >= self._sequence:
+            return []
+
+        oldest = self._changes[0].sequence if self._changes else self._sequence + 1
+        if oldest <= after + 1:
+            # Номера в памяти идут подряд, поэтому позиция изменения вычисляется по номеру
+            start = after + 1 - oldest
+            stop = None if limit is None else start + limit
+            return list(islice(self._changes, start, stop))
+
+        if self.path is None:
+            raise ChangeFeedGapException(after, oldest)
+
+        return _read_log(self.path, after, self._sequence, limit)
+
+    def read(self, after: int = 0, limit: int | None = None) -> list[BookChange]:
+        with self._lock:
+            return self._read_unlocked(after, limit)
+
+    def subscribe(self, after: int | None = None, max_pending: int | None = None) -> ChangeSubscription:
+        subscription = ChangeSubscription(self, self.buffer_size if max_pending is None else max_pending)
+
+        with self._lock:
+            if after is not None:
+                # Пропущенные изменения потребитель запросил сам, поэтому ограничение очереди к ним не применяется
+                subscription._deliver(self._read_unlocked(after, None), bounded=False)
+            self._subscriptions.append(subscription)
+
+        return subscription
+
+    def _unsubscribe(self, subscription: ChangeSubscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
@@ -1,25 +1,117 @@
+from typing import Iterable
+
 from core.domain.entities.books import Book
-from core.domain.values.books import Title, Author, Year, Status
+from core.domain.values.books import Title, Author, Year, Status, value_cache
+from core.infra.exceptions.books import UnknownBookFieldException, BookFieldNotProjectedException
 
 
 """Методы для конвертации данных между сущностями и документами."""
 
 
+BOOK_FIELDS = ('oid', 'title', 'author', 'year', 'status', 'version')
+
+
 def convert_book_to_document(book: Book) -> dict:
     return {
         'oid': book.oid,
         'title': book.title.as_generic_type(),
         'author': book.author.as_generic_type(),
         'year': book.year.as_generic_type(),
-        'status': book.status.as_generic_type()
+        'status': book.status.as_generic_type(),
+        'version': book.version
     }
 
 
 def convert_document_to_book(document: dict) -> Book:
+    # Авторы, годы и статусы повторяются, поэтому берутся из общего кэша. Названия почти уникальны
+    # и только вытесняли бы из кэша полезные значения
     return Book(
         oid=document['oid'],
         title=Title(document['title']),
-        author=Author(document['author']),
-        year=Year(document['year']),
-        status=Status(document['status'])
+        author=value_cache.get(Author, document['author']),
+        year=value_cache.get(Year, document['year']),
+        status=value_cache.get(Status, document['status']),
+        version=document.get('version', 0)  # Документы, сохраненные до появления версий
     )
+
+
+class BookView:
+    """
+    Ленивое представление книги только для чтения поверх документа.
+
+    Объекты-значения создаются при первом обращении к полю и запоминаются, поэтому для списка,
+    из которого показываются только название и oid, не создаются и не проверяются остальные значения.
+    При проекции (fields) доступны только перечисленные поля и oid.
+    """
+
+    __slots__ = ('_document', '_fields', '_title', '_author', '_year', '_status')
+
+    def __init__(self, document: dict, fields: frozenset[str] | None = None) -> None:
+        self._document = document
+        self._fields = fields
+        self._title = self._author = self._year = self._status = None
+
+    def _raw(self, field: str) -> object:
+        if self._fields is not None and field not in self._fields:
+            raise BookFieldNotProjectedException(field)
+        return self._document[field]
+
+    @property
+    def oid(self) -> str:
+        return self._document['oid']
+
+    @property
+    def version(self) -> int:
+        if self._fields is not None and 'version' not in self._fields:
+            raise BookFieldNotProjectedException('version')
+        return self._document.get('version', 0)
+
+    @property
+    def title(self) -> Title:
+        if self._title is None:
+            self._title = Title(self._raw('title'))
+        return self._title
+
+    @property
+    def author(self) -> Author:
+        if self._author is None:
+            self._author = value_cache.get(Author, self._raw('author'))
+        return self._author
+
+    @property
+    def year(self) -> Year:
+        if self._year is None:
+            self._year = value_cache.get(Year, self._raw('year'))
+        return self._year
+
+    @property
+    def status(self) -> Status:
+        if self._status is None:
+            self._status = value_cache.get(Status, self._raw('status'))
+        return self._status
+
+    def to_book(self) -> Book:
+        return convert_document_to_book(self._document)
+
+    def __repr__(self) -> str:
+        return f'BookView(oid={self.oid!r}, fields={sorted(self._fields) if self._fields is not None else "all"})'
+
+
+def projection(fields: Iterable[str] | None) -> frozenset[str] | None:
+    """Проверяет поля проекции. oid входит в любую проекцию"""
+    if fields is None:
+        return None
+
+    fields = frozenset(fields) | {'oid'}
+    for field in fields:
+        if field not in BOOK_FIELDS:
+            raise UnknownBookFieldException(field)
+
+    return fields
+
+
+def project_document(document: dict, fields: frozenset[str] | None) -> dict:
+    """Документ только с полями проекции: меньше данных передается между процессами"""
+    if fields is None:
+        return document
+    return {field: document[field] for field in fields if field in document}
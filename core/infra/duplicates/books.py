@@ -0,0 +1,183 @@
+import zlib
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import groupby
+from operator import eq
+from typing import Iterable
+
+from core.infra.indexes.fuzzy import normalize_text, trigrams
+
+
+"""Поиск вероятных дублей книг через MinHash и LSH.
+
+Книга представляется множеством триграмм нормализованных названия и автора, а похожесть двух книг -
+коэффициентом Жаккара этих множеств. Для каждой книги строится MinHash подпись, совпадение позиций
+подписей двух книг оценивает их коэффициент Жаккара.
+
+Подпись строится за один проход по триграммам (one permutation hashing): хеш триграммы выбирает
+позицию подписи и значение, в позиции остается минимальное. Пустые позиции заполняются значением
+ближайшей непустой позиции справа со сдвигом на расстояние до нее (ротационное уплотнение).
+
+Подпись делится на bands полос. Кандидаты в дубли - книги, у которых совпала хотя бы одна полоса:
+книги каждой полосы сортируются по хешу полосы, и совпадения оказываются рядом. Кандидаты проверяются
+по всей подписи, подтвержденные пары объединяются в кластеры. Кластеры объединяются, только если каждая
+книга присоединяемого кластера похожа на представителя: похожесть не транзитивна, и цепочка попарно
+похожих книг не должна собирать в один кластер непохожие. Время - O(N log N) на полосу вместо O(N^2).
+"""
+
+
+_HASH_MASK = (1 << 64) - 1
+_VALUE_MASK = (1 << 32) - 1
+_EMPTY = 1 << 32
+_ROTATION = 0x9E3779B1
+_MIX = 0x9E3779B97F4A7C15
+
+
+@lru_cache(maxsize=1 << 16)
+def _shingle_hash(shingle: str) -> int:
+    """
+        64-битный хеш триграммы, одинаковый во всех процессах: crc32, перемешанный умножением.
+        Триграмм в каталоге немного, и большинство хешей берется из кеша.
+    """
+    return (zlib.crc32(shingle.encode('utf-8')) * _MIX) & _HASH_MASK
+
+
+def book_shingles(title: str, author: str) -> set[str]:
+    return trigrams(normalize_text(f'{title} {author}'))
+
+
+def minhash_signature(shingles: Iterable[str], size: int = 64) -> list[int]:
+    """MinHash подпись из size 32-битных значений. Для пустого множества все позиции пустые"""
+    signature = [_EMPTY] * size
+
+    for shingle in shingles:
+        hashed = _shingle_hash(shingle)
+        position, value = hashed % size, (hashed // size) & _VALUE_MASK
+        if value < signature[position]:
+            signature[position] = value
+
+    if _EMPTY not in signature or min(signature) == _EMPTY:
+        return signature
+
+    # Обход по кругу справа налево: пустая позиция берет значение ближайшей непустой справа
+    dense, nearest, distance = signature[:], None, 0
+    for step in range(2 * size - 1, -1, -1):
+        position = step % size
+        if signature[position] != _EMPTY:
+            nearest, distance = signature[position], 0
+            continue
+
+        distance += 1
+        if nearest is not None and step < size:
+            dense[position] = (nearest + distance * _ROTATION) & _VALUE_MASK
+
+    return dense
+
+
+@dataclass(frozen=True)
+class DuplicateCluster:
+    """
+    Кластер вероятных дублей.
+
+    Атрибуты:
+    - oids: Книги кластера, первая - представитель кластера.
+    - scores: Оценка коэффициента Жаккара каждой книги с представителем (у представителя - 1.0).
+    """
+    oids: tuple[str, ...]
+    scores: tuple[float, ...]
+
+    @property
+    def similarity(self) -> float:
+        """Наименьшая похожесть на представителя"""
+        return min(self.scores[1:], default=1.0)
+
+
+def find_duplicates(
+        books: Iterable[tuple[str, str, str]],
+        threshold: float = 0.7,
+        size: int = 64,
+        bands: int = 16,
+        max_bucket_size: int = 100,
+) -> list[DuplicateCluster]:
+    """
+        Кластеры книг, похожих на представителя кластера (первую книгу) с оценкой не меньше threshold,
+        от самых больших и похожих.
+
+        books - тройки (oid, название, автор). Книги полосы, в которой совпало больше max_bucket_size подписей
+        (например, много экземпляров одной книги), сравниваются только с первой из них, а не попарно.
+    """
+    oids: list[str] = []
+    # Подписи всех книг подряд в одном массиве: 4 байта на позицию вместо объекта int
+    signatures = array('I')
+
+    for oid, title, author in books:
+        shingles = book_shingles(title, author)
+        if shingles:
+            oids.append(oid)
+            signatures.extend(minhash_signature(shingles, size))
+
+    def similarity(first: int, second: int) -> float:
+        return sum(map(
+            eq,
+            signatures[first * size:(first + 1) * size],
+            signatures[second * size:(second + 1) * size],
+        )) / size
+
+    parents = list(range(len(oids)))
+    # Книги кластеров из нескольких книг по представителю, им всегда оказывается книга с наименьшим номером
+    members: dict[int, list[int]] = {}
+
+    def find(book: int) -> int:
+        while parents[book] != book:
+            parents[book] = parents[parents[book]]
+            book = parents[book]
+        return book
+
+    checked: set[tuple[int, int]] = set()
+
+    def check(first: int, second: int) -> None:
+        first_root, second_root = find(first), find(second)
+        if first_root == second_root or (first, second) in checked:
+            return
+
+        checked.add((first, second))
+        if similarity(first, second) < threshold:
+            return
+
+        root, other_root = min(first_root, second_root), max(first_root, second_root)
+        joined = members.pop(other_root, [other_root])
+        if any(similarity(root, book) < threshold for book in joined):
+            if len(joined) > 1:
+                members[other_root] = joined
+            return
+
+        parents[other_root] = root
+        members.setdefault(root, [root]).extend(joined)
+
+    for band in range(bands):
+        # Позиции полосы берутся через bands, а не подряд: соседние пустые позиции уплотняются
+        # из одной и той же непустой, и полоса из соседних позиций совпадала бы у непохожих книг
+        keys = [hash(tuple(signatures[book * size + band:(book + 1) * size:bands])) for book in range(len(oids))]
+
+        for _, bucket in groupby(sorted(range(len(oids)), key=keys.__getitem__), key=keys.__getitem__):
+            bucket = list(bucket)
+            if len(bucket) > max_bucket_size:
+                for book in bucket[1:]:
+                    check(bucket[0], book)
+                continue
+
+            for position, first in enumerate(bucket):
+                for second in bucket[position + 1:]:
+                    check(first, second)
+
+    clusters = [
+        DuplicateCluster(
+            oids=tuple(oids[book] for book in group),
+            scores=tuple(1.0 if book == group[0] else similarity(group[0], book) for book in group),
+        )
+        for group in map(sorted, members.values())
+    ]
+    clusters.sort(key=lambda cluster: (-len(cluster.oids), -cluster.similarity))
+
+    return clusters
@@ -10,3 +10,136 @@ class BookNotFoundException(InfrastructureException):
     @property
     def message(self) -> str:
         return f'Book with oid "{self.book_oid}" not found'
+
+
+@dataclass(eq=False)
+class UnsupportedBooksFileFormatException(InfrastructureException):
+    path: str
+
+    @property
+    def message(self) -> str:
+        return f'Unsupported books file format (expected .csv or .jsonl): "{self.path}"'
+
+
+@dataclass(eq=False)
+class ShardCountMismatchException(InfrastructureException):
+    directory: str
+    expected: int
+    actual: int
+
+    @property
+    def message(self) -> str:
+        return f'Catalog "{self.directory}" has {self.actual} shards, but {self.expected} were requested. ' \
+               f'Use reshard_books_catalog to change the shard count'
+
+
+@dataclass(eq=False)
+class BookVersionConflictException(InfrastructureException):
+    book_oid: str
+    expected_version: int
+    actual_version: int
+
+    @property
+    def message(self) -> str:
+        return f'Book with oid "{self.book_oid}" was modified concurrently: ' \
+               f'expected version {self.expected_version}, found {self.actual_version}'
+
+
+@dataclass(eq=False)
+class ReadOnlyRepositoryException(InfrastructureException):
+    operation: str
+
+    @property
+    def message(self) -> str:
+        return f'Repository is read-only, "{self.operation}" is not supported'
+
+
+@dataclass(eq=False)
+class SharedCatalogNotPublishedException(InfrastructureException):
+    name: str
+
+    @property
+    def message(self) -> str:
+        return f'Shared memory catalog "{self.name}" is not published'
+
+
+@dataclass(eq=False)
+class UnknownBookFieldException(InfrastructureException):
+    field: str
+
+    @property
+    def message(self) -> str:
+        return f'Unknown book field "{self.field}"'
+
+
+@dataclass(eq=False)
+class BookFieldNotProjectedException(InfrastructureException):
+    field: str
+
+    @property
+    def message(self) -> str:
+        return f'Field "{self.field}" was not requested in the projection'
+
+
+@dataclass(eq=False)
+class InvalidBookCursorException(InfrastructureException):
+    cursor: str
+
+    @property
+    def message(self) -> str:
+        return f'Invalid or foreign pagination cursor "{self.cursor}"'
+
+
+@dataclass(eq=False)
+class ChangeFeedGapException(InfrastructureException):
+    after: int
+    oldest: int
+
+    @property
+    def message(self) -> str:
+        return f'Changes after sequence {self.after} are no longer available, the oldest kept change is {self.oldest}'
+
+
+@dataclass(eq=False)
+class MerkleDepthMismatchException(InfrastructureException):
+    source_depth: int
+    target_depth: int
+
+    @property
+    def message(self) -> str:
+        return f'Cannot compare Merkle trees of depth {self.source_depth} and {self.target_depth}'
+
+
+@dataclass(eq=False)
+class CatalogNotFoundException(InfrastructureException):
+    path: str
+
+    @property
+    def message(self) -> str:
+        return f'Catalog file "{self.path}" not found'
+
+
+@dataclass(eq=False)
+class InvalidCatalogIdException(InfrastructureException):
+    catalog_id: str
+
+    @property
+    def message(self) -> str:
+        return f'Invalid catalog id "{self.catalog_id}": expected 1-64 letters, digits, "_" or "-"'
+
+
+@dataclass(eq=False)
+class TransactionRolledBackException(InfrastructureException):
+    @property
+    def message(self) -> str:
+        return 'A nested transaction was rolled back, so the outer transaction cannot be committed'
+
+
+@dataclass(eq=False)
+class CorruptedRecordException(InfrastructureException):
+    path: str
+    offset: int
+
+    @property
+    def message(self) -> str:
+        return f'Corrupted record at byte {self.offset} of "{self.path}"'
@@ -10,3 +10,11 @@ class BookFilters:
     author: str | None = None
     year: str | None = None
     status: bool | None = None
+
+
+def match_document(document: dict, filters: BookFilters) -> bool:
+    """Проверяет документ книги без создания сущности. Семантика совпадает с фильтрами репозитория"""
+    return (filters.title is None or filters.title.lower() in document['title'].lower()) and \
+           (filters.author is None or filters.author.lower() in document['author'].lower()) and \
+           (filters.year is None or document['year'] == filters.year) and \
+           (filters.status is None or document['status'] == filters.status)
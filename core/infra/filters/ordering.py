@@ -0,0 +1,151 @@
+import base64
+import heapq
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable
+
+from core.infra.exceptions.books import UnknownBookFieldException, InvalidBookCursorException
+
+
+"""Сортировка, ограничение и курсорная пагинация выборок книг.
+
+Порядок задается строкой вида '-year,title' (минус - по убыванию) или списком таких полей.
+Название и автор сравниваются без учета регистра. Последним ключом всегда идет oid, поэтому порядок
+полный, и курсор (ключ последней отданной книги) однозначно указывает, с чего продолжать. Следующая
+страница - это книги строго после курсора, а не после N-й позиции, поэтому добавление и удаление книг
+между запросами не сдвигает страницы и не дублирует книги.
+
+При небольшом limit первые книги выбираются кучей (heapq.nsmallest) за O(n log limit) без полной сортировки.
+"""
+
+
+ORDER_FIELDS = ('title', 'author', 'year', 'status', 'oid')
+
+
+@dataclass(frozen=True)
+class BookOrder:
+    field: str
+    descending: bool = False
+
+    def __str__(self) -> str:
+        return f'-{self.field}' if self.descending else self.field
+
+
+def parse_order_by(order_by: str | Iterable[str] | None) -> tuple[BookOrder, ...]:
+    if not order_by:
+        return ()
+
+    if isinstance(order_by, str):
+        order_by = order_by.split(',')
+
+    orders = []
+    for item in order_by:
+        item = item.strip()
+        if not item:
+            continue
+
+        descending = item.startswith('-')
+        field = item.lstrip('+-')
+        if field not in ORDER_FIELDS:
+            raise UnknownBookFieldException(field)
+        orders.append(BookOrder(field, descending))
+
+    return tuple(orders)
+
+
+class _Descending:
+    """Обратный порядок для значений, которые нельзя просто взять со знаком минус (строки)"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: '_Descending') -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+
+
+def _normalize(field: str, value: Any) -> Any:
+    if field in ('title', 'author'):
+        return value.casefold()
+    return value
+
+
+def order_key(orders: tuple[BookOrder, ...]) -> Callable[[dict], tuple]:
+    def key(document: dict) -> tuple:
+        values = []
+        for order in orders:
+            value = _normalize(order.field, document[order.field])
+            values.append(_Descending(value) if order.descending else value)
+        values.append(document['oid'])
+        return tuple(values)
+
+    return key
+
+
+def order_fields(orders: tuple[BookOrder, ...]) -> frozenset[str]:
+    """Поля документа, нужные для сортировки и курсора"""
+    return frozenset(order.field for order in orders) | {'oid'}
+
+
+def _spec(orders: tuple[BookOrder, ...]) -> str:
+    return ','.join(map(str, orders))
+
+
+def encode_cursor(document: dict, orders: tuple[BookOrder, ...]) -> str:
+    """Курсор, указывающий на позицию сразу после документа"""
+    payload = {'order': _spec(orders), 'key': [document[field] for field in sorted(order_fields(orders))]}
+    return base64.urlsafe_b64encode(json.dumps(payload, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, orders: tuple[BookOrder, ...]) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if payload['order'] != _spec(orders):
+            raise ValueError('cursor belongs to another order')
+        document = dict(zip(sorted(order_fields(orders)), payload['key'], strict=True))
+    except (ValueError, KeyError, TypeError):
+        raise InvalidBookCursorException(cursor)
+
+    return order_key(orders)(document)
+
+
+def book_cursor(book: Any, order_by: str | Iterable[str] | None) -> str:
+    """Курсор после книги (Book или BookView) для следующей страницы той же выборки"""
+    orders = parse_order_by(order_by)
+    document = {
+        field: book.oid if field == 'oid' else getattr(book, field).as_generic_type()
+        for field in order_fields(orders)
+    }
+    return encode_cursor(document, orders)
+
+
+def order_documents(
+        documents: Iterable[dict],
+        order_by: str | Iterable[str] | None = None,
+        limit: int | None = None,
+        after: str | None = None,
+) -> Iterable[dict]:
+    """
+        Упорядочивает документы и отдает не больше limit штук после курсора after.
+        Без order_by, limit и after документы отдаются как есть. Курсор без порядка означает порядок по oid.
+    """
+    orders = parse_order_by(order_by)
+
+    if not orders and after is None:
+        return documents if limit is None else list(islice(documents, limit))
+
+    key = order_key(orders)
+
+    if after is not None:
+        bound = decode_cursor(after, orders)
+        documents = (document for document in documents if bound < key(document))
+
+    if limit is None:
+        return sorted(documents, key=key)
+
+    return heapq.nsmallest(limit, documents, key=key)
@@ -0,0 +1,278 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Mapping
+
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Планировщик выборки книг по фильтрам.
+
+Селективность предиката (доля книг, которые под него подходят) оценивается по случайной выборке
+документов каталога. Выборка берется заново, когда размер каталога заметно изменился или она устарела,
+а оценки для уже встречавшихся значений фильтров кэшируются до следующей выборки.
+
+По оценкам планировщик выбирает:
+- порядок проверки предикатов: сначала самые селективные, при равенстве - дешевые (сравнение года
+  и статуса дешевле поиска подстроки), чтобы большинство документов отсеивалось первой проверкой;
+- способ доступа: полный просмотр или пересечение кандидатов одного или нескольких индексов.
+  Стоимость просмотра пропорциональна размеру каталога, стоимость индексов - количеству кандидатов,
+  которые они отдают, и количеству документов, которые придется достать по oid и проверить.
+
+Документы-кандидаты всегда проверяются всеми предикатами, поэтому индексы могут отдавать лишние oid.
+"""
+
+
+SCAN_ACCESS = 'scan'
+INDEX_ACCESS = 'index'
+
+SUBSTRING_FIELDS = ('title', 'author')
+
+# Стоимости в условных единицах: проверка года одного документа при полном просмотре = 1
+CANDIDATE_COST = 3.0  # Получение одного oid от индекса и пересечение
+FETCH_COST = 3.0  # Получение документа по oid, без проверки предикатов
+INDEX_LOOKUP_COST = 50.0  # Постоянные расходы на обращение к индексу
+PREDICATE_COSTS = {'title': 2.5, 'author': 2.5, 'year': 1.0, 'status': 1.0}
+
+
+def filter_predicates(filters: BookFilters | None) -> list[tuple[str, object]]:
+    """Заданные в фильтрах пары (поле, значение)"""
+    if filters is None:
+        return []
+
+    return [
+        (name, value) for name, value in
+        (('title', filters.title), ('author', filters.author), ('year', filters.year), ('status', filters.status))
+        if value is not None
+    ]
+
+
+def build_predicate(name: str, value: object) -> Callable[[dict], bool]:
+    """Проверка одного поля документа. Семантика совпадает с match_document"""
+    if name in SUBSTRING_FIELDS:
+        needle = value.lower()
+        return lambda document: needle in document[name].lower()
+
+    return lambda document: document[name] == value
+
+
+def build_matcher(predicates: Iterable[tuple[str, object]]) -> Callable[[dict], bool]:
+    """Конъюнкция предикатов, проверяемых в заданном порядке до первого несовпадения"""
+    checks = [build_predicate(name, value) for name, value in predicates]
+
+    if not checks:
+        return lambda document: True
+
+    # Цепочка замыканий быстрее, чем all() по генератору
+    matcher = checks[-1]
+    for check in reversed(checks[:-1]):
+        matcher = (lambda first, rest: lambda document: first(document) and rest(document))(check, matcher)
+
+    return matcher
+
+
+@dataclass
+class QueryPlan:
+    """
+    План выборки.
+
+    Атрибуты:
+    - filters: Фильтры выборки.
+    - access: SCAN_ACCESS - полный просмотр, INDEX_ACCESS - пересечение кандидатов индексов indexes.
+    - indexes: Индексы, кандидаты которых пересекаются, от самого селективного.
+    - predicates: Поля в порядке проверки с оценкой селективности (None, если оценки нет).
+    - total_rows: Количество книг в каталоге.
+    - estimated_candidates: Оценка количества документов, которые будут проверены.
+    - estimated_rows: Оценка количества подходящих книг (предикаты считаются независимыми).
+    - actual_candidates, actual_rows: Фактические значения, заполняются explain().
+    - matches: Проверка документа всеми предикатами в порядке predicates.
+    """
+    filters: BookFilters | None
+    access: str
+    indexes: tuple[BaseBooksIndex, ...]
+    predicates: tuple[tuple[str, float | None], ...]
+    total_rows: int
+    estimated_candidates: int
+    estimated_rows: int
+    actual_candidates: int | None = None
+    actual_rows: int | None = None
+    matches: Callable[[dict], bool] = field(default=lambda document: True, repr=False, compare=False)
+
+    @classmethod
+    def full_scan(cls, filters: BookFilters | None, total_rows: int) -> 'QueryPlan':
+        """План без оценок: просмотр всех документов с проверкой предикатов в порядке полей фильтров"""
+        predicates = filter_predicates(filters)
+
+        return cls(
+            filters=filters,
+            access=SCAN_ACCESS,
+            indexes=(),
+            predicates=tuple((name, None) for name, _ in predicates),
+            total_rows=total_rows,
+            estimated_candidates=total_rows,
+            estimated_rows=total_rows,
+            matches=build_matcher(predicates),
+        )
+
+    def candidate_oids(self) -> list[str] | None:
+        """oid кандидатов из индексов плана или None для полного просмотра. Порядок - как у первого индекса"""
+        if self.access != INDEX_ACCESS:
+            return None
+
+        first, *others = [index.candidates(self.filters) for index in self.indexes]
+        if not others:
+            return first
+
+        others = [set(oids) for oids in others]
+        return [oid for oid in first if all(oid in oids for oids in others)]
+
+    def __str__(self) -> str:
+        if self.access == INDEX_ACCESS:
+            names = ' ∩ '.join(type(index).__name__ for index in self.indexes)
+            access = f'индексы {names}'
+        else:
+            access = 'полный просмотр'
+
+        order = ' -> '.join(
+            name if selectivity is None else f'{name} ({selectivity:.3f})' for name, selectivity in self.predicates
+        ) or '-'
+
+        lines = [
+            f'Доступ: {access}',
+            f'Порядок проверки: {order}',
+            f'Кандидатов: ~{self.estimated_candidates} из {self.total_rows}'
+            + ('' if self.actual_candidates is None else f', фактически {self.actual_candidates}'),
+            f'Книг: ~{self.estimated_rows}'
+            + ('' if self.actual_rows is None else f', фактически {self.actual_rows}'),
+        ]
+        return '\n'.join(lines)
+
+
+class QueryPlanner:
+    """
+    Планировщик выборки по статистике каталога.
+
+    Атрибуты:
+    - sample_size: Размер случайной выборки документов для оценки селективности.
+    - resample_drift: Доля, на которую должен измениться размер каталога, чтобы выборка была взята заново.
+    - max_age: Через сколько секунд выборка считается устаревшей.
+
+    Методы:
+    - selectivity(self, name, value) -> float: Оценка доли книг, подходящих под предикат.
+    - plan(self, filters, documents, indexes) -> QueryPlan: План выборки из documents.
+    """
+
+    def __init__(
+            self,
+            sample_size: int = 1000,
+            resample_drift: float = 0.1,
+            max_age: float = 60.0,
+            seed: int | None = None,
+    ) -> None:
+        self.sample_size = sample_size
+        self.resample_drift = resample_drift
+        self.max_age = max_age
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sample: list[dict] = []
+        self._sampled_rows: int | None = None
+        self._sampled_at = 0.0
+        self._selectivity: dict[tuple[str, object], float] = {}
+
+    def analyze(self, documents: Mapping[str, dict]) -> None:
+        """Берет новую выборку документов. Вызывается планировщиком сам, когда выборка устарела"""
+        values = list(documents.values())
+        sample = values if len(values) <= self.sample_size else self._random.sample(values, self.sample_size)
+
+        with self._lock:
+            self._sample = sample
+            self._sampled_rows = len(values)
+            self._sampled_at = time.monotonic()
+            self._selectivity = {}
+
+    def _ensure_statistics(self, documents: Mapping[str, dict]) -> None:
+        rows = len(documents)
+        if (
+            self._sampled_rows is None
+            or abs(rows - self._sampled_rows) > self.resample_drift * self._sampled_rows
+            or time.monotonic() - self._sampled_at > self.max_age
+        ):
+            self.analyze(documents)
+
+    def selectivity(self, name: str, value: object) -> float:
+        key = (name, value)
+
+        with self._lock:
+            estimate = self._selectivity.get(key)
+            sample = self._sample
+        if estimate is not None:
+            return estimate
+
+        predicate = build_predicate(name, value)
+        # Сглаживание, чтобы значение, которого нет в выборке, не считалось невозможным
+        estimate = (sum(1 for document in sample if predicate(document)) + 0.5) / (len(sample) + 1)
+
+        with self._lock:
+            if sample is self._sample:
+                if len(self._selectivity) >= 4096:
+                    self._selectivity = {}
+                self._selectivity[key] = estimate
+
+        return estimate
+
+    def plan(
+            self,
+            filters: BookFilters | None,
+            documents: Mapping[str, dict],
+            indexes: Iterable[BaseBooksIndex] = (),
+    ) -> QueryPlan:
+        rows = len(documents)
+        predicates = filter_predicates(filters)
+        if not predicates:
+            return QueryPlan.full_scan(filters, rows)
+
+        self._ensure_statistics(documents)
+
+        estimates = {name: self.selectivity(name, value) for name, value in predicates}
+        predicates.sort(key=lambda predicate: (estimates[predicate[0]], PREDICATE_COSTS[predicate[0]]))
+
+        # Стоимость проверки одного документа: следующий предикат проверяется только у прошедших предыдущие
+        check_cost, passing = 0.0, 1.0
+        for name, _ in predicates:
+            check_cost += passing * PREDICATE_COSTS[name]
+            passing *= estimates[name]
+        estimated_rows = rows * passing
+
+        access, chosen, candidates = SCAN_ACCESS, (), rows
+        best_cost = rows * check_cost
+
+        # Сравниваются пересечения первых k индексов, от самого селективного
+        options = sorted(
+            ((index.estimate(filters), index) for index in indexes),
+            key=lambda option: float('inf') if option[0] is None else option[0],
+        )
+        lookup_cost, intersection = 0.0, float(rows)
+        for position, (estimate, index) in enumerate(options):
+            if estimate is None:
+                break
+
+            lookup_cost += INDEX_LOOKUP_COST + estimate * CANDIDATE_COST
+            intersection = intersection * estimate / rows if rows else 0.0
+            cost = lookup_cost + intersection * (FETCH_COST + check_cost)
+
+            if cost < best_cost:
+                access, best_cost = INDEX_ACCESS, cost
+                chosen, candidates = tuple(index for _, index in options[:position + 1]), intersection
+
+        return QueryPlan(
+            filters=filters,
+            access=access,
+            indexes=chosen,
+            predicates=tuple((name, estimates[name]) for name, _ in predicates),
+            total_rows=rows,
+            estimated_candidates=round(candidates),
+            estimated_rows=round(min(estimated_rows, candidates)),
+            matches=build_matcher(predicates),
+        )
@@ -0,0 +1,108 @@
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from core.infra.filters.books import BookFilters
+
+
+"""Абстрактное представление вторичных индексов над документами книг.
+
+Репозиторий сообщает индексам об изменениях парами (старый документ, новый документ):
+(None, new) - добавление, (old, None) - удаление, (old, new) - обновление, (None, None) - очистка каталога.
+Изменения внутри транзакции передаются только при commit.
+Индексы сериализуются pickle без блокировки (см. core.infra.indexes.persistence).
+"""
+
+
+class BaseBooksIndex(ABC):
+
+    @abstractmethod
+    def add(self, document: dict) -> None:
+        ...
+
+    @abstractmethod
+    def remove(self, document: dict) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        self.remove(old_document)
+        self.add(new_document)
+
+    def apply(self, old_document: dict | None, new_document: dict | None) -> None:
+        if old_document is None and new_document is None:
+            self.clear()
+        elif old_document is None:
+            self.add(new_document)
+        elif new_document is None:
+            self.remove(old_document)
+        else:
+            self.update(old_document, new_document)
+
+    def candidates(self, filters: BookFilters) -> list[str] | None:
+        """
+            oid книг, которые могут подходить под фильтры, или None, если индекс не помогает с этими фильтрами.
+            Репозиторий все равно проверяет каждый документ, поэтому лишние oid допустимы, а пропущенные - нет.
+        """
+        return None
+
+    def estimate(self, filters: BookFilters) -> int | None:
+        """
+            Оценка количества oid, которые вернет candidates, или None, если индекс не помогает с этими фильтрами.
+            Должна быть дешевле самого candidates: по ней планировщик решает, обращаться ли к индексу.
+        """
+        return None
+
+    def count(self, filters: BookFilters | None = None) -> int | None:
+        """Точное количество книг под фильтрами или None, если индекс не может посчитать его сам"""
+        return None
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        self.clear()
+        for document in documents:
+            self.add(document)
+
+    def memory_size(self) -> int:
+        """
+            Оценка памяти индекса в байтах. Обходит все его структуры, поэтому стоит O(размер индекса)
+            и не должна вызываться на каждую запись. Объекты, на которые индекс ссылается несколько раз,
+            считаются один раз.
+        """
+        lock = getattr(self, '_lock', None)
+        if lock is not None:
+            lock.acquire()
+
+        try:
+            total, seen, pending = 0, set(), [self.__getstate__()]
+            while pending:
+                value = pending.pop()
+                if id(value) in seen:
+                    continue
+
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+                if isinstance(value, dict):
+                    pending.extend(value.keys())
+                    pending.extend(value.values())
+                elif isinstance(value, (list, tuple, set, frozenset)):
+                    pending.extend(value)
+
+            return total
+        finally:
+            if lock is not None:
+                lock.release()
+
+    def __getstate__(self) -> dict:
+        state = dict(vars(self))
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # При загрузке в существующий индекс его блокировка сохраняется
+        vars(self).update(state)
+        if '_lock' not in vars(self):
+            self._lock = threading.RLock()
@@ -0,0 +1,168 @@
+import re
+import threading
+from typing import Iterable, Iterator
+
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Битовые индексы по статусу и году.
+
+Каждой книге выдается плотный номер строки (освободившиеся номера переиспользуются), а для каждого
+значения статуса и года хранится битовая карта - целое число, в котором бит строки установлен,
+если у книги это значение. Фильтр по статусу и году - это побитовое И карт, а количество
+подходящих книг - число установленных битов (int.bit_count), без обращения к документам.
+"""
+
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def iter_bits(bitmap: int) -> Iterator[int]:
+    """Номера установленных битов по возрастанию. Нулевые байты пропускаются регулярным выражением"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for match in _NONZERO_BYTE.finditer(data):
+        position = match.start()
+        base = position * 8
+        for bit in _BYTE_BITS[data[position]]:
+            yield base + bit
+
+
+class BitmapIndex(BaseBooksIndex):
+    """
+    Методы:
+    - match(self, filters) -> int | None: Битовая карта книг, подходящих под status и year фильтров,
+      или None, если в фильтрах нет ни статуса, ни года.
+    - count(self, filters) -> int | None: Количество таких книг. None, если фильтры содержат поля,
+      которых нет в индексе (название, автор), и ответ без документов невозможен.
+    - candidates(self, filters) -> list[str] | None: oid книг из match.
+    - estimate(self, filters) -> int | None: Точное количество oid, которые вернет candidates.
+    """
+
+    fields = ('status', 'year')
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows: dict[str, int] = {}
+            self._oids: list[str | None] = []
+            self._free_rows: list[int] = []
+            self._row_values: list[tuple | None] = []
+            self._bitmaps: dict[tuple[str, object], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _keys(self, document: dict) -> tuple:
+        return tuple((field, document[field]) for field in self.fields)
+
+    def add(self, document: dict) -> None:
+        with self._lock:
+            oid = document['oid']
+            if oid in self._rows:
+                self.remove({'oid': oid})
+
+            if self._free_rows:
+                row = self._free_rows.pop()
+                self._oids[row] = oid
+            else:
+                row = len(self._oids)
+                self._oids.append(oid)
+                self._row_values.append(None)
+
+            keys = self._keys(document)
+            self._rows[oid] = row
+            self._row_values[row] = keys
+
+            bit = 1 << row
+            for key in keys:
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+
+    def remove(self, document: dict) -> None:
+        with self._lock:
+            row = self._rows.pop(document['oid'], None)
+            if row is None:
+                return
+
+            mask = ~(1 << row)
+            for key in self._row_values[row]:
+                bitmap = self._bitmaps[key] & mask
+                if bitmap:
+                    self._bitmaps[key] = bitmap
+                else:
+                    del self._bitmaps[key]
+
+            self._oids[row] = None
+            self._row_values[row] = None
+            self._free_rows.append(row)
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        if old_document['oid'] == new_document['oid'] and self._keys(old_document) == self._keys(new_document):
+            return
+
+        super().update(old_document, new_document)
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            self.clear()
+
+            # Карты собираются из списков строк один раз, а не установкой битов по одному
+            rows_by_key: dict[tuple, list[int]] = {}
+            for document in documents:
+                if document['oid'] in self._rows:
+                    continue
+                row = len(self._oids)
+                keys = self._keys(document)
+                self._rows[document['oid']] = row
+                self._oids.append(document['oid'])
+                self._row_values.append(keys)
+                for key in keys:
+                    rows_by_key.setdefault(key, []).append(row)
+
+            for key, rows in rows_by_key.items():
+                bits = bytearray((len(self._oids) + 7) // 8)
+                for row in rows:
+                    bits[row >> 3] |= 1 << (row & 7)
+                self._bitmaps[key] = int.from_bytes(bits, 'little')
+
+    def match(self, filters: BookFilters) -> int | None:
+        keys = [
+            (field, value) for field, value in (('status', filters.status), ('year', filters.year))
+            if value is not None
+        ]
+        if not keys:
+            return None
+
+        with self._lock:
+            bitmap = self._bitmaps.get(keys[0], 0)
+            for key in keys[1:]:
+                bitmap &= self._bitmaps.get(key, 0)
+
+        return bitmap
+
+    def count(self, filters: BookFilters | None = None) -> int | None:
+        if filters is None:
+            return len(self._rows)
+
+        if filters.title is not None or filters.author is not None:
+            return None
+
+        bitmap = self.match(filters)
+        return len(self._rows) if bitmap is None else bitmap.bit_count()
+
+    def estimate(self, filters: BookFilters) -> int | None:
+        bitmap = self.match(filters)
+        return None if bitmap is None else bitmap.bit_count()
+
+    def candidates(self, filters: BookFilters) -> list[str] | None:
+        with self._lock:
+            bitmap = self.match(filters)
+            if bitmap is None:
+                return None
+
+            oids = self._oids
+            return [oids[row] for row in iter_bits(bitmap) if row < len(oids) and oids[row] is not None]
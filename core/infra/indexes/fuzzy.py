@@ -0,0 +1,255 @@
+import heapq
+import re
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterable
+
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Нечеткий поиск книг по названию и автору на основе триграмм.
+
+Строки приводятся к нижнему регистру (ё -> е, знаки препинания -> пробелы) и разбиваются
+на триграммы по словам. Похожесть запроса и значения - коэффициент Жаккара их множеств триграмм,
+поэтому опечатка в одной букве меняет лишь несколько триграмм из десятков.
+
+Индекс хранит различные значения полей, а не книги: у одного автора может быть много книг.
+Для каждого поля и триграммы хранится список номеров значений (array('I'), 4 байта на вхождение).
+Удаленные значения помечаются и пропускаются при поиске, а списки пересобираются, когда удаленных
+становится больше четверти.
+
+Те же списки дают кандидатов для фильтров по подстроке: значение, содержащее подстроку, содержит
+и все триграммы внутри ее слов, поэтому кандидаты - пересечение списков этих триграмм.
+"""
+
+
+_WORD = re.compile(r'\w+')
+_EMPTY = array('I')
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(_WORD.findall(text.casefold().replace('ё', 'е')))
+
+
+def trigrams(text: str) -> set[str]:
+    """Триграммы нормализованной строки. Слова дополняются пробелами, чтобы начало слова весило больше"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def substring_trigrams(text: str) -> set[str]:
+    """Триграммы, которые есть у любого значения, содержащего text как подстроку: без дополнения пробелами"""
+    return {word[index:index + 3] for word in normalize_text(text).split() for index in range(len(word) - 2)}
+
+
+@dataclass(frozen=True)
+class FuzzyMatch:
+    oid: str
+    score: float
+    field: str
+
+
+class TrigramIndex(BaseBooksIndex):
+    """
+    Триграммный индекс значений полей книг.
+
+    Атрибуты:
+    - fields: Индексируемые поля документов.
+
+    Методы:
+    - search(self, query, limit=10, fields=None, min_similarity=0.3) -> list[FuzzyMatch]: Книги,
+      отсортированные по убыванию похожести. Для книги берется лучшее из совпадений по полям.
+    - candidates(self, filters) -> list[str] | None: oid книг, значения которых могут содержать
+      подстроки из фильтров по названию и автору. None, если в подстроках нет слов длиннее двух букв.
+    - estimate(self, filters) -> int | None: Оценка сверху количества таких книг по самому короткому списку.
+    """
+
+    def __init__(self, fields: Iterable[str] = ('title', 'author')) -> None:
+        self.fields = tuple(fields)
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._key_ids: dict[tuple[str, str], int] = {}
+            self._keys: list[tuple[str, str] | None] = []
+            self._sizes = array('I')
+            self._oids: dict[int, set[str]] = {}
+            self._postings: dict[str, dict[str, array]] = {field: {} for field in self.fields}
+            self._dead = 0
+            # Количество пар (значение, oid) и живых значений по полям - для оценки числа кандидатов
+            self._entries: Counter = Counter()
+            self._live_values: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._key_ids)
+
+    def _add_value(self, field: str, text: str, oid: str) -> None:
+        key = (field, text)
+        key_id = self._key_ids.get(key)
+
+        if key_id is None:
+            key_id = self._key_ids[key] = len(self._keys)
+            self._keys.append(key)
+            self._oids[key_id] = set()
+            self._live_values[field] += 1
+
+            grams = trigrams(text)
+            self._sizes.append(len(grams))
+            field_postings = self._postings[field]
+            for gram in grams:
+                postings = field_postings.get(gram)
+                if postings is None:
+                    postings = field_postings[gram] = array('I')
+                postings.append(key_id)
+
+        oids = self._oids[key_id]
+        if oid not in oids:
+            oids.add(oid)
+            self._entries[field] += 1
+
+    def _remove_value(self, field: str, text: str, oid: str) -> None:
+        key = (field, text)
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            return
+
+        oids = self._oids[key_id]
+        if oid in oids:
+            oids.remove(oid)
+            self._entries[field] -= 1
+        if oids:
+            return
+
+        del self._key_ids[key], self._oids[key_id]
+        self._live_values[field] -= 1
+        self._keys[key_id] = None
+        self._dead += 1
+
+        if self._dead * 4 > len(self._keys):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Пересобирает списки без удаленных значений, номера значений перенумеровываются"""
+        live = [(key, self._oids[key_id]) for key_id, key in enumerate(self._keys) if key is not None]
+
+        self.clear()
+        for (field, text), oids in live:
+            for oid in oids:
+                self._add_value(field, text, oid)
+
+    def _values(self, document: dict) -> Iterable[tuple[str, str]]:
+        for field in self.fields:
+            text = normalize_text(document[field])
+            if text:
+                yield field, text
+
+    def add(self, document: dict) -> None:
+        with self._lock:
+            for field, text in self._values(document):
+                self._add_value(field, text, document['oid'])
+
+    def remove(self, document: dict) -> None:
+        with self._lock:
+            for field, text in self._values(document):
+                self._remove_value(field, text, document['oid'])
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        # Смена статуса или версии не затрагивает индексируемые поля
+        if old_document['oid'] == new_document['oid'] and all(
+            old_document[field] == new_document[field] for field in self.fields
+        ):
+            return
+
+        super().update(old_document, new_document)
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            super().rebuild(documents)
+
+    def _substring_postings(self, filters: BookFilters) -> Iterable[tuple[str, list[array]]]:
+        """Для каждого поля с подстрокой в фильтрах - списки ее триграмм, от самого короткого"""
+        for field in self.fields:
+            needle = getattr(filters, field, None)
+            grams = substring_trigrams(needle) if needle is not None else None
+            if grams:
+                yield field, sorted((self._postings[field].get(gram, _EMPTY) for gram in grams), key=len)
+
+    def estimate(self, filters: BookFilters) -> int | None:
+        with self._lock:
+            estimate = None
+            for field, postings in self._substring_postings(filters):
+                books_per_value = self._entries[field] / max(1, self._live_values[field])
+                field_estimate = round(len(postings[0]) * books_per_value)
+                estimate = field_estimate if estimate is None else min(estimate, field_estimate)
+
+        return estimate
+
+    def candidates(self, filters: BookFilters) -> list[str] | None:
+        with self._lock:
+            result = None
+            for field, postings in self._substring_postings(filters):
+                key_ids = set(postings[0])
+                for other in postings[1:]:
+                    if not key_ids:
+                        break
+                    key_ids.intersection_update(other)
+
+                # Номера удаленных значений остаются в списках до пересборки, у них нет oid
+                oids = set()
+                for key_id in key_ids:
+                    oids.update(self._oids.get(key_id, ()))
+
+                result = oids if result is None else result & oids
+
+        return None if result is None else list(result)
+
+    def search(
+            self,
+            query: str,
+            limit: int = 10,
+            fields: Iterable[str] | None = None,
+            min_similarity: float = 0.3,
+    ) -> list[FuzzyMatch]:
+        query_grams = trigrams(normalize_text(query))
+        if not query_grams or limit <= 0:
+            return []
+
+        fields = set(fields) if fields is not None else None
+        best: dict[str, FuzzyMatch] = {}
+
+        with self._lock:
+            # Общие триграммы считаются только для значений из списков триграмм запроса, а не для всего каталога.
+            # Из J >= t следует, что общих триграмм не меньше t * |запроса|
+            common_counts = Counter(chain.from_iterable(
+                self._postings[field].get(gram, _EMPTY)
+                for field in self.fields if fields is None or field in fields
+                for gram in query_grams
+            ))
+            min_common = min_similarity * len(query_grams)
+
+            for key_id, common in common_counts.items():
+                if common < min_common:
+                    continue
+
+                key = self._keys[key_id]
+                if key is None:
+                    continue
+
+                score = common / (len(query_grams) + self._sizes[key_id] - common)
+                if score < min_similarity:
+                    continue
+
+                for oid in self._oids[key_id]:
+                    current = best.get(oid)
+                    if current is None or score > current.score:
+                        best[oid] = FuzzyMatch(oid, score, key[0])
+
+        return heapq.nsmallest(limit, best.values(), key=lambda match: (-match.score, match.oid))
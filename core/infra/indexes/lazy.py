@@ -0,0 +1,54 @@
+import threading
+from typing import Callable, Generic, TypeVar
+
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.repositories.base import BaseBooksRepository
+
+
+"""Отложенное построение вторичных индексов.
+
+Построение индекса по большому каталогу дорогое: TrigramIndex на миллионе книг строится минуты
+и занимает сотни МиБ. Обработчики команд получают LazyIndex, поэтому создание Mediator при запуске
+приложения индексы не строит. Индекс строится и подключается к репозиторию при первой команде,
+которой он нужен, и дальше обновляется записями репозитория, как любой подключенный индекс.
+"""
+
+
+IT = TypeVar('IT', bound=BaseBooksIndex)
+
+
+class LazyIndex(Generic[IT]):
+    """
+    Индекс, который строится по каталогу при первом обращении.
+
+    Атрибуты:
+    - repository: Репозиторий, к которому подключается индекс.
+    - factory: Создает пустой индекс.
+
+    Методы:
+    - get(self) -> IT: Индекс, подключенный к репозиторию. Первый вызов строит его.
+    - built: Построен ли уже индекс.
+    """
+
+    def __init__(self, repository: BaseBooksRepository, factory: Callable[[], IT]) -> None:
+        self.repository = repository
+        self.factory = factory
+        self._index: IT | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._index is not None
+
+    def get(self) -> IT:
+        index = self._index
+        if index is not None:
+            return index
+
+        with self._lock:
+            if self._index is None:
+                index = self.factory()
+                self.repository.attach_index(index)
+                self._index = index
+
+        return self._index
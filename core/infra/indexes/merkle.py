@@ -0,0 +1,120 @@
+import json
+import threading
+from hashlib import blake2b
+from typing import Iterable
+
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Дерево хешей каталога для сравнения и синхронизации каталогов.
+
+Книги раскладываются по 2 ** depth корзинам по хешу oid. Хеш корзины - сумма хешей содержимого ее книг
+по модулю 2 ** 128, хеш узла дерева - сумма хешей его детей. Сумма не зависит от порядка книг, поэтому
+изменение книги обновляет только depth + 1 узлов на пути от корзины к корню, без пересчета всего дерева.
+
+У одинаковых каталогов (и поддеревьев) совпадают хеши, поэтому сравнение двух деревьев спускается
+только в различающиеся узлы, и его стоимость зависит от количества различий, а не от размера каталога.
+Версия документа в хеш не входит: она растет при каждой записи и у копий книги в разных каталогах своя.
+"""
+
+
+HASHED_FIELDS = ('title', 'author', 'year', 'status')
+
+_MASK = (1 << 128) - 1
+
+
+def bucket_of(oid: str, depth: int) -> int:
+    """Номер корзины oid среди 2 ** depth корзин"""
+    return int.from_bytes(blake2b(oid.encode(), digest_size=8).digest(), 'big') >> (64 - depth)
+
+
+def document_digest(document: dict) -> int:
+    """128-битный хеш содержимого книги вместе с oid"""
+    content = json.dumps([document['oid'], *(document[field] for field in HASHED_FIELDS)], ensure_ascii=False)
+    return int.from_bytes(blake2b(content.encode(), digest_size=16).digest(), 'big')
+
+
+class MerkleIndex(BaseBooksIndex):
+    """
+    Дерево хешей каталога.
+
+    Атрибуты:
+    - depth: Глубина дерева, корзин 2 ** depth. У сравниваемых деревьев глубина должна совпадать.
+
+    Узлы нумеруются как в двоичной куче: корень - 1, дети узла n - 2n и 2n + 1, корзины - узлы
+    с 2 ** depth по 2 ** (depth + 1) - 1.
+
+    Методы:
+    - node(self, number) -> int: Хеш узла.
+    - is_leaf(self, number) -> bool: Является ли узел корзиной.
+    - bucket(self, number) -> dict[str, int]: oid книг корзины и хеши их содержимого.
+    """
+
+    def __init__(self, depth: int = 12) -> None:
+        self.depth = depth
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets: list[dict[str, int]] = [{} for _ in range(1 << self.depth)]
+            self._tree: list[int] = [0] * (2 << self.depth)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._buckets))
+
+    @property
+    def root(self) -> int:
+        return self._tree[1]
+
+    def node(self, number: int) -> int:
+        return self._tree[number]
+
+    def is_leaf(self, number: int) -> bool:
+        return number >= 1 << self.depth
+
+    def bucket(self, number: int) -> dict[str, int]:
+        with self._lock:
+            return dict(self._buckets[number - (1 << self.depth)])
+
+    def _propagate(self, bucket: int, delta: int) -> None:
+        node = (1 << self.depth) + bucket
+        while node:
+            self._tree[node] = (self._tree[node] + delta) & _MASK
+            node >>= 1
+
+    def add(self, document: dict) -> None:
+        oid, digest = document['oid'], document_digest(document)
+        bucket = bucket_of(oid, self.depth)
+
+        with self._lock:
+            previous = self._buckets[bucket].get(oid, 0)
+            self._buckets[bucket][oid] = digest
+            self._propagate(bucket, digest - previous)
+
+    def remove(self, document: dict) -> None:
+        bucket = bucket_of(document['oid'], self.depth)
+
+        with self._lock:
+            previous = self._buckets[bucket].pop(document['oid'], None)
+            if previous is not None:
+                self._propagate(bucket, -previous)
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        # add заменяет хеш книги с тем же oid
+        if old_document['oid'] != new_document['oid']:
+            self.remove(old_document)
+        self.add(new_document)
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            self.clear()
+            for document in documents:
+                self._buckets[bucket_of(document['oid'], self.depth)][document['oid']] = document_digest(document)
+
+            # Хеши узлов считаются снизу вверх один раз, а не по пути к корню для каждой книги
+            leaves = 1 << self.depth
+            for bucket, digests in enumerate(self._buckets):
+                self._tree[leaves + bucket] = sum(digests.values()) & _MASK
+            for node in range(leaves - 1, 0, -1):
+                self._tree[node] = (self._tree[2 * node] + self._tree[2 * node + 1]) & _MASK
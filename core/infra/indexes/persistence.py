@@ -0,0 +1,97 @@
+import os
+import pickle
+import tempfile
+
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Сохранение вторичных индексов в файлы рядом с каталогом для быстрого перезапуска.
+
+Файл индекса - pickle заголовка и состояния индекса. Заголовок содержит версию формата, класс индекса
+и отметку каталога (контрольную сумму и количество книг), по которому индекс построен. Загрузка стоит
+O(размер индекса) вместо перестроения по всем книгам, но только если отметка совпадает с текущим
+каталогом: иначе (и при поврежденном файле) индекс нужно перестроить.
+
+Файлы индексов пишет только сам репозиторий, поэтому pickle здесь допустим: загружать файлы
+из недоверенных источников нельзя.
+"""
+
+
+FORMAT_VERSION = 1
+
+
+def index_path(catalog_path: str, index: BaseBooksIndex, number: int = 0) -> str:
+    """Путь к файлу индекса. number различает несколько индексов одного класса"""
+    suffix = f'.{number}' if number else ''
+    return f'{catalog_path}.{type(index).__name__}{suffix}.idx'
+
+
+def save_index(index: BaseBooksIndex, path: str, catalog_stamp: tuple) -> None:
+    """Атомарно записывает индекс с отметкой каталога. Вызывающий не дает менять индекс во время записи"""
+    payload = {
+        'format': FORMAT_VERSION,
+        'index': type(index).__qualname__,
+        'catalog': catalog_stamp,
+        'state': index.__getstate__(),
+    }
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load_payload(index: BaseBooksIndex, path: str) -> dict | None:
+    """Содержимое файла индекса, если он записан этой версией формата и тем же классом с теми же полями"""
+    try:
+        with open(path, 'rb') as file:
+            payload = pickle.load(file)
+    except Exception:
+        # Файла нет, он поврежден или записан другой версией кода - индекс просто перестраивается
+        return None
+
+    if not isinstance(payload, dict) or payload.get('format') != FORMAT_VERSION:
+        return None
+    if payload.get('index') != type(index).__qualname__:
+        return None
+
+    state = payload.get('state')
+    if not isinstance(state, dict) or state.get('fields', getattr(index, 'fields', None)) != getattr(index, 'fields', None):
+        return None
+
+    return payload
+
+
+def load_index(index: BaseBooksIndex, path: str, catalog_stamp: tuple) -> bool:
+    """
+        Загружает сохраненное состояние в index, если файл построен по этому же каталогу
+        и тем же классом с теми же полями. Возвращает False, если индекс нужно перестроить.
+    """
+    payload = _load_payload(index, path)
+    if payload is None or payload.get('catalog') != catalog_stamp:
+        return False
+
+    index.__setstate__(payload['state'])
+
+    return True
+
+
+def load_index_by_checksum(index: BaseBooksIndex, path: str, checksum: int) -> bool:
+    """
+        Как load_index, но каталог сверяется только по контрольной сумме файла. Позволяет взять индекс
+        каталога, не разбирая сам каталог.
+    """
+    payload = _load_payload(index, path)
+    catalog_stamp = payload.get('catalog') if payload is not None else None
+    if not isinstance(catalog_stamp, tuple) or not catalog_stamp or catalog_stamp[0] != checksum:
+        return False
+
+    index.__setstate__(payload['state'])
+
+    return True
@@ -0,0 +1,110 @@
+import threading
+from bisect import bisect_left, insort
+from typing import Iterable
+
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Автодополнение названий и авторов по префиксу.
+
+Для каждого поля хранится отсортированный список различных значений в нижнем регистре (ё -> е).
+Дополнения для префикса - это непрерывный участок списка, начало которого находится бинарным поиском,
+поэтому ответ не зависит от размера каталога, а только от количества запрошенных дополнений.
+"""
+
+
+def fold_text(text: str) -> str:
+    return text.casefold().replace('ё', 'е')
+
+
+class PrefixIndex(BaseBooksIndex):
+    """
+    Индекс значений полей книг для автодополнения.
+
+    Атрибуты:
+    - fields: Индексируемые поля документов.
+
+    Методы:
+    - complete(self, prefix, field, limit=10) -> list[str]: Значения поля, начинающиеся с prefix
+      без учета регистра, в алфавитном порядке. Значение возвращается в самом частом написании.
+    """
+
+    def __init__(self, fields: Iterable[str] = ('title', 'author')) -> None:
+        self.fields = tuple(fields)
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sorted: dict[str, list[str]] = {field: [] for field in self.fields}
+            # Приведенное значение -> написания -> количество книг. Обычные словари, а не Counter,
+            # чтобы сохраненный индекс загружался быстро (см. core.infra.indexes.persistence)
+            self._spellings: dict[str, dict[str, dict[str, int]]] = {field: {} for field in self.fields}
+
+    def add(self, document: dict) -> None:
+        with self._lock:
+            for field in self.fields:
+                value = document[field]
+                folded = fold_text(value)
+                spellings = self._spellings[field].get(folded)
+
+                if spellings is None:
+                    spellings = self._spellings[field][folded] = {}
+                    insort(self._sorted[field], folded)
+
+                spellings[value] = spellings.get(value, 0) + 1
+
+    def remove(self, document: dict) -> None:
+        with self._lock:
+            for field in self.fields:
+                value = document[field]
+                folded = fold_text(value)
+                spellings = self._spellings[field].get(folded)
+                if spellings is None:
+                    continue
+
+                count = spellings.get(value, 0) - 1
+                if count > 0:
+                    spellings[value] = count
+                else:
+                    spellings.pop(value, None)
+
+                if not spellings:
+                    del self._spellings[field][folded]
+                    values = self._sorted[field]
+                    del values[bisect_left(values, folded)]
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        if all(old_document[field] == new_document[field] for field in self.fields):
+            return
+
+        super().update(old_document, new_document)
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            self.clear()
+            # Сортировка один раз в конце дешевле, чем вставка каждого значения
+            for document in documents:
+                for field in self.fields:
+                    value = document[field]
+                    spellings = self._spellings[field].setdefault(fold_text(value), {})
+                    spellings[value] = spellings.get(value, 0) + 1
+
+            for field in self.fields:
+                self._sorted[field] = sorted(self._spellings[field])
+
+    def complete(self, prefix: str, field: str, limit: int = 10) -> list[str]:
+        folded = fold_text(prefix)
+
+        with self._lock:
+            values = self._sorted[field]
+            start = bisect_left(values, folded)
+
+            completions = []
+            for value in values[start:start + limit]:
+                if not value.startswith(folded):
+                    break
+                spellings = self._spellings[field][value]
+                completions.append(max(spellings, key=spellings.get))
+
+        return completions
@@ -0,0 +1,98 @@
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from itertools import islice
+from typing import Iterable
+
+from core.domain.entities.ids import oid_to_int, int_to_oid, is_time_ordered, min_oid_int_at
+from core.infra.indexes.base import BaseBooksIndex
+
+
+"""Индекс порядка добавления книг для выборки последних добавленных.
+
+uuid7 хранятся возрастающим списком 128-битных чисел. Новый идентификатор больше всех прежних,
+поэтому добавление - это append, а последние N книг и книги, добавленные после момента времени, -
+срез конца списка после бинарного поиска. Строки oid создаются только для отданного результата.
+
+Остальные идентификаторы (uuid4) не несут времени: они хранятся в порядке поступления в индекс
+(для json репозитория - в порядке добавления) и считаются добавленными раньше любых uuid7.
+"""
+
+
+class RecencyIndex(BaseBooksIndex):
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ordered: list[int] = []
+            self._legacy: dict[str, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._ordered) + len(self._legacy)
+
+    def add(self, document: dict) -> None:
+        value = oid_to_int(document['oid'])
+
+        with self._lock:
+            if value is None or not is_time_ordered(value):
+                self._legacy[document['oid']] = None
+                return
+
+            ordered = self._ordered
+            if not ordered or value > ordered[-1]:
+                ordered.append(value)
+                return
+
+            position = bisect_left(ordered, value)
+            if position == len(ordered) or ordered[position] != value:
+                ordered.insert(position, value)
+
+    def remove(self, document: dict) -> None:
+        value = oid_to_int(document['oid'])
+
+        with self._lock:
+            if value is None or not is_time_ordered(value):
+                self._legacy.pop(document['oid'], None)
+                return
+
+            ordered = self._ordered
+            position = bisect_left(ordered, value)
+            if position < len(ordered) and ordered[position] == value:
+                del ordered[position]
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        # Изменение книги не меняет момент ее добавления
+        if old_document['oid'] != new_document['oid']:
+            super().update(old_document, new_document)
+
+    def rebuild(self, documents: Iterable[dict]) -> None:
+        with self._lock:
+            self.clear()
+
+            ordered = set()
+            for document in documents:
+                value = oid_to_int(document['oid'])
+                if value is None or not is_time_ordered(value):
+                    self._legacy[document['oid']] = None
+                else:
+                    ordered.add(value)
+
+            self._ordered = sorted(ordered)
+
+    def latest(self, limit: int, since: datetime | None = None) -> list[str]:
+        """oid последних добавленных книг, начиная с самой новой. since отбирает только uuid7 не старше момента"""
+        with self._lock:
+            ordered = self._ordered
+            start = max(len(ordered) - limit, 0)
+            if since is not None:
+                start = max(start, bisect_left(ordered, min_oid_int_at(since)))
+
+            oids = [int_to_oid(value) for value in reversed(ordered[start:])]
+
+            if since is None and len(oids) < limit:
+                oids.extend(islice(reversed(self._legacy), limit - len(oids)))
+
+        return oids
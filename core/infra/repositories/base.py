@@ -1,25 +1,166 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterable, Iterator, List
 
 from core.domain.entities.books import Book
+from core.infra.changes.books import ChangeFeed
+from core.infra.converters.books import convert_book_to_document, BookView
+from core.infra.exceptions.books import BookVersionConflictException
 from core.infra.filters.books import BookFilters
+from core.infra.filters.planner import QueryPlan
+from core.infra.indexes.base import BaseBooksIndex
 
 
 """Абстрактная реализация репозитория книг"""
 
 
+def build_versioned_document(book: Book, stored_document: dict) -> dict:
+    """
+        Документ для условной записи (compare-and-set) в update_book.
+
+        Сохраненная версия должна совпадать с версией книги, иначе книгу уже изменил кто-то другой
+        и будет выброшен BookVersionConflictException. Версия нового документа увеличивается на 1.
+    """
+    actual_version = stored_document.get('version', 0)
+    if actual_version != book.version:
+        raise BookVersionConflictException(book.oid, book.version, actual_version)
+
+    book_document = convert_book_to_document(book)
+    book_document['version'] = actual_version + 1
+
+    return book_document
+
+
+def document_version(document: dict | None) -> int | None:
+    """Версия сохраненного документа, None - книги нет"""
+    return None if document is None else document.get('version', 0)
+
+
+def raise_version_conflict(conflicts: list[tuple[str, int | None, int | None]]) -> None:
+    """Выбрасывает BookVersionConflictException для первого конфликта (oid, ожидаемая версия, версия в хранилище)"""
+    if conflicts:
+        raise BookVersionConflictException(*conflicts[0])
+
+
 class BaseBooksRepository(ABC):
+    _indexes: tuple[BaseBooksIndex, ...] = ()
+    _feeds: tuple[ChangeFeed, ...] = ()
+
+    @property
+    def indexes(self) -> tuple[BaseBooksIndex, ...]:
+        return self._indexes
+
+    def attach_index(self, index: BaseBooksIndex) -> None:
+        """Подключает вторичный индекс: он строится по текущему каталогу и дальше обновляется при записях"""
+        index.rebuild(self.iter_documents())
+        self._indexes = (*self._indexes, index)
+
+    def attach_feed(self, feed: ChangeFeed) -> None:
+        """Подключает ленту изменений: ей передаются изменения, уже сохраненные и видные читателям"""
+        self._feeds = (*self._feeds, feed)
+
+    @property
+    def _observed(self) -> bool:
+        """Есть ли индексы или ленты, которым нужно передавать изменения"""
+        return bool(self._indexes or self._feeds)
+
+    def _notify_indexes(self, changes: Iterable[tuple[dict | None, dict | None]]) -> None:
+        """Передает индексам изменения парами (старый документ, новый документ)"""
+        for old_document, new_document in changes:
+            for index in self._indexes:
+                index.apply(old_document, new_document)
+
+    def _notify_feeds(self, changes: list[tuple[dict | None, dict | None]]) -> None:
+        """Передает лентам изменения, которые уже сохранены и видны читателям"""
+        for feed in self._feeds:
+            feed.publish(changes)
+
+    def _set_version(self, book: Book, version: int) -> None:
+        """Новая версия сохраненной книги. В транзакции прежняя запоминается, чтобы rollback вернул ее"""
+        if self._transaction_depth:
+            self._version_undo.append((book, book.version))
+        book.version = version
+
+    def _restore_versions(self) -> None:
+        """Возвращает книгам версии, присвоенные до отмененной транзакции"""
+        for book, version in reversed(self._version_undo):
+            book.version = version
+        self._version_undo = []
+
+    def _indexed_count(self, filters: BookFilters | None) -> int | None:
+        """Количество книг от первого индекса, который может посчитать его без просмотра документов, иначе None"""
+        for index in self._indexes:
+            count = index.count(filters)
+            if count is not None:
+                return count
+
+        return None
+
+    def _rebuild_indexes(self, documents: Iterable[dict]) -> None:
+        documents = list(documents) if len(self._indexes) > 1 else documents
+        for index in self._indexes:
+            index.rebuild(documents)
+
+    @abstractmethod
+    def get_books(
+            self,
+            filters: BookFilters = None,
+            fields: Iterable[str] | None = None,
+            order_by: str | Iterable[str] | None = None,
+            limit: int | None = None,
+            after: str | None = None,
+    ) -> List[Book] | List[BookView]:
+        """
+            С проекцией fields возвращает ленивые BookView, в которых доступны только перечисленные поля и oid.
+            order_by, limit и after (курсор из book_cursor) - сортировка и пагинация, см. core.infra.filters.ordering.
+        """
+        ...
 
     @abstractmethod
-    def get_books(self, filters: BookFilters = None) -> List[Book]:
+    def count_books(self, filters: BookFilters = None) -> int:
+        """Количество книг под фильтрами. Считается по документам или индексам, книги не создаются"""
         ...
 
+    @abstractmethod
+    def exists(self, filters: BookFilters = None) -> bool:
+        """Есть ли хотя бы одна книга под фильтрами. Просмотр останавливается на первом совпадении"""
+        ...
+
+    def explain(self, filters: BookFilters = None) -> QueryPlan:
+        """
+            План выборки get_books по фильтрам с оценкой и фактическим количеством книг.
+            Репозитории без планировщика всегда просматривают все документы.
+        """
+        total_rows = self.count_books()
+
+        plan = QueryPlan.full_scan(filters, total_rows)
+        plan.actual_candidates, plan.actual_rows = total_rows, self.count_books(filters)
+
+        return plan
+
+    @abstractmethod
+    def iter_books(self, filters: BookFilters = None) -> Iterator[Book]:
+        """Отдает книги по одной, не собирая весь каталог в список"""
+        ...
+
+    def iter_documents(self, filters: BookFilters = None) -> Iterator[dict]:
+        """
+            Отдает сохраненные документы книг по одному, не создавая книги. Документы могут быть общими
+            со снимком репозитория, их нельзя изменять. По умолчанию документы строятся по iter_books.
+        """
+        yield from map(convert_book_to_document, self.iter_books(filters))
+
     @abstractmethod
     def add_book(self, book: Book) -> None:
         ...
 
+    @abstractmethod
+    def add_books(self, books: Iterable[Book]) -> None:
+        """Добавляет пачку книг за одну запись в хранилище"""
+        ...
+
     @abstractmethod
     def update_book(self, book: Book) -> None:
+        """Условная запись: при несовпадении версии выбрасывает BookVersionConflictException"""
         ...
 
     @abstractmethod
@@ -33,3 +174,28 @@ class BaseBooksRepository(ABC):
     @abstractmethod
     def clear(self) -> None:
         ...
+
+    @abstractmethod
+    def begin(self) -> None:
+        """Начинает транзакцию: до commit/rollback все операции работают с одним загруженным снимком"""
+        ...
+
+    @abstractmethod
+    def commit(self) -> None:
+        """
+            Сохраняет изменения транзакции одной записью. Если вложенная транзакция была отменена,
+            отменяет всю транзакцию и выбрасывает TransactionRolledBackException.
+        """
+        ...
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Отменяет изменения транзакции. Вложенный rollback отменяет и все изменения внешней транзакции"""
+        ...
+
+    def flush(self) -> None:
+        """Сохраняет отложенные изменения. Репозитории, которые пишут сразу, ничего не делают"""
+
+    def close(self) -> None:
+        """Сохраняет отложенные изменения и освобождает ресурсы репозитория (файлы, пулы процессов)"""
+        self.flush()
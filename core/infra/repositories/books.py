@@ -1,107 +1,692 @@
-import json
+import atexit
 import os
-from typing import Dict, List
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping
 
 from core.domain.entities.books import Book
-from core.infra.converters.books import convert_book_to_document, convert_document_to_book
-from core.infra.exceptions.books import BookNotFoundException
+from core.infra.converters.books import convert_book_to_document, convert_document_to_book, BookView, projection
+from core.infra.exceptions.books import BookNotFoundException, TransactionRolledBackException
 from core.infra.filters.books import BookFilters
-from core.infra.repositories.base import BaseBooksRepository
+from core.infra.filters.ordering import order_documents
+from core.infra.filters.planner import QueryPlan, QueryPlanner, INDEX_ACCESS
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.indexes.persistence import index_path, load_index, save_index
+from core.infra.repositories.base import (
+    BaseBooksRepository,
+    build_versioned_document,
+    document_version,
+    raise_version_conflict,
+)
+from core.infra.repositories.files import read_json_with_checksum, write_json, file_signature, FileLock
 
 
 """Реализация репозитория для книг для хранения в json"""
 
 
+@dataclass
+class WriteBehindMetrics:
+    """
+    Статистика отложенной записи.
+
+    Атрибуты:
+    - logical_writes: Количество изменяющих вызовов (add_book, add_books, update_book, delete_book).
+    - physical_writes: Количество перезаписей файла.
+    - absorbed: Гистограмма: сколько логических записей поглотила одна физическая -> сколько раз так было.
+    """
+    logical_writes: int = 0
+    physical_writes: int = 0
+    absorbed: Counter = field(default_factory=Counter)
+
+    def record_flush(self, logical_writes: int) -> None:
+        self.physical_writes += 1
+        self.absorbed[logical_writes] += 1
+
+    @property
+    def writes_per_flush(self) -> float:
+        if not self.physical_writes:
+            return 0.0
+        return sum(count * times for count, times in self.absorbed.items()) / self.physical_writes
+
+
+@dataclass(frozen=True)
+class _PublishedChanges:
+    """Документы, опубликованные записью после полной копии каталога (None - книга удалена), и более ранние записи"""
+    documents: tuple[tuple[str, dict | None], ...]
+    previous: '_PublishedChanges | None'
+    count: int
+
+
+def _flush_at_exit(repository_ref: weakref.ref) -> None:
+    repository = repository_ref()
+    if repository is not None:
+        repository.flush()
+        if repository.persist_indexes:
+            repository.save_indexes()
+
+
 class MemoryJsonBooksRepository(BaseBooksRepository):
+    """
+    Репозиторий, держащий каталог в памяти и сохраняющий его в json файл.
+
+    Изменения помечают oid как грязные, а файл перезаписывается, когда накопилось flush_every изменений
+    или прошло flush_delay секунд с первого несохраненного изменения. По умолчанию (flush_every=1)
+    каждое изменение сразу сохраняется. Несохраненные изменения также сбрасываются при flush()
+    и при завершении интерпретатора.
+
+    Между begin() и commit() изменения не сохраняются, а для rollback() запоминаются исходные документы.
+    Вложенные транзакции присоединяются к внешней, rollback() отменяет все изменения с внешнего begin().
+
+    update_book проверяет версию документа под блокировкой репозитория, поэтому внутри процесса
+    потерянные обновления невозможны. Между процессами каждая запись (и транзакция целиком) выполняется
+    под файловой блокировкой <файл каталога>.lock: перед записью подхватываются изменения, которые
+    другие процессы сохранили в файл, затем проверяется версия и файл перезаписывается, и никто
+    не может вклиниться между этими шагами. Несохраненные изменения отложенной записи накладываются
+    поверх свежего файла. Если другой процесс успел сохранить книгу, которую мы изменили, но еще
+    не сохранили, остается его версия, а следующая запись или flush() выбрасывает
+    BookVersionConflictException для этой книги.
+
+    Репозиторий потокобезопасен. Писатели (и транзакции целиком) выполняются по очереди под блокировкой
+    и меняют рабочую копию data. Каждая завершенная запись публикует неизменяемый снимок (copy-on-write),
+    а читатели берут ссылку на текущий снимок и никогда не ждут писателей. Чтобы запись не копировала
+    весь каталог, она публикует только свои документы поверх последней полной копии. Снимок из копии
+    и цепочки записей собирает первый читатель и запоминает до следующей публикации, а полную копию
+    писатель делает, когда опубликованных после нее документов становится больше, чем книг в каталоге.
+    Поток, начавший транзакцию, читает свои незафиксированные изменения, остальные - последний снимок.
+
+    Подключенные индексы (attach_index) обновляются вместе с опубликованным снимком: изменения
+    записи или транзакции передаются им в момент публикации снимка, а при перечитывании файла
+    индексы перестраиваются. Пока индексы и снимок обновляются, номер поколения нечетный, и читатель,
+    взявший кандидатов из индексов не в том поколении, что снимок, повторяет выборку.
+    Выборку по фильтрам планирует QueryPlanner: он выбирает между полным просмотром и пересечением
+    кандидатов индексов (например, BitmapIndex на статус и год и TrigramIndex на подстроки) и проверяет
+    предикаты от самого селективного. План и оценки можно посмотреть через explain().
+
+    С persist_indexes индексы сохраняются в файлы рядом с каталогом (save_indexes и при завершении
+    интерпретатора) с контрольной суммой файла каталога. attach_index загружает индекс из файла,
+    если сумма совпадает с текущим файлом, и перестраивает его, только если файл индекса устарел.
+    """
 
     data: dict = None
 
-    def __init__(self, path_to_file: str) -> None:
+    def __init__(
+            self,
+            path_to_file: str,
+            flush_delay: float | None = None,
+            flush_every: int | None = 1,
+            planner: QueryPlanner | None = None,
+            persist_indexes: bool = False,
+    ) -> None:
         self.path_to_file = path_to_file
+        self.persist_indexes = persist_indexes
+        self.flush_delay = flush_delay
+        self.flush_every = flush_every
+        self.metrics = WriteBehindMetrics()
+        self.planner = planner or QueryPlanner()
         self.data: Dict[str, dict] = {}
-        self._ensure_file_exists()
 
-    @staticmethod
-    def _build_query_filters(filters: BookFilters) -> lambda book: bool:
-        """Функция для создания lambda функции для использования в filter в get_books"""
-        return lambda book: (filters.title is None or filters.title.lower() in book.title.as_generic_type().lower()) and \
-               (filters.author is None or filters.author.lower() in book.author.as_generic_type().lower()) and \
-               (filters.year is None or book.year.as_generic_type() == filters.year) and \
-               (filters.status is None or book.status.as_generic_type() == filters.status)
+        # Полная копия каталога и опубликованные после нее записи, снимок из них собирается при чтении
+        self._published: tuple[Mapping[str, dict], _PublishedChanges | None] = (MappingProxyType({}), None)
+        self._assembled: tuple[_PublishedChanges | None, Mapping[str, dict]] = (None, MappingProxyType({}))
+        # oid, измененные с последней публикации, в порядке изменения
+        self._unpublished_oids: dict[str, None] = {}
+        self._signature = None
+        self._checksum: int | None = None
+        self._persisted_stamps: dict[str, tuple] = {}
+        self._dirty_oids: set[str] = set()
+        self._pending_writes = 0
+        self._flush_timer: threading.Timer | None = None
+        self._lock = threading.RLock()
+
+        self._transaction_depth = 0
+        self._transaction_owner: int | None = None
+        self._undo: Dict[str, dict | None] = {}
+        # Книги, получившие новую версию в незавершенной транзакции, и их прежние версии
+        self._version_undo: list[tuple[Book, int]] = []
+        self._state_before_transaction: tuple[int, set[str]] = (0, set())
+        self._index_changes: list[tuple[dict | None, dict | None]] = []
+        # Опубликованные, но еще не сохраненные в файл изменения для лент
+        self._feed_changes: list[tuple[dict | None, dict | None]] = []
+        self._rollback_only = False
+        # Четный номер - снимок и индексы согласованы, нечетный - идет публикация
+        self._generation = 0
+        # Версии в файле книг с несохраненными изменениями на момент их первого изменения (None - книги не было)
+        self._base_versions: dict[str, int | None] = {}
+        self._file_lock = FileLock(f'{path_to_file}.lock')
+
+        self._ensure_file_exists()
+        self._load_data()
+        # Каталогу без файла нечего сохранять при выходе
+        if path_to_file != ':memory:':
+            atexit.register(_flush_at_exit, weakref.ref(self))
 
     def _ensure_file_exists(self) -> None:
         if not os.path.exists(self.path_to_file):
-            with open(self.path_to_file, 'w') as file:
-                json.dump({}, file)
+            write_json(self.path_to_file, {})
 
-    """load and save data для того, чтобы не хранить все книги в оперативной памяти"""
     def _load_data(self) -> None:
-        with open(self.path_to_file, 'r+') as file:
+        self._signature = file_signature(self.path_to_file)
+        self.data, self._checksum = read_json_with_checksum(self.path_to_file)
+        self._base_versions = {}
+        self._republish()
+
+    def _republish(self) -> None:
+        """Снимок и индексы заново по рабочей копии. Отложенные изменения записи в ней уже учтены"""
+        if not self._transaction_depth:
+            # Индексам они больше не нужны, а лентам передаются после сохранения
+            self._queue_feed_changes(self._index_changes)
+            self._index_changes = []
+        with self._publishing():
+            self._publish()
+            self._rebuild_indexes(self.data.values())
+
+    @contextmanager
+    def _publishing(self) -> Iterator[None]:
+        """Снимок и индексы меняются внутри блока, номер поколения в это время нечетный"""
+        self._generation += 1
+        try:
+            yield
+        finally:
+            self._generation += 1
+
+    def _publish(self) -> None:
+        """Публикует снимок рабочей копии. Документы не меняются на месте, поэтому достаточно копии словаря"""
+        self._published = (MappingProxyType(dict(self.data)), None)
+        self._unpublished_oids = {}
+
+    def _publish_documents(self) -> None:
+        """Публикует документы, измененные записью. Каталог копируется, только когда цепочка записей его переросла"""
+        oids, self._unpublished_oids = self._unpublished_oids, {}
+        if not oids:
+            return
+
+        snapshot, previous = self._published
+        count = len(oids) + (previous.count if previous is not None else 0)
+
+        if count > len(snapshot):
+            self._publish()
+        else:
+            documents = tuple((oid, self.data.get(oid)) for oid in oids)
+            self._published = (snapshot, _PublishedChanges(documents, previous, count))
+
+    def _snapshot(self) -> Mapping[str, dict]:
+        """
+            Текущий снимок: полная копия с наложенными на нее опубликованными записями. Собранный снимок
+            запоминается, поэтому следующие читатели до новой публикации получают его без копирования
+        """
+        snapshot, changes = self._published
+        if changes is None:
+            return snapshot
+
+        assembled_changes, assembled = self._assembled
+        if assembled_changes is changes:
+            return assembled
+
+        # Если читатель уже собирал снимок по более ранней записи этой цепочки, достраивается он
+        chain = []
+        link = changes
+        while link is not None and link is not assembled_changes:
+            chain.append(link.documents)
+            link = link.previous
+
+        documents = (snapshot if link is None else assembled).copy()
+        for published_documents in reversed(chain):
+            for oid, document in published_documents:
+                if document is None:
+                    documents.pop(oid, None)
+                else:
+                    documents[oid] = document
+
+        assembled = MappingProxyType(documents)
+        self._assembled = (changes, assembled)
+
+        return assembled
+
+    def _refresh_if_changed(self) -> None:
+        """Перечитывает файл, если его изменил другой процесс, а у нас нет несохраненных изменений"""
+        if self._transaction_depth or self._pending_writes:
+            return
+
+        if file_signature(self.path_to_file) != self._signature:
+            self._load_data()
+
+    def _sync_with_file(self) -> list[tuple[str, int | None, int | None]]:
+        """
+            Подтягивает изменения, которые другие процессы сохранили в файл. Вызывается перед записью
+            под файловой блокировкой. Несохраненные изменения накладываются поверх файла, кроме книг,
+            которые другой процесс изменил после нас: у них остается версия из файла, и они возвращаются
+            как конфликты (oid, ожидаемая версия, версия в файле).
+        """
+        signature = file_signature(self.path_to_file)
+        if signature == self._signature:
+            return []
+
+        if not self._pending_writes:
+            self._load_data()
+            return []
+
+        stored, checksum = read_json_with_checksum(self.path_to_file)
+        conflicts = []
+        for oid in sorted(self._dirty_oids):
+            expected_version, stored_version = self._base_versions.get(oid), document_version(stored.get(oid))
+            if stored_version != expected_version:
+                conflicts.append((oid, expected_version, stored_version))
+                self._dirty_oids.discard(oid)
+            elif oid in self.data:
+                stored[oid] = self.data[oid]
+            else:
+                stored.pop(oid, None)
+
+        self.data, self._signature, self._checksum = stored, signature, checksum
+        self._base_versions = {oid: self._base_versions.get(oid) for oid in self._dirty_oids}
+        self._republish()
+        self._discard_feed_changes({oid for oid, _, _ in conflicts})
+
+        return conflicts
+
+    def _in_transaction(self) -> bool:
+        return bool(self._transaction_depth) and self._transaction_owner == threading.get_ident()
+
+    def _read_view(self) -> Mapping[str, dict]:
+        if self._in_transaction():
+            return self.data
+
+        # Проверяем файл, только если никто не пишет, иначе просто читаем последний снимок
+        if self._lock.acquire(blocking=False):
             try:
-                self.data = json.load(file)
-            except json.JSONDecodeError:
-                self.data = {}
+                self._refresh_if_changed()
+            finally:
+                self._lock.release()
 
-    def _save_data(self) -> None:
-        with open(self.path_to_file, 'w') as file:
-            json.dump(self.data, file, indent=4)
-        self.data = {}
+        return self._snapshot()
 
-    def get_books(self, filters: BookFilters | None = None) -> List[Book]:
-        self._load_data()
-
-        books = [convert_document_to_book(book) for book in self.data.values()]
-
-        if filters:
-            query = self._build_query_filters(filters)
-            books = list(filter(query, books))
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._lock, self._file_lock:
+            if not self._transaction_depth:
+                raise_version_conflict(self._sync_with_file())
+            try:
+                yield
+            finally:
+                if not self._transaction_depth:
+                    self._publish_changes()
+
+    def _publish_changes(self) -> None:
+        """Публикует снимок и передает индексам накопленные изменения одним поколением"""
+        changes, self._index_changes = self._index_changes, []
+        with self._publishing():
+            self._publish_documents()
+            self._notify_indexes(changes)
+
+        self._queue_feed_changes(changes)
+        if not self._pending_writes:
+            self._publish_feed_changes()
+
+    def _queue_feed_changes(self, changes: list[tuple[dict | None, dict | None]]) -> None:
+        if self._feeds:
+            self._feed_changes.extend(changes)
+
+    def _discard_feed_changes(self, oids: set[str]) -> None:
+        """Изменения книг, которые другой процесс сохранил раньше, не сохранятся, и в ленту они не попадают"""
+        if oids:
+            self._feed_changes = [
+                (old_document, new_document) for old_document, new_document in self._feed_changes
+                if (new_document or old_document or {}).get('oid') not in oids
+            ]
+
+    def _publish_feed_changes(self) -> None:
+        """Ленты получают изменения только после публикации снимка и сохранения в файл"""
+        changes, self._feed_changes = self._feed_changes, []
+        if changes:
+            self._notify_feeds(changes)
 
-        self._save_data()
+    def _save_data(self) -> None:
+        self._checksum = write_json(self.path_to_file, self.data)
+        self._signature = file_signature(self.path_to_file)
+
+    def _remember(self, *oids: str) -> None:
+        """Запоминает исходные документы для rollback и их версии для проверки при сохранении"""
+        for oid in oids:
+            if oid not in self._base_versions:
+                self._base_versions[oid] = document_version(self.data.get(oid))
+
+        if not self._transaction_depth:
+            return
+
+        for oid in oids:
+            if oid not in self._undo:
+                self._undo[oid] = self.data.get(oid)
+
+    def _mark_dirty(self, *oids: str) -> None:
+        self._unpublished_oids.update(dict.fromkeys(oids))
+        self._dirty_oids.update(oids)
+        self._pending_writes += 1
+        self.metrics.logical_writes += 1
+
+        if not self._transaction_depth:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self.flush_every is not None and self._pending_writes >= self.flush_every:
+            self.flush()
+        elif self.flush_delay is not None and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _track(self, *changes: tuple[dict | None, dict | None]) -> None:
+        """Изменения для индексов и лент изменений. Передаются им вместе с публикацией снимка"""
+        if self._observed:
+            self._index_changes.extend(changes)
+
+    def _catalog_stamp(self) -> tuple | None:
+        """Отметка сохраненного каталога для файлов индексов или None, если в памяти есть несохраненные изменения"""
+        if self._transaction_depth or self._pending_writes or self._checksum is None:
+            return None
+
+        return self._checksum, len(self.data)
+
+    def _index_path(self, index: BaseBooksIndex, indexes: tuple[BaseBooksIndex, ...]) -> str:
+        same_type = [other for other in indexes if type(other) is type(index)]
+        return index_path(self.path_to_file, index, same_type.index(index))
+
+    def attach_index(self, index: BaseBooksIndex) -> None:
+        with self._lock:
+            self._refresh_if_changed()
+            indexes = (*self._indexes, index)
+            path, stamp = self._index_path(index, indexes), self._catalog_stamp()
+
+            if self.persist_indexes and stamp is not None and load_index(index, path, stamp):
+                self._persisted_stamps[path] = stamp
+            else:
+                # Снимок не содержит незафиксированных изменений, они попадут в индекс при commit
+                index.rebuild(self._snapshot().values())
+
+            self._indexes = indexes
+
+    def save_indexes(self) -> None:
+        """
+            Сохраняет подключенные индексы в файлы рядом с каталогом, предварительно сбросив отложенные записи.
+            Индексы, файлы которых уже соответствуют каталогу, не перезаписываются.
+        """
+        with self._lock:
+            self.flush()
+            stamp = self._catalog_stamp()
+            if stamp is None:
+                return
+
+            for index in self._indexes:
+                path = self._index_path(index, self._indexes)
+                if self._persisted_stamps.get(path) != stamp:
+                    save_index(index, path, stamp)
+                    self._persisted_stamps[path] = stamp
+
+    @property
+    def dirty_oids(self) -> frozenset[str]:
+        return frozenset(self._dirty_oids)
+
+    def flush(self) -> None:
+        """
+            Сохраняет все накопленные изменения одной записью файла. Если другой процесс уже сохранил
+            книгу, измененную здесь, остальные изменения сохраняются, а для нее выбрасывается
+            BookVersionConflictException.
+        """
+        with self._lock:
+            if self._transaction_depth:
+                # Изменения незавершенной транзакции сохраняются при commit
+                return
+
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if not self._pending_writes:
+                return
+
+            with self._file_lock:
+                conflicts = self._sync_with_file()
+                self._save_data()
+
+            self.metrics.record_flush(self._pending_writes)
+            self._dirty_oids.clear()
+            self._base_versions = {}
+            self._pending_writes = 0
+            self._publish_feed_changes()
+            raise_version_conflict(conflicts)
+
+    def close(self) -> None:
+        """Сбрасывает отложенные записи и сохраняет индексы, если включено persist_indexes"""
+        with self._lock:
+            self.flush()
+            if self.persist_indexes:
+                self.save_indexes()
+
+    def begin(self) -> None:
+        # Блокировки держатся до commit/rollback, чтобы другие потоки и процессы не писали посреди транзакции
+        self._lock.acquire()
+
+        if not self._transaction_depth:
+            self._file_lock.acquire()
+            try:
+                raise_version_conflict(self._sync_with_file())
+            except BaseException:
+                self._file_lock.release()
+                self._lock.release()
+                raise
+            self._undo = {}
+            self._state_before_transaction = (self._pending_writes, set(self._dirty_oids))
+            self._transaction_owner = threading.get_ident()
+
+        self._transaction_depth += 1
+
+    def commit(self) -> None:
+        if self._rollback_only:
+            self.rollback()
+            raise TransactionRolledBackException()
+
+        self._transaction_depth -= 1
+        try:
+            if not self._transaction_depth:
+                self._undo, self._version_undo = {}, []
+                self._transaction_owner = None
+                self._publish_changes()
+                if self._pending_writes:
+                    self._schedule_flush()
+        finally:
+            if not self._transaction_depth:
+                self._file_lock.release()
+            self._lock.release()
+
+    def rollback(self) -> None:
+        try:
+            self._transaction_depth -= 1
+
+            for oid, document in self._undo.items():
+                if document is None:
+                    self.data.pop(oid, None)
+                else:
+                    self.data[oid] = document
+
+            self._undo = {}
+            self._restore_versions()
+            self._index_changes = []
+            self._unpublished_oids = {}
+            pending_writes, dirty_oids = self._state_before_transaction
+            self._pending_writes, self._dirty_oids = pending_writes, set(dirty_oids)
+            self._base_versions = {oid: self._base_versions.get(oid) for oid in self._dirty_oids}
+
+            if self._transaction_depth:
+                # Изменения внешней транзакции уже отменены, и ее commit не должен сохранить только оставшиеся
+                self._rollback_only = True
+            else:
+                self._rollback_only = False
+                self._transaction_owner = None
+                self._file_lock.release()
+        finally:
+            self._lock.release()
+
+    def _plan(self, documents: Mapping[str, dict], filters: BookFilters | None) -> QueryPlan:
+        """План выборки. Индексы отражают зафиксированное состояние, поэтому внутри своей транзакции не используются"""
+        indexes = () if documents is self.data else self._indexes
+        return self.planner.plan(filters, documents, indexes)
 
-        return books
+    @staticmethod
+    def _candidates(documents: Mapping[str, dict], plan: QueryPlan) -> Iterable[dict]:
+        oids = plan.candidate_oids()
+        if oids is None:
+            return documents.values()
+
+        return (document for document in map(documents.get, oids) if document is not None)
+
+    def _select(self, filters: BookFilters | None) -> tuple[Mapping[str, dict], Iterable[dict]]:
+        """
+            Снимок и документы под фильтрами: способ доступа и порядок проверки предикатов выбирает планировщик.
+            Кандидаты из индексов берутся в том же поколении, что и снимок: иначе индекс, уже обновленный
+            писателем, не нашел бы книгу, которая в снимке еще старая. Если писатель публиковал новое
+            поколение, выборка повторяется. Предикаты перепроверяются по документам снимка.
+        """
+        while True:
+            generation = self._generation
+            documents = self._read_view()
+            if filters is None:
+                return documents, documents.values()
+
+            plan = self._plan(documents, filters)
+            if plan.access != INDEX_ACCESS or documents is self.data:
+                return documents, filter(plan.matches, documents.values())
+
+            if not generation % 2:
+                candidates = self._candidates(documents, plan)
+                if self._generation == generation:
+                    return documents, filter(plan.matches, candidates)
+
+            # Писатель публикует поколение прямо сейчас, это короткое окно под его блокировкой
+            time.sleep(0)
+
+    def explain(self, filters: BookFilters | None = None) -> QueryPlan:
+        documents = self._read_view()
+        plan = self._plan(documents, filters)
+
+        candidates = list(self._candidates(documents, plan))
+        plan.actual_candidates = len(candidates)
+        plan.actual_rows = sum(1 for document in candidates if plan.matches(document))
+
+        return plan
+
+    def count_books(self, filters: BookFilters | None = None) -> int:
+        documents = self._read_view()
+        if filters is None:
+            return len(documents)
+
+        if documents is not self.data:
+            count = self._indexed_count(filters)
+            if count is not None:
+                return count
+
+        _, selected = self._select(filters)
+        return sum(1 for _ in selected)
+
+    def exists(self, filters: BookFilters | None = None) -> bool:
+        _, selected = self._select(filters)
+        return next(iter(selected), None) is not None
+
+    def get_books(
+            self,
+            filters: BookFilters | None = None,
+            fields: Iterable[str] | None = None,
+            order_by: str | Iterable[str] | None = None,
+            limit: int | None = None,
+            after: str | None = None,
+    ) -> List[Book] | List[BookView]:
+        # Фильтры, сортировка и limit применяются к документам, книги создаются только для результата
+        _, selected = self._select(filters)
+
+        if order_by or limit is not None or after is not None:
+            selected = order_documents(selected, order_by, limit, after)
+
+        if fields is None:
+            return [convert_document_to_book(document) for document in selected]
+
+        # Документы неизменяемы, поэтому представления ссылаются на них без копирования
+        fields = projection(fields)
+        return [BookView(document, fields) for document in selected]
+
+    def iter_books(self, filters: BookFilters | None = None) -> Iterator[Book]:
+        yield from map(convert_document_to_book, self.iter_documents(filters))
+
+    def iter_documents(self, filters: BookFilters | None = None) -> Iterator[dict]:
+        # Снимок неизменяем, поэтому его можно обходить, пока другие потоки пишут
+        documents, selected = self._select(filters)
+        if documents is self.data:
+            selected = list(selected)
+
+        yield from selected
 
     def add_book(self, book: Book) -> None:
-        self._load_data()
+        with self._writing():
+            book_document = convert_book_to_document(book)
+            self._remember(book_document['oid'])
+            self._track((self.data.get(book_document['oid']), book_document))
+            self.data[book_document['oid']] = book_document
+
+            self._mark_dirty(book_document['oid'])
 
-        book_document = convert_book_to_document(book)
-        self.data[book_document['oid']] = book_document
+    def add_books(self, books: Iterable[Book]) -> None:
+        with self._writing():
+            book_documents = [convert_book_to_document(book) for book in books]
+            self._remember(*(book_document['oid'] for book_document in book_documents))
+            for book_document in book_documents:
+                self._track((self.data.get(book_document['oid']), book_document))
+                self.data[book_document['oid']] = book_document
 
-        self._save_data()
+            self._mark_dirty(*(book_document['oid'] for book_document in book_documents))
 
     def update_book(self, book: Book) -> None:
-        self._load_data()
+        with self._writing():
+            if book.oid not in self.data:
+                raise BookNotFoundException(book.oid)
 
-        book_document = convert_book_to_document(book)
-        if book_document['oid'] not in self.data:
-            raise BookNotFoundException(book_document['oid'])
+            book_document = build_versioned_document(book, self.data[book.oid])
 
-        self.data[book_document['oid']] = book_document
+            self._remember(book.oid)
+            self._track((self.data[book.oid], book_document))
+            self.data[book.oid] = book_document
+            self._set_version(book, book_document['version'])
 
-        self._save_data()
+            self._mark_dirty(book.oid)
 
     def delete_book(self, oid: str) -> None:
-        self._load_data()
-
-        if oid not in self.data:
-            raise BookNotFoundException(oid)
+        with self._writing():
+            if oid not in self.data:
+                raise BookNotFoundException(oid)
 
-        del self.data[oid]
+            self._remember(oid)
+            self._track((self.data[oid], None))
+            del self.data[oid]
 
-        self._save_data()
+            self._mark_dirty(oid)
 
     def get_book_by_oid(self, oid: str) -> Book:
-        self._load_data()
+        documents = self._read_view()
 
-        if oid not in self.data:
+        if oid not in documents:
             raise BookNotFoundException(oid)
 
-        book = convert_document_to_book(self.data[oid])
-
-        self._save_data()
-
-        return book
+        return convert_document_to_book(documents[oid])
 
     def clear(self) -> None:
         """Метод для очистки репозитория. Необходим для тестирования"""
-        self.data = {}
-        self._save_data()
+        with self._writing():
+            oids = list(self.data)
+            self._remember(*oids)
+            self.data = {}
+            self._track((None, None))
+            self._mark_dirty(*oids)
+
+            if not self._transaction_depth:
+                self.flush()
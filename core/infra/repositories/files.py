@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+"""Общие функции для работы репозиториев с json файлами"""
+
+
+def read_json(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def read_json_with_checksum(path: str) -> tuple[dict, int | None]:
+    """Содержимое json файла и crc32 его байтов. Для отсутствующего или поврежденного файла - ({}, None)"""
+    try:
+        with open(path, 'rb') as file:
+            raw = file.read()
+        return json.loads(raw), zlib.crc32(raw)
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        return {}, None
+
+
+def file_checksum(path: str) -> int | None:
+    """crc32 байтов файла, как у read_json_with_checksum, но без разбора json. Для отсутствующего файла - None"""
+    checksum = 0
+    try:
+        with open(path, 'rb') as file:
+            while block := file.read(1 << 20):
+                checksum = zlib.crc32(block, checksum)
+    except FileNotFoundError:
+        return None
+
+    return checksum
+
+
+def write_json(path: str, data: dict) -> int:
+    """
+        Атомарная запись: читатели никогда не увидят наполовину записанный файл.
+        Возвращает crc32 записанных байтов.
+    """
+    payload = json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return zlib.crc32(payload)
+
+
+def file_signature(path: str) -> tuple[int, int, int] | None:
+    """Признак версии файла. Меняется при каждой атомарной записи, в том числе из другого процесса"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _lock_file(file) -> None:
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        return
+
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK сдается после 10 попыток, ждем дальше
+            continue
+
+
+def _unlock_file(file) -> None:
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+        return
+
+    file.seek(0)
+    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+        Межпроцессная блокировка на файле path (fcntl.flock, на Windows - msvcrt.locking).
+
+        Повторный захват тем же объектом только увеличивает счетчик, поэтому блокировку можно брать вложенно.
+        Объект не разделяет потоки: репозиторий берет ее, уже держа собственную блокировку.
+        С path=None ничего не блокирует.
+    """
+
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        if self.path is None:
+            return
+
+        if not self._depth:
+            file = open(self.path, 'a+b')
+            try:
+                _lock_file(file)
+            except BaseException:
+                file.close()
+                raise
+            self._file = file
+
+        self._depth += 1
+
+    def release(self) -> None:
+        if self.path is None:
+            return
+
+        self._depth -= 1
+        if not self._depth:
+            _unlock_file(self._file)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
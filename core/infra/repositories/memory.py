@@ -0,0 +1,37 @@
+from core.infra.filters.planner import QueryPlanner
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.files import FileLock
+
+
+"""Репозиторий книг без файла: каталог живет только в памяти процесса"""
+
+
+class InMemoryBooksRepository(MemoryJsonBooksRepository):
+    """
+    Репозиторий, который держит каталог в словаре и ничего не читает и не пишет на диск.
+
+    Семантика та же, что у MemoryJsonBooksRepository: транзакции с rollback, снимки для читателей,
+    условная запись update_book, индексы и планировщик выборки. Отличается только тем, что загрузка,
+    сохранение и проверка изменений файла другими процессами ничего не делают, поэтому у каждого
+    экземпляра свой независимый каталог. Используется в режиме тестирования и для временных каталогов.
+    """
+
+    def __init__(self, planner: QueryPlanner | None = None) -> None:
+        super().__init__(path_to_file=':memory:', planner=planner)
+        self._file_lock = FileLock(None)
+
+    def _ensure_file_exists(self) -> None:
+        pass
+
+    def _load_data(self) -> None:
+        self.data = {}
+        self._republish()
+
+    def _refresh_if_changed(self) -> None:
+        pass
+
+    def _sync_with_file(self) -> list[tuple[str, int | None, int | None]]:
+        return []
+
+    def _save_data(self) -> None:
+        pass
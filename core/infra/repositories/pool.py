@@ -0,0 +1,198 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from core.infra.exceptions.books import InvalidCatalogIdException
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+"""Пул репозиториев каталогов нескольких библиотек.
+
+Каталог открывается при первом обращении по id и остается открытым для следующих. У всех каталогов
+пула общий бюджет памяти: когда оценка памяти открытых каталогов его превышает, давно не использованные
+каталоги сбрасывают отложенные записи и закрываются (LRU). Каталог, который сейчас используется
+(выдан через lease), не закрывается, поэтому бюджет может быть превышен на время работы с ним.
+
+Память каталога оценивается по размеру его файла: документы в памяти занимают примерно в MEMORY_FACTOR
+раз больше, чем в json. К этому прибавляется память подключенных индексов. Ее обход дорогой, поэтому
+каждый индекс измеряется один раз, когда пул впервые его видит (в том числе индекс, построенный
+при первой команде во время lease), а дальше оценка растет пропорционально файлу каталога.
+"""
+
+
+CATALOG_ID_PATTERN = re.compile(r'[\w-]{1,64}')
+
+MEMORY_FACTOR = 4
+
+
+def open_json_catalog(path: str) -> MemoryJsonBooksRepository:
+    """Открывает каталог как json репозиторий, создавая директорию и пустой каталог, если их нет"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return MemoryJsonBooksRepository(path)
+
+
+@dataclass
+class CatalogPoolStats:
+    """
+    Статистика пула каталогов.
+
+    Атрибуты:
+    - opened: Сколько раз каталоги открывались (повторное открытие после вытеснения тоже считается).
+    - evictions: Сколько раз каталоги закрывались из-за бюджета памяти.
+    - open_catalogs: Количество открытых сейчас каталогов.
+    - resident_bytes: Оценка памяти открытых каталогов.
+    - memory_budget: Бюджет памяти пула (None - без ограничения).
+    """
+    opened: int = 0
+    evictions: int = 0
+    open_catalogs: int = 0
+    resident_bytes: int = 0
+    memory_budget: int | None = None
+
+
+@dataclass(eq=False)
+class _OpenCatalog:
+    repository: BaseBooksRepository
+    size: int = 0
+    leases: int = 0
+    # Индекс -> (оценка его памяти, размер файла каталога в момент оценки)
+    index_sizes: dict[BaseBooksIndex, tuple[int, int]] = field(default_factory=dict)
+
+
+class CatalogRepositoryPool:
+    """
+    Открытые репозитории каталогов по id каталога.
+
+    Атрибуты:
+    - directory: Директория с файлами каталогов <id>.json.
+    - memory_budget: Бюджет памяти открытых каталогов в байтах, None - каталоги не закрываются.
+    - open_repository: Открывает репозиторий по пути к файлу каталога, по умолчанию open_json_catalog.
+
+    Методы:
+    - lease(self, catalog_id) -> ContextManager[BaseBooksRepository]: Репозиторий каталога на время блока with.
+    - on_evict(self, callback) -> None: Вызывать callback(catalog_id, repository) после закрытия каталога.
+    - close(self) -> None: Закрывает все каталоги пула.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            memory_budget: int | None = None,
+            open_repository: Callable[[str], BaseBooksRepository] | None = None,
+    ) -> None:
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.open_repository = open_repository or open_json_catalog
+
+        self._catalogs: OrderedDict[str, _OpenCatalog] = OrderedDict()
+        self._evict_callbacks: list[Callable[[str, BaseBooksRepository], None]] = []
+        self._opened = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+
+    def catalog_path(self, catalog_id: str) -> str:
+        if not CATALOG_ID_PATTERN.fullmatch(catalog_id):
+            raise InvalidCatalogIdException(catalog_id)
+
+        return os.path.join(self.directory, f'{catalog_id}.json')
+
+    def _estimate_size(self, catalog_id: str, catalog: _OpenCatalog) -> int:
+        try:
+            file_bytes = os.path.getsize(self.catalog_path(catalog_id))
+        except OSError:
+            file_bytes = 0
+
+        index_bytes = 0
+        for index in catalog.repository.indexes:
+            if index not in catalog.index_sizes:
+                catalog.index_sizes[index] = (index.memory_size(), file_bytes)
+
+            measured, measured_file_bytes = catalog.index_sizes[index]
+            index_bytes += measured * file_bytes // measured_file_bytes if measured_file_bytes else measured
+
+        return file_bytes * MEMORY_FACTOR + index_bytes
+
+    @property
+    def _resident_bytes(self) -> int:
+        return sum(catalog.size for catalog in self._catalogs.values())
+
+    @property
+    def stats(self) -> CatalogPoolStats:
+        with self._lock:
+            return CatalogPoolStats(
+                opened=self._opened,
+                evictions=self._evictions,
+                open_catalogs=len(self._catalogs),
+                resident_bytes=self._resident_bytes,
+                memory_budget=self.memory_budget,
+            )
+
+    def is_open(self, catalog_id: str) -> bool:
+        with self._lock:
+            return catalog_id in self._catalogs
+
+    def on_evict(self, callback: Callable[[str, BaseBooksRepository], None]) -> None:
+        self._evict_callbacks.append(callback)
+
+    def _acquire(self, catalog_id: str) -> _OpenCatalog:
+        catalog = self._catalogs.get(catalog_id)
+        if catalog is None:
+            catalog = _OpenCatalog(self.open_repository(self.catalog_path(catalog_id)))
+            self._catalogs[catalog_id] = catalog
+            self._opened += 1
+        else:
+            self._catalogs.move_to_end(catalog_id)
+
+        catalog.leases += 1
+        return catalog
+
+    def _close_catalog(self, catalog_id: str) -> None:
+        repository = self._catalogs.pop(catalog_id).repository
+        repository.close()
+
+        for callback in self._evict_callbacks:
+            callback(catalog_id, repository)
+
+    def _evict_over_budget(self) -> None:
+        if self.memory_budget is None:
+            return
+
+        resident_bytes = self._resident_bytes
+        # Сначала самые давно использованные каталоги, занятые пропускаются
+        for catalog_id, catalog in list(self._catalogs.items()):
+            if resident_bytes <= self.memory_budget:
+                break
+            if catalog.leases:
+                continue
+
+            resident_bytes -= catalog.size
+            self._close_catalog(catalog_id)
+            self._evictions += 1
+
+    @contextmanager
+    def lease(self, catalog_id: str) -> Iterator[BaseBooksRepository]:
+        """Открывает каталог, если он еще не открыт, и не дает закрыть его до выхода из блока with"""
+        with self._lock:
+            catalog = self._acquire(catalog_id)
+            catalog.size = self._estimate_size(catalog_id, catalog)
+            self._evict_over_budget()
+
+        try:
+            yield catalog.repository
+        finally:
+            with self._lock:
+                catalog.leases -= 1
+                # Каталог мог вырасти, а к репозиторию - подключиться индексы за время работы с ним
+                catalog.size = self._estimate_size(catalog_id, catalog)
+                self._evict_over_budget()
+
+    def close(self) -> None:
+        with self._lock:
+            for catalog_id in list(self._catalogs):
+                self._close_catalog(catalog_id)
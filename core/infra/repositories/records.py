@@ -0,0 +1,520 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Iterator, List
+
+from core.domain.entities.books import Book
+from core.infra.converters.books import convert_book_to_document, convert_document_to_book, BookView, projection
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    CorruptedRecordException,
+    TransactionRolledBackException,
+)
+from core.infra.filters.books import BookFilters, match_document
+from core.infra.filters.ordering import order_documents
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.repositories.base import BaseBooksRepository, build_versioned_document
+
+
+"""Репозиторий книг для каталогов, которые не помещаются в память.
+
+Книги хранятся в файле записей - по json документу на строку. Добавление и изменение дописывают
+новую запись, удаление - запись {"oid": ..., "deleted": true}. В памяти находятся только индекс ключей
+(oid -> смещение и длина последней записи, упакованные в одно целое число) и LRU кэш документов
+с ограничением по памяти. Полный просмотр читает файл последовательно и не кладет документы в кэш,
+чтобы не вытеснять из него часто запрашиваемые книги.
+
+Когда устаревших записей в файле становится больше, чем актуальных, файл переписывается без них.
+Оборванная при сбое последняя запись отбрасывается при открытии.
+"""
+
+
+_LENGTH_BITS = 32
+_LENGTH_MASK = (1 << _LENGTH_BITS) - 1
+_COMPACT_MIN_BYTES = 1 << 20
+_READ_BUFFER = 1 << 20
+
+
+def _pack(offset: int, length: int) -> int:
+    return offset << _LENGTH_BITS | length
+
+
+def _unpack(position: int) -> tuple[int, int]:
+    return position >> _LENGTH_BITS, position & _LENGTH_MASK
+
+
+def _encode(document: dict) -> bytes:
+    return json.dumps(document, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def document_size(document: dict) -> int:
+    """Оценка памяти документа: словарь и его значения (строки-ключи общие для всех документов)"""
+    return sys.getsizeof(document) + sum(sys.getsizeof(value) for value in document.values())
+
+
+@dataclass
+class RecordCacheStats:
+    """
+    Статистика кэша документов.
+
+    Атрибуты:
+    - hits, misses: Чтения по oid, найденные и не найденные в кэше.
+    - evictions: Сколько документов вытеснено из-за ограничения памяти.
+    - resident_records: Документов в кэше.
+    - resident_bytes: Оценка памяти, которую занимают документы в кэше.
+    - memory_budget: Ограничение памяти кэша.
+    - stored_records: Книг в каталоге (размер индекса ключей).
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    resident_records: int = 0
+    resident_bytes: int = 0
+    memory_budget: int = 0
+    stored_records: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class _RecordCache:
+    """LRU кэш документов, суммарная оценка памяти которых не превышает memory_budget"""
+
+    def __init__(self, memory_budget: int) -> None:
+        self.stats = RecordCacheStats(memory_budget=memory_budget)
+        self._documents: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+
+    def get(self, oid: str) -> dict | None:
+        entry = self._documents.get(oid)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        self._documents.move_to_end(oid)
+        return entry[0]
+
+    def put(self, document: dict) -> None:
+        self.discard(document['oid'])
+
+        size = document_size(document)
+        if size > self.stats.memory_budget:
+            return
+
+        self._documents[document['oid']] = (document, size)
+        self.stats.resident_records += 1
+        self.stats.resident_bytes += size
+
+        while self.stats.resident_bytes > self.stats.memory_budget:
+            _, (_, evicted_size) = self._documents.popitem(last=False)
+            self.stats.resident_records -= 1
+            self.stats.resident_bytes -= evicted_size
+            self.stats.evictions += 1
+
+    def discard(self, oid: str) -> None:
+        entry = self._documents.pop(oid, None)
+        if entry is not None:
+            self.stats.resident_records -= 1
+            self.stats.resident_bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._documents.clear()
+        self.stats.resident_records = self.stats.resident_bytes = 0
+
+
+class _ScanSnapshot:
+    """
+        Состояние каталога на начало просмотра. Записи, сделанные во время просмотра, запоминают
+        здесь прежние позиции измененных oid, поэтому просмотр видит каталог на момент своего начала.
+    """
+
+    def __init__(self, end: int) -> None:
+        self.end = end
+        self.previous: Dict[str, int | None] = {}
+
+
+class RecordStoreBooksRepository(BaseBooksRepository):
+    """
+    Репозиторий поверх файла записей с ограниченным по памяти кэшем документов.
+
+    Атрибуты:
+    - path_to_file: Путь к файлу записей.
+    - memory_budget: Ограничение памяти LRU кэша документов в байтах.
+
+    Транзакции буферизуют изменения в памяти и дописывают их в файл одной записью при commit.
+    Писатели и транзакции держат _lock, а чтения других потоков берут только короткую блокировку
+    состояния (_state_lock) на время работы с индексом ключей, кэшем и файлом, поэтому открытая
+    транзакция их не задерживает: они видят последнее зафиксированное состояние.
+    Статистика кэша (доля попаданий, занятая память) доступна через cache_stats.
+    """
+
+    def __init__(self, path_to_file: str, memory_budget: int = 64 * 2 ** 20) -> None:
+        self.path_to_file = path_to_file
+        self.memory_budget = memory_budget
+
+        self._lock = threading.RLock()
+        self._state_lock = threading.RLock()
+        self._cache = _RecordCache(memory_budget)
+        self._keys: Dict[str, int] = {}
+        self._size = 0
+        self._live_bytes = 0
+        self._scans: list[_ScanSnapshot] = []
+
+        self._transaction_depth = 0
+        self._transaction_owner: int | None = None
+        self._pending: Dict[str, dict | None] = {}
+        self._pending_clear = False
+        # Книги, получившие новую версию в незавершенной транзакции, и их прежние версии
+        self._version_undo: list[tuple[Book, int]] = []
+        self._index_changes: list[tuple[dict | None, dict | None]] = []
+        self._rollback_only = False
+
+        self._load_keys()
+        self._file = open(self.path_to_file, 'a+b')
+
+    def _load_keys(self) -> None:
+        """
+            Строит индекс ключей одним последовательным чтением файла. Последняя запись без перевода строки
+            оборвана при сбое и отбрасывается, а нечитаемая завершенная запись означает поврежденный файл:
+            выбрасывается CorruptedRecordException, чтобы не потерять записи после нее
+        """
+        if not os.path.exists(self.path_to_file):
+            open(self.path_to_file, 'wb').close()
+
+        offset = 0
+        with open(self.path_to_file, 'rb', buffering=_READ_BUFFER) as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    document = json.loads(line)
+                except ValueError:
+                    raise CorruptedRecordException(self.path_to_file, offset)
+
+                if document.get('deleted'):
+                    self._keys.pop(document['oid'], None)
+                else:
+                    self._keys[document['oid']] = _pack(offset, len(line))
+                offset += len(line)
+
+        if offset != os.path.getsize(self.path_to_file):
+            # Последняя запись оборвана при сбое
+            with open(self.path_to_file, 'r+b') as file:
+                file.truncate(offset)
+
+        self._size = offset
+        self._live_bytes = sum(position & _LENGTH_MASK for position in self._keys.values())
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def cache_stats(self) -> RecordCacheStats:
+        with self._state_lock:
+            return replace(self._cache.stats, stored_records=len(self._keys))
+
+    def _in_transaction(self) -> bool:
+        return bool(self._transaction_depth) and self._transaction_owner == threading.get_ident()
+
+    def _read_record(self, position: int) -> dict:
+        offset, length = _unpack(position)
+        self._file.seek(offset)
+        return json.loads(self._file.read(length))
+
+    def _get_document(self, oid: str) -> dict | None:
+        # Буфер транзакции меняет только поток-владелец, поэтому он читается без блокировки
+        if self._in_transaction():
+            if oid in self._pending:
+                return self._pending[oid]
+            if self._pending_clear:
+                return None
+
+        with self._state_lock:
+            position = self._keys.get(oid)
+            if position is None:
+                return None
+
+            document = self._cache.get(oid)
+            if document is None:
+                document = self._read_record(position)
+                self._cache.put(document)
+
+            return document
+
+    def _append(self, records: Dict[str, dict | None]) -> None:
+        """Дописывает записи одной записью в файл и обновляет индекс ключей, кэш и начатые просмотры"""
+        chunks = [
+            _encode(document if document is not None else {'oid': oid, 'deleted': True})
+            for oid, document in records.items()
+        ]
+
+        with self._state_lock:
+            for scan in self._scans:
+                for oid in records:
+                    scan.previous.setdefault(oid, self._keys.get(oid))
+
+            offset = self._size
+            for (oid, document), chunk in zip(records.items(), chunks):
+                old_position = self._keys.pop(oid, None)
+                if old_position is not None:
+                    self._live_bytes -= old_position & _LENGTH_MASK
+
+                if document is None:
+                    self._cache.discard(oid)
+                else:
+                    self._keys[oid] = _pack(offset, len(chunk))
+                    self._live_bytes += len(chunk)
+                    self._cache.put(document)
+
+                offset += len(chunk)
+
+            self._file.write(b''.join(chunks))
+            self._file.flush()
+            self._size = offset
+
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        """Переписывает файл без устаревших записей, если их больше, чем актуальных, и никто не читает файл"""
+        dead_bytes = self._size - self._live_bytes
+        if self._scans or self._size < _COMPACT_MIN_BYTES or dead_bytes <= self._live_bytes:
+            return
+
+        tmp_path = f'{self.path_to_file}.compact'
+        keys, offset = {}, 0
+        with open(tmp_path, 'wb') as output:
+            for oid, position in sorted(self._keys.items(), key=lambda item: item[1]):
+                record_offset, length = _unpack(position)
+                self._file.seek(record_offset)
+                output.write(self._file.read(length))
+                keys[oid] = _pack(offset, length)
+                offset += length
+
+        self._file.close()
+        os.replace(tmp_path, self.path_to_file)
+        self._file = open(self.path_to_file, 'a+b')
+        self._keys, self._size = keys, offset
+
+    def _write(self, records: Dict[str, dict | None]) -> None:
+        if self._transaction_depth:
+            self._pending.update(records)
+        else:
+            self._append(records)
+
+    def _track(self, *changes: tuple[dict | None, dict | None]) -> None:
+        """
+            Изменения для индексов и лент изменений, уже записанные в файл. Внутри транзакции
+            откладываются до commit
+        """
+        if not self._observed:
+            return
+
+        if self._transaction_depth:
+            self._index_changes.extend(changes)
+        else:
+            self._notify_indexes(changes)
+            self._notify_feeds(list(changes))
+
+    def _scan(self, filters: BookFilters | None = None) -> Iterator[dict]:
+        """Последовательный просмотр каталога на момент начала без участия кэша"""
+        in_transaction = self._in_transaction()
+        pending = dict(self._pending) if in_transaction else {}
+        skip_committed = in_transaction and self._pending_clear
+        with self._state_lock:
+            snapshot = _ScanSnapshot(self._size)
+            self._scans.append(snapshot)
+            file = open(self.path_to_file, 'rb', buffering=_READ_BUFFER)
+
+        try:
+            offset = 0
+            while not skip_committed and offset < snapshot.end:
+                line = file.readline()
+                position = _pack(offset, len(line))
+                offset += len(line)
+
+                # Запись актуальна, если на начало просмотра индекс ключей указывал на нее
+                document = json.loads(line)
+                oid = document['oid']
+                with self._state_lock:
+                    current = snapshot.previous[oid] if oid in snapshot.previous else self._keys.get(oid)
+                if current != position or oid in pending:
+                    continue
+
+                if filters is None or match_document(document, filters):
+                    yield document
+
+            for document in pending.values():
+                if document is not None and (filters is None or match_document(document, filters)):
+                    yield document
+        finally:
+            file.close()
+            with self._state_lock:
+                self._scans.remove(snapshot)
+                self._compact_if_needed()
+
+    def attach_index(self, index: BaseBooksIndex) -> None:
+        with self._lock:
+            index.rebuild(self._scan())
+            self._indexes = (*self._indexes, index)
+
+    def begin(self) -> None:
+        self._lock.acquire()
+
+        if not self._transaction_depth:
+            self._pending, self._pending_clear = {}, False
+            self._transaction_owner = threading.get_ident()
+
+        self._transaction_depth += 1
+
+    def commit(self) -> None:
+        if self._rollback_only:
+            self.rollback()
+            raise TransactionRolledBackException()
+
+        try:
+            self._transaction_depth -= 1
+
+            if not self._transaction_depth:
+                pending, self._pending = self._pending, {}
+                if self._pending_clear:
+                    self._truncate()
+                    self._pending_clear = False
+                if pending:
+                    self._append(pending)
+                self._transaction_owner = None
+                self._version_undo = []
+                changes, self._index_changes = self._index_changes, []
+                self._notify_indexes(changes)
+                self._notify_feeds(changes)
+        finally:
+            self._lock.release()
+
+    def rollback(self) -> None:
+        try:
+            self._transaction_depth -= 1
+            self._pending, self._pending_clear = {}, False
+            self._restore_versions()
+            self._index_changes = []
+            if self._transaction_depth:
+                # Изменения внешней транзакции уже отменены, и ее commit не должен сохранить только оставшиеся
+                self._rollback_only = True
+            else:
+                self._rollback_only = False
+                self._transaction_owner = None
+        finally:
+            self._lock.release()
+
+    def get_books(
+            self,
+            filters: BookFilters | None = None,
+            fields: Iterable[str] | None = None,
+            order_by: str | Iterable[str] | None = None,
+            limit: int | None = None,
+            after: str | None = None,
+    ) -> List[Book] | List[BookView]:
+        # С limit в памяти держится только куча из limit документов
+        documents = order_documents(self._scan(filters), order_by, limit, after)
+
+        if fields is None:
+            return [convert_document_to_book(document) for document in documents]
+
+        fields = projection(fields)
+        return [BookView(document, fields) for document in documents]
+
+    def iter_books(self, filters: BookFilters | None = None) -> Iterator[Book]:
+        yield from map(convert_document_to_book, self._scan(filters))
+
+    def iter_documents(self, filters: BookFilters | None = None) -> Iterator[dict]:
+        yield from self._scan(filters)
+
+    def count_books(self, filters: BookFilters | None = None) -> int:
+        if not self._in_transaction():
+            if filters is None:
+                return len(self._keys)
+
+            count = self._indexed_count(filters)
+            if count is not None:
+                return count
+
+        return sum(1 for _ in self._scan(filters))
+
+    def exists(self, filters: BookFilters | None = None) -> bool:
+        documents = self._scan(filters)
+        try:
+            return next(documents, None) is not None
+        finally:
+            documents.close()
+
+    def add_book(self, book: Book) -> None:
+        self.add_books([book])
+
+    def add_books(self, books: Iterable[Book]) -> None:
+        with self._lock:
+            documents, changes = {}, []
+            for book in books:
+                document = convert_book_to_document(book)
+                oid = document['oid']
+                # Повтор oid в пакете заменяет предыдущую копию из этого же пакета, а не сохраненную книгу
+                changes.append((documents[oid] if oid in documents else self._get_document(oid), document))
+                documents[oid] = document
+
+            self._write(documents)
+            self._track(*changes)
+
+    def update_book(self, book: Book) -> None:
+        with self._lock:
+            stored_document = self._get_document(book.oid)
+            if stored_document is None:
+                raise BookNotFoundException(book.oid)
+
+            book_document = build_versioned_document(book, stored_document)
+            self._write({book.oid: book_document})
+            self._track((stored_document, book_document))
+            self._set_version(book, book_document['version'])
+
+    def delete_book(self, oid: str) -> None:
+        with self._lock:
+            stored_document = self._get_document(oid)
+            if stored_document is None:
+                raise BookNotFoundException(oid)
+
+            self._write({oid: None})
+            self._track((stored_document, None))
+
+    def get_book_by_oid(self, oid: str) -> Book:
+        document = self._get_document(oid)
+
+        if document is None:
+            raise BookNotFoundException(oid)
+
+        return convert_document_to_book(document)
+
+    def _truncate(self) -> None:
+        with self._state_lock:
+            for scan in self._scans:
+                for oid, position in self._keys.items():
+                    scan.previous.setdefault(oid, position)
+
+            # Новый файл вместо усечения: начатые просмотры дочитывают старый
+            tmp_path = f'{self.path_to_file}.clear'
+            open(tmp_path, 'wb').close()
+            self._file.close()
+            os.replace(tmp_path, self.path_to_file)
+            self._file = open(self.path_to_file, 'a+b')
+
+            self._keys, self._size, self._live_bytes = {}, 0, 0
+            self._cache.clear()
+
+    def clear(self) -> None:
+        """Метод для очистки репозитория. Необходим для тестирования"""
+        with self._lock:
+            if self._transaction_depth:
+                self._pending, self._pending_clear = {}, True
+            else:
+                self._truncate()
+            self._track((None, None))
@@ -0,0 +1,590 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext, suppress
+from itertools import repeat
+from typing import ContextManager, Dict, Iterable, Iterator, List
+
+from core.domain.entities.books import Book
+from core.infra.converters.books import (
+    convert_book_to_document,
+    convert_document_to_book,
+    BookView,
+    projection,
+    project_document,
+)
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    ShardCountMismatchException,
+    TransactionRolledBackException,
+)
+from core.infra.filters.books import BookFilters, match_document
+from core.infra.filters.ordering import order_documents, order_fields, parse_order_by
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.repositories.base import (
+    BaseBooksRepository,
+    build_versioned_document,
+    document_version,
+    raise_version_conflict,
+)
+from core.infra.repositories.files import read_json, write_json, FileLock
+
+
+"""Реализация репозитория книг, разбитого на N json файлов (шардов) по хэшу oid.
+
+Точечные операции читают и переписывают только один шард, а выборка с фильтрами
+просматривает шарды параллельно в пуле процессов и объединяет результат.
+Внутри транзакции загруженные шарды кэшируются, а измененные записываются при commit.
+
+У каждого шарда своя межпроцессная блокировка (<шард>.lock). Запись вне транзакции держит
+блокировку только своего шарда, пока перечитывает его, проверяет версию и переписывает, поэтому
+записи в разные шарды из разных процессов не ждут друг друга. Транзакция блокировок не держит:
+при commit она берет блокировки измененных шардов по возрастанию номера, перечитывает их и проверяет,
+что никто не изменил ее книги с момента загрузки, иначе выбрасывает BookVersionConflictException.
+
+Транзакция, изменившая несколько шардов, сохраняется атомарно и при сбое процесса: новые шарды
+сначала записываются в директорию журнала, затем записывается журнал со списком шардов (точка
+фиксации), и только после этого файлы переносятся на место шардов. Прерванную транзакцию доводит
+до конца или отменяет тот, кто следующим блокирует ее шард, а при открытии каталога - все ее шарды.
+Читатели не берут блокировок и просматривают шарды по одному, поэтому выборка, совпавшая с переносом
+файлов, может увидеть часть шардов транзакции уже новыми.
+Подключенные индексы обновляются записями этого репозитория, изменения шардов другими процессами
+они не видят.
+"""
+
+
+MANIFEST_FILE = 'manifest.json'
+JOURNAL_DIRECTORY = 'journal'
+
+
+def shard_index(oid: str, shard_count: int) -> int:
+    """Стабильный между процессами и запусками номер шарда (встроенный hash() для строк рандомизирован)"""
+    return zlib.crc32(oid.encode('utf-8')) % shard_count
+
+
+def shard_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f'shard_{index:04d}.json')
+
+
+def _journal_path(directory: str, transaction_id: str) -> str:
+    return os.path.join(directory, JOURNAL_DIRECTORY, f'{transaction_id}.journal')
+
+
+def _staged_path(directory: str, transaction_id: str, index: int) -> str:
+    """Новый файл шарда, записанный транзакцией до фиксации"""
+    return os.path.join(directory, JOURNAL_DIRECTORY, f'{transaction_id}.{index:04d}.json')
+
+
+def _remove(path: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def _move_staged_shards(directory: str, transaction_id: str, indexes: Iterable[int]) -> None:
+    """Переносит зафиксированные журналом файлы на место шардов и удаляет журнал"""
+    for index in indexes:
+        os.replace(_staged_path(directory, transaction_id, index), shard_path(directory, index))
+    _remove(_journal_path(directory, transaction_id))
+
+
+def _recover_shard(directory: str, index: int) -> None:
+    """
+        Доводит до конца прерванные транзакции, изменившие шард. Вызывается под блокировкой шарда, поэтому
+        записавшая файлы транзакция уже завершилась или упала. Файл с журналом переносится на место шарда,
+        файл без журнала удаляется: транзакция упала до фиксации. Журнал удаляется, когда перенесены все его файлы
+    """
+    journal_directory = os.path.join(directory, JOURNAL_DIRECTORY)
+    try:
+        names = os.listdir(journal_directory)
+    except FileNotFoundError:
+        return
+
+    suffix = f'.{index:04d}.json'
+    for name in names:
+        if name.endswith(suffix):
+            transaction_id = name[:-len(suffix)]
+            if os.path.exists(_journal_path(directory, transaction_id)):
+                os.replace(os.path.join(journal_directory, name), shard_path(directory, index))
+            else:
+                _remove(os.path.join(journal_directory, name))
+
+    for name in names:
+        if name.endswith('.journal'):
+            transaction_id = name[:-len('.journal')]
+            journal = read_json(os.path.join(journal_directory, name))
+            staged = (_staged_path(directory, transaction_id, other) for other in journal.get('shards', ()))
+            if not any(os.path.exists(path) for path in staged):
+                _remove(os.path.join(journal_directory, name))
+
+
+def _scan_shard(
+        path: str,
+        filters: BookFilters | None,
+        fields: frozenset[str] | None = None,
+        order_by: str | None = None,
+        limit: int | None = None,
+        after: str | None = None,
+) -> list[dict]:
+    """
+        Выполняется в дочернем процессе, поэтому возвращает документы, а не сущности. С проекцией - только ее поля.
+        С limit каждый шард отдает только свои первые limit документов, а общий результат собирается из них.
+    """
+    documents = read_json(path).values()
+    if filters is not None:
+        documents = (document for document in documents if match_document(document, filters))
+
+    documents = order_documents(documents, order_by, limit, after)
+
+    return [project_document(document, fields) for document in documents]
+
+
+def _count_shard(path: str, filters: BookFilters | None) -> int:
+    documents = read_json(path).values()
+    if filters is None:
+        return len(documents)
+
+    return sum(1 for document in documents if match_document(document, filters))
+
+
+class ShardedJsonBooksRepository(BaseBooksRepository):
+
+    def __init__(self, directory: str, shard_count: int | None = None, max_workers: int | None = None) -> None:
+        self.directory = directory
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self.shard_count = self._ensure_manifest(shard_count)
+
+        self._lock = threading.RLock()
+        # Чтение шарда, проверка версии и запись выполняются под межпроцессной блокировкой этого шарда
+        self._shard_locks = [FileLock(f'{shard_path(directory, index)}.lock') for index in range(self.shard_count)]
+        self._transaction_depth = 0
+        self._transaction_owner: int | None = None
+        self._transaction_shards: Dict[int, Dict[str, dict]] = {}
+        # Версии книг загруженных шардов на момент загрузки и изменения транзакции по шардам
+        self._base_versions: Dict[int, Dict[str, int]] = {}
+        self._transaction_writes: Dict[int, Dict[str, dict | None]] = {}
+        self._cleared_shards: set[int] = set()
+        # Книги, получившие новую версию в незавершенной транзакции, и их прежние версии
+        self._version_undo: list[tuple[Book, int]] = []
+        self._index_changes: list[tuple[dict | None, dict | None]] = []
+        self._rollback_only = False
+
+        self._recover()
+
+    def _ensure_manifest(self, shard_count: int | None) -> int:
+        os.makedirs(os.path.join(self.directory, JOURNAL_DIRECTORY), exist_ok=True)
+        manifest = read_json(os.path.join(self.directory, MANIFEST_FILE))
+
+        if manifest:
+            if shard_count is not None and manifest['shard_count'] != shard_count:
+                raise ShardCountMismatchException(self.directory, shard_count, manifest['shard_count'])
+            return manifest['shard_count']
+
+        shard_count = shard_count or 8
+        for index in range(shard_count):
+            write_json(shard_path(self.directory, index), {})
+        write_json(os.path.join(self.directory, MANIFEST_FILE), {'shard_count': shard_count})
+
+        return shard_count
+
+    def _shard_of(self, oid: str) -> int:
+        return shard_index(oid, self.shard_count)
+
+    def _in_transaction(self) -> bool:
+        """Кэш транзакции видит только поток, который ее начал"""
+        return bool(self._transaction_depth) and self._transaction_owner == threading.get_ident()
+
+    def _load_shard(self, index: int) -> Dict[str, dict]:
+        if not self._in_transaction():
+            return read_json(shard_path(self.directory, index))
+
+        if index not in self._transaction_shards:
+            data = read_json(shard_path(self.directory, index))
+            self._transaction_shards[index] = data
+            self._base_versions[index] = {oid: document_version(document) for oid, document in data.items()}
+
+        return self._transaction_shards[index]
+
+    def _save_shard(self, index: int, data: Dict[str, dict], oids: Iterable[str] | None = None) -> None:
+        """Сохраняет шард. oids - измененные книги, None - шард очищен. В транзакции изменения запоминаются до commit"""
+        if not self._in_transaction():
+            write_json(shard_path(self.directory, index), data)
+            return
+
+        self._transaction_shards[index] = data
+        writes = self._transaction_writes.setdefault(index, {})
+        if oids is None:
+            self._cleared_shards.add(index)
+            writes.clear()
+        else:
+            writes.update((oid, data.get(oid)) for oid in oids)
+
+    @contextmanager
+    def _exclusive_shard(self, index: int) -> Iterator[None]:
+        """Блокировка шарда. Прерванные транзакции доводятся до конца прежде, чем шард будет прочитан"""
+        with self._shard_locks[index]:
+            _recover_shard(self.directory, index)
+            yield
+
+    def _locked_shard(self, index: int) -> ContextManager[None]:
+        """Блокировка шарда на время записи. В транзакции шард блокируется только при commit"""
+        return nullcontext() if self._transaction_depth else self._exclusive_shard(index)
+
+    def _recover(self) -> None:
+        """Доводит до конца транзакции, прерванные сбоем другого процесса"""
+        if os.listdir(os.path.join(self.directory, JOURNAL_DIRECTORY)):
+            for index in range(self.shard_count):
+                with self._exclusive_shard(index):
+                    pass
+
+    def _track(self, *changes: tuple[dict | None, dict | None]) -> None:
+        """
+            Изменения для индексов и лент изменений, уже записанные в шард. Внутри транзакции
+            откладываются до commit
+        """
+        if not self._observed:
+            return
+
+        if self._transaction_depth:
+            self._index_changes.extend(changes)
+        else:
+            self._notify_indexes(changes)
+            self._notify_feeds(list(changes))
+
+    def attach_index(self, index: BaseBooksIndex) -> None:
+        with self._lock:
+            super().attach_index(index)
+
+    def _shard_paths(self) -> list[str]:
+        return [shard_path(self.directory, index) for index in range(self.shard_count)]
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        workers = min(self.max_workers or os.cpu_count() or 1, self.shard_count)
+        if workers <= 1:
+            return None
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+
+        return self._executor
+
+    def close(self) -> None:
+        """Останавливает пул процессов, используемый для параллельного просмотра шардов"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def begin(self) -> None:
+        self._lock.acquire()
+        self._transaction_depth += 1
+        self._transaction_owner = threading.get_ident()
+
+    def _reset_transaction(self) -> None:
+        self._transaction_shards, self._base_versions = {}, {}
+        self._transaction_writes, self._cleared_shards = {}, set()
+        self._index_changes = []
+
+    def _write_transaction(self) -> None:
+        """
+            Накладывает изменения транзакции на свежие копии шардов под их блокировками. Если книгу,
+            измененную в транзакции, с момента загрузки шарда сохранил кто-то другой, ничего не записывается.
+        """
+        with ExitStack() as stack:
+            for index in sorted(self._transaction_writes):
+                stack.enter_context(self._exclusive_shard(index))
+
+            shards, conflicts = {}, []
+            for index, writes in sorted(self._transaction_writes.items()):
+                cleared = index in self._cleared_shards
+                data = {} if cleared else read_json(shard_path(self.directory, index))
+                for oid, document in writes.items():
+                    expected_version = self._base_versions.get(index, {}).get(oid)
+                    if not cleared and document_version(data.get(oid)) != expected_version:
+                        conflicts.append((oid, expected_version, document_version(data.get(oid))))
+                    elif document is None:
+                        data.pop(oid, None)
+                    else:
+                        data[oid] = document
+                shards[index] = data
+
+            raise_version_conflict(conflicts)
+            self._write_shards(shards)
+
+    def _write_shards(self, shards: Dict[int, Dict[str, dict]]) -> None:
+        """Записывает шарды транзакции под их блокировками. Несколько шардов - через журнал"""
+        if len(shards) == 1:
+            [(index, data)] = shards.items()
+            write_json(shard_path(self.directory, index), data)
+            return
+
+        transaction_id = uuid.uuid4().hex
+        try:
+            for index, data in shards.items():
+                write_json(_staged_path(self.directory, transaction_id, index), data)
+            write_json(_journal_path(self.directory, transaction_id), {'shards': sorted(shards)})
+        except BaseException:
+            # Журнал не записан, транзакция не зафиксирована
+            for index in shards:
+                _remove(_staged_path(self.directory, transaction_id, index))
+            raise
+
+        _move_staged_shards(self.directory, transaction_id, shards)
+
+    def commit(self) -> None:
+        if self._rollback_only:
+            self.rollback()
+            raise TransactionRolledBackException()
+
+        try:
+            self._transaction_depth -= 1
+
+            if not self._transaction_depth:
+                self._transaction_owner = None
+                changes = self._index_changes
+                try:
+                    self._write_transaction()
+                except BaseException:
+                    self._restore_versions()
+                    raise
+                finally:
+                    self._reset_transaction()
+                self._version_undo = []
+                self._notify_indexes(changes)
+                self._notify_feeds(changes)
+        finally:
+            self._lock.release()
+
+    def rollback(self) -> None:
+        try:
+            self._transaction_depth -= 1
+            self._reset_transaction()
+            self._restore_versions()
+            if self._transaction_depth:
+                # Изменения внешней транзакции уже отменены, и ее commit не должен сохранить только оставшиеся
+                self._rollback_only = True
+            else:
+                self._rollback_only = False
+                self._transaction_owner = None
+        finally:
+            self._lock.release()
+
+    def _scan_in_transaction(self, filters: BookFilters | None) -> Iterator[dict]:
+        for index in range(self.shard_count):
+            for document in self._load_shard(index).values():
+                if filters is None or match_document(document, filters):
+                    yield document
+
+    def get_books(
+            self,
+            filters: BookFilters | None = None,
+            fields: Iterable[str] | None = None,
+            order_by: str | Iterable[str] | None = None,
+            limit: int | None = None,
+            after: str | None = None,
+    ) -> List[Book] | List[BookView]:
+        fields = projection(fields)
+        convert = convert_document_to_book if fields is None else lambda document: BookView(document, fields)
+        order_by = ','.join(map(str, parse_order_by(order_by))) or None
+
+        if self._in_transaction():
+            documents = order_documents(self._scan_in_transaction(filters), order_by, limit, after)
+            return [convert(document) for document in documents]
+
+        executor = self._get_executor()
+        paths = self._shard_paths()
+        # Шарды отдают и поля сортировки, чтобы объединить их результаты в общем порядке
+        scan_fields = fields if fields is None or order_by is None else fields | order_fields(parse_order_by(order_by))
+        arguments = (paths, repeat(filters), repeat(scan_fields), repeat(order_by), repeat(limit), repeat(after))
+
+        if executor is None:
+            shards = map(_scan_shard, *arguments)
+        else:
+            shards = executor.map(_scan_shard, *arguments)
+
+        documents = (document for documents in shards for document in documents)
+        if order_by is not None or limit is not None or after is not None:
+            # Курсор шарды уже применили, но без order_by он задает порядок по oid, который нужен и после слияния
+            documents = order_documents(documents, order_by, limit, after)
+
+        return [convert(document) for document in documents]
+
+    def count_books(self, filters: BookFilters | None = None) -> int:
+        if self._in_transaction():
+            return sum(1 for _ in self._scan_in_transaction(filters))
+
+        executor = self._get_executor()
+        paths = self._shard_paths()
+
+        if executor is None:
+            return sum(map(_count_shard, paths, repeat(filters)))
+        return sum(executor.map(_count_shard, paths, repeat(filters)))
+
+    def exists(self, filters: BookFilters | None = None) -> bool:
+        if self._in_transaction():
+            return next(self._scan_in_transaction(filters), None) is not None
+
+        # Шарды читаются по одному, чтобы не читать остальные после первого совпадения
+        for path in self._shard_paths():
+            documents = read_json(path).values()
+            if any(filters is None or match_document(document, filters) for document in documents):
+                return True
+
+        return False
+
+    def iter_books(self, filters: BookFilters | None = None) -> Iterator[Book]:
+        yield from map(convert_document_to_book, self.iter_documents(filters))
+
+    def iter_documents(self, filters: BookFilters | None = None) -> Iterator[dict]:
+        if self._in_transaction():
+            yield from list(self._scan_in_transaction(filters))
+            return
+
+        # В памяти находится не больше одного шарда
+        for path in self._shard_paths():
+            yield from _scan_shard(path, filters)
+
+    def add_book(self, book: Book) -> None:
+        index = self._shard_of(book.oid)
+        with self._lock, self._locked_shard(index):
+            data = self._load_shard(index)
+
+            book_document = convert_book_to_document(book)
+            stored_document = data.get(book_document['oid'])
+            data[book_document['oid']] = book_document
+
+            self._save_shard(index, data, [book_document['oid']])
+            self._track((stored_document, book_document))
+
+    def add_books(self, books: Iterable[Book]) -> None:
+        with self._lock:
+            by_shard: dict[int, list[dict]] = defaultdict(list)
+            for book in books:
+                by_shard[self._shard_of(book.oid)].append(convert_book_to_document(book))
+
+            for index, documents in by_shard.items():
+                with self._locked_shard(index):
+                    data = self._load_shard(index)
+                    changes = []
+                    for document in documents:
+                        changes.append((data.get(document['oid']), document))
+                        data[document['oid']] = document
+                    self._save_shard(index, data, [document['oid'] for document in documents])
+                    self._track(*changes)
+
+    def update_book(self, book: Book) -> None:
+        index = self._shard_of(book.oid)
+        with self._lock, self._locked_shard(index):
+            data = self._load_shard(index)
+
+            if book.oid not in data:
+                raise BookNotFoundException(book.oid)
+
+            stored_document = data[book.oid]
+            book_document = build_versioned_document(book, stored_document)
+            data[book.oid] = book_document
+
+            self._save_shard(index, data, [book.oid])
+            self._track((stored_document, book_document))
+            self._set_version(book, book_document['version'])
+
+    def delete_book(self, oid: str) -> None:
+        index = self._shard_of(oid)
+        with self._lock, self._locked_shard(index):
+            data = self._load_shard(index)
+
+            if oid not in data:
+                raise BookNotFoundException(oid)
+
+            stored_document = data.pop(oid)
+
+            self._save_shard(index, data, [oid])
+            self._track((stored_document, None))
+
+    def get_book_by_oid(self, oid: str) -> Book:
+        data = self._load_shard(self._shard_of(oid))
+
+        if oid not in data:
+            raise BookNotFoundException(oid)
+
+        return convert_document_to_book(data[oid])
+
+    def clear(self) -> None:
+        """Метод для очистки репозитория. Необходим для тестирования"""
+        with self._lock:
+            for index in range(self.shard_count):
+                with self._locked_shard(index):
+                    self._save_shard(index, {})
+            self._track((None, None))
+
+
+def _iter_catalog_documents(source: str) -> Iterator[dict]:
+    """Документы каталога: одиночного books.json или директории с шардами"""
+    if os.path.isdir(source):
+        manifest = read_json(os.path.join(source, MANIFEST_FILE))
+        if manifest:
+            # Открытие каталога доводит до конца прерванные транзакции
+            ShardedJsonBooksRepository(source, max_workers=1)
+        for index in range(manifest.get('shard_count', 0)):
+            yield from read_json(shard_path(source, index)).values()
+        return
+
+    yield from read_json(source).values()
+
+
+def reshard_books_catalog(source: str, directory: str, shard_count: int) -> int:
+    """
+        Перераспределяет каталог по shard_count шардам.
+
+        Параметры:
+            source (str): Путь к books.json или к директории шардированного каталога.
+            directory (str): Директория нового каталога. Может совпадать с source.
+            shard_count (int): Новое количество шардов.
+
+        Возвращает:
+            int: Количество перенесенных книг.
+
+        Описание:
+            Документы сначала раскладываются по промежуточным jsonl файлам, поэтому в памяти
+            одновременно находится не больше одного исходного и одного нового шарда.
+            Новый каталог собирается во временной директории и заменяет directory только в конце.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    staging = tempfile.mkdtemp(dir=parent, prefix='.reshard-')
+    moved = 0
+
+    try:
+        buckets = [open(os.path.join(staging, f'{index}.jsonl'), 'w', encoding='utf-8') for index in range(shard_count)]
+        try:
+            for document in _iter_catalog_documents(source):
+                buckets[shard_index(document['oid'], shard_count)].write(json.dumps(document, ensure_ascii=False) + '\n')
+                moved += 1
+        finally:
+            for bucket in buckets:
+                bucket.close()
+
+        for index in range(shard_count):
+            bucket_path = os.path.join(staging, f'{index}.jsonl')
+            with open(bucket_path, 'r', encoding='utf-8') as bucket:
+                data = {}
+                for line in bucket:
+                    document = json.loads(line)
+                    data[document['oid']] = document
+            write_json(shard_path(staging, index), data)
+            os.unlink(bucket_path)
+
+        write_json(os.path.join(staging, MANIFEST_FILE), {'shard_count': shard_count})
+
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return moved
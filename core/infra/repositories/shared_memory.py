@@ -0,0 +1,444 @@
+import re
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List
+
+from core.domain.entities.books import Book
+from core.infra.converters.books import convert_book_to_document, convert_document_to_book, BookView, projection
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    ReadOnlyRepositoryException,
+    SharedCatalogNotPublishedException,
+)
+from core.infra.filters.books import BookFilters
+from core.infra.filters.ordering import order_documents, order_fields, parse_order_by
+from core.infra.repositories.base import BaseBooksRepository
+
+
+"""Каталог книг в разделяемой памяти для нескольких процессов-воркеров.
+
+Один процесс (SharedMemoryCatalogPublisher) упаковывает снимок каталога в сегмент
+multiprocessing.shared_memory и увеличивает счетчик поколений в управляющем сегменте.
+Остальные процессы (SharedMemoryBooksRepository) читают и фильтруют упакованные данные прямо
+из разделяемой памяти, не разбирая json и не держа собственную копию каталога. Представление
+перестраивается, только когда меняется поколение.
+
+Формат сегмента данных: заголовок (магия, количество книг, смещения и длины секций) и секции:
+- years (uint16), statuses (uint8), versions (uint32) - по значению на книгу;
+- для oid, title, author и приведенных к нижнему регистру title/author - смещения (uint32, count + 1)
+  и блоб из строк UTF-8, каждая из которых заканчивается нулевым байтом;
+- oid_order (uint32) - номера книг, отсортированные по oid, для бинарного поиска.
+"""
+
+
+MAGIC = b'BKS1'
+
+TEXT_COLUMNS = ('oid', 'title', 'author', 'title_folded', 'author_folded')
+SECTIONS = (
+    'years', 'statuses', 'versions', 'oid_order',
+    *(f'{column}_{part}' for column in TEXT_COLUMNS for part in ('offsets', 'blob')),
+)
+
+_HEADER = struct.Struct(f'<4sI{len(SECTIONS) * 2}Q')
+_GENERATION = struct.Struct('<Q')
+
+# Сегменты, созданные издателями этого процесса: их регистрация в resource_tracker принадлежит издателю
+_published_segments: set[str] = set()
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+        Подключается к существующему сегменту и снимает его регистрацию в resource_tracker.
+
+        До Python 3.13 SharedMemory регистрирует и подключаемые сегменты, и трекер удаляет их
+        при выходе читателя, поэтому регистрация снимается сразу после подключения. Сегменты издателя
+        того же процесса зарегистрированы один раз, и их регистрация остается издателю.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    segment = SharedMemory(name=name)
+    if name not in _published_segments:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+def _data_segment_name(name: str, generation: int) -> str:
+    return f'{name}_{generation}'
+
+
+def _pack_text(values: list[str]) -> tuple[bytes, bytes]:
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode('utf-8')
+        blob += b'\x00'
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+
+def pack_catalog(documents: Iterable[dict]) -> bytes:
+    """Упаковывает документы книг в формат сегмента данных"""
+    documents = list(documents)
+    columns = {
+        'oid': [document['oid'] for document in documents],
+        'title': [document['title'] for document in documents],
+        'author': [document['author'] for document in documents],
+    }
+    columns['title_folded'] = [title.lower() for title in columns['title']]
+    columns['author_folded'] = [author.lower() for author in columns['author']]
+
+    sections = {
+        'years': array('H', (int(document['year']) for document in documents)).tobytes(),
+        'statuses': array('B', (bool(document['status']) for document in documents)).tobytes(),
+        'versions': array('I', (document.get('version', 0) for document in documents)).tobytes(),
+        'oid_order': array('I', sorted(range(len(documents)), key=lambda row: columns['oid'][row].encode('utf-8'))).tobytes(),
+    }
+    for column in TEXT_COLUMNS:
+        sections[f'{column}_offsets'], sections[f'{column}_blob'] = _pack_text(columns[column])
+
+    layout = []
+    body = bytearray()
+    for section in SECTIONS:
+        body += b'\x00' * (-(_HEADER.size + len(body)) % 8)  # Выравнивание для memoryview.cast
+        layout += [_HEADER.size + len(body), len(sections[section])]
+        body += sections[section]
+
+    return _HEADER.pack(MAGIC, len(documents), *layout) + bytes(body)
+
+
+class _SortedOids:
+    """Последовательность oid в порядке сортировки для bisect, читающая строки прямо из блоба"""
+
+    def __init__(self, view: '_CatalogView') -> None:
+        self.view = view
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.view.raw('oid', self.view.sections['oid_order'][index])
+
+
+class _CatalogView:
+    """Представление одного поколения каталога поверх буфера разделяемой памяти"""
+
+    def __init__(self, segment: SharedMemory, generation: int) -> None:
+        self.segment = segment
+        self.generation = generation
+        # Потоки, читающие представление сейчас. Замененное представление освобождает последний из них
+        self.readers = 0
+        self.retired = False
+
+        magic, self.count, *layout = _HEADER.unpack_from(segment.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f'Unexpected shared catalog format: {magic!r}')
+
+        formats = {'years': 'H', 'statuses': 'B', 'versions': 'I', 'oid_order': 'I'}
+        formats.update({f'{column}_offsets': 'I' for column in TEXT_COLUMNS})
+
+        self.sections: dict[str, memoryview] = {}
+        for index, section in enumerate(SECTIONS):
+            offset, length = layout[index * 2], layout[index * 2 + 1]
+            view = segment.buf[offset:offset + length]
+            self.sections[section] = view.cast(formats[section]) if section in formats else view
+
+    def __len__(self) -> int:
+        return self.count
+
+    def raw(self, column: str, row: int) -> bytes:
+        offsets = self.sections[f'{column}_offsets']
+        return bytes(self.sections[f'{column}_blob'][offsets[row]:offsets[row + 1] - 1])
+
+    def document(self, row: int, fields: frozenset[str] | None = None) -> dict:
+        """Документ строки. С fields декодируются только перечисленные поля"""
+        if fields is None:
+            fields = ('oid', 'title', 'author', 'year', 'status', 'version')
+
+        document = {}
+        for field in fields:
+            if field == 'year':
+                document[field] = str(self.sections['years'][row]).zfill(4)
+            elif field == 'status':
+                document[field] = bool(self.sections['statuses'][row])
+            elif field == 'version':
+                document[field] = self.sections['versions'][row]
+            else:
+                document[field] = self.raw(field, row).decode('utf-8')
+        return document
+
+    def row_of(self, oid: str) -> int | None:
+        target = oid.encode('utf-8')
+        oids = _SortedOids(self)
+        position = bisect_left(oids, target)
+        if position < len(oids) and oids[position] == target:
+            return self.sections['oid_order'][position]
+        return None
+
+    def _rows_containing(self, column: str, needle: str) -> Iterator[int]:
+        """Поиск подстроки выполняется регулярным выражением прямо по буферу, без копирования блоба"""
+        offsets = self.sections[f'{column}_offsets']
+        blob = self.sections[f'{column}_blob']
+        if not needle:
+            # Пустая подстрока есть в каждой строке
+            yield from range(self.count)
+            return
+
+        pattern = re.compile(re.escape(needle.lower().encode('utf-8')))
+
+        position = 0
+        while match := pattern.search(blob, position):
+            row = bisect_right(offsets, match.start()) - 1
+            if row >= self.count:
+                return
+            yield row
+            position = offsets[row + 1]
+
+    def matching_rows(self, filters: BookFilters | None) -> Iterator[int]:
+        if filters is None:
+            yield from range(self.count)
+            return
+
+        if filters.title is not None:
+            rows = self._rows_containing('title_folded', filters.title)
+        elif filters.author is not None:
+            rows = self._rows_containing('author_folded', filters.author)
+        else:
+            rows = range(self.count)
+
+        author = filters.author.lower().encode('utf-8') if filters.author is not None else None
+        years, statuses = self.sections['years'], self.sections['statuses']
+
+        if filters.year is not None:
+            # Год хранится числом, поэтому строки, которые не могут совпасть с 4 цифрами, отсекаются сразу
+            if not (filters.year.isdigit() and len(filters.year) == 4):
+                return
+            year = int(filters.year)
+
+        for row in rows:
+            if filters.year is not None and years[row] != year:
+                continue
+            if filters.status is not None and bool(statuses[row]) != filters.status:
+                continue
+            if author is not None and filters.title is not None and author not in self.raw('author_folded', row):
+                continue
+            yield row
+
+    def retire(self) -> None:
+        """Освобождает представление сейчас или, если его еще читают, после последнего читателя"""
+        self.retired = True
+        if not self.readers:
+            self.release()
+
+    def release(self) -> None:
+        for view in self.sections.values():
+            view.release()
+        self.sections = {}
+        self.segment.close()
+
+
+class SharedMemoryCatalogPublisher:
+    """Публикует снимки каталога в разделяемую память. В системе должен быть один издатель на имя"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.generation = 0
+        self._segment: SharedMemory | None = None
+
+        try:
+            self._control = SharedMemory(name=name, create=True, size=_GENERATION.size)
+        except FileExistsError:
+            # Управляющий сегмент остался от упавшего издателя: продолжаем его нумерацию поколений
+            self._control = SharedMemory(name=name)
+            self.generation, = _GENERATION.unpack_from(self._control.buf, 0)
+        _published_segments.add(name)
+
+    def publish(self, books: Iterable[Book]) -> int:
+        """Публикует новый снимок каталога и возвращает номер его поколения"""
+        data = pack_catalog(convert_book_to_document(book) for book in books)
+        generation = self.generation + 1
+
+        segment_name = _data_segment_name(self.name, generation)
+        try:
+            segment = SharedMemory(name=segment_name, create=True, size=len(data))
+        except FileExistsError:
+            SharedMemory(name=segment_name).unlink()
+            segment = SharedMemory(name=segment_name, create=True, size=len(data))
+        segment.buf[:len(data)] = data
+        _published_segments.add(segment_name)
+
+        _GENERATION.pack_into(self._control.buf, 0, generation)
+
+        # Читатели, уже подключенные к старому поколению, продолжают его видеть до переподключения
+        if self._segment is not None:
+            self._release(self._segment)
+
+        self._segment, self.generation = segment, generation
+
+        return generation
+
+    def publish_repository(self, repository: BaseBooksRepository) -> int:
+        return self.publish(repository.iter_books())
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._release(self._segment)
+            self._segment = None
+
+        self._release(self._control)
+
+    @staticmethod
+    def _release(segment: SharedMemory) -> None:
+        segment.close()
+        segment.unlink()
+        _published_segments.discard(segment.name)
+
+
+class SharedMemoryBooksRepository(BaseBooksRepository):
+    """Репозиторий только для чтения поверх каталога, опубликованного SharedMemoryCatalogPublisher"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._view: _CatalogView | None = None
+        self._view_lock = threading.Lock()
+
+        try:
+            self._control = _attach(name)
+        except FileNotFoundError:
+            raise SharedCatalogNotPublishedException(name)
+
+    @property
+    def generation(self) -> int:
+        generation, = _GENERATION.unpack_from(self._control.buf, 0)
+        return generation
+
+    def _current_view(self) -> _CatalogView:
+        """Представление текущего поколения. Вызывается под _view_lock"""
+        while True:
+            generation = self.generation
+            if self._view is not None and self._view.generation == generation:
+                return self._view
+
+            if generation == 0:
+                raise SharedCatalogNotPublishedException(self.name)
+
+            try:
+                segment = _attach(_data_segment_name(self.name, generation))
+            except FileNotFoundError:
+                # Издатель успел опубликовать следующее поколение и удалить это
+                continue
+
+            if self._view is not None:
+                self._view.retire()
+            self._view = _CatalogView(segment, generation)
+            self._rebuild_indexes(self._view.document(row) for row in range(self._view.count))
+
+    @contextmanager
+    def _reading(self) -> Iterator[_CatalogView]:
+        """Представление, которое не освободится, пока поток его читает, даже если сменится поколение"""
+        with self._view_lock:
+            view = self._current_view()
+            view.readers += 1
+
+        try:
+            yield view
+        finally:
+            with self._view_lock:
+                view.readers -= 1
+                if view.retired and not view.readers:
+                    view.release()
+
+    def close(self) -> None:
+        with self._view_lock:
+            if self._view is not None:
+                self._view.retire()
+                self._view = None
+        self._control.close()
+
+    def get_books(
+            self,
+            filters: BookFilters | None = None,
+            fields: Iterable[str] | None = None,
+            order_by: str | Iterable[str] | None = None,
+            limit: int | None = None,
+            after: str | None = None,
+    ) -> List[Book] | List[BookView]:
+        if fields is None and not order_by and limit is None and after is None:
+            return list(self.iter_books(filters))
+
+        fields = projection(fields)
+        # Для сортировки декодируются только поля проекции и поля порядка
+        decoded_fields = fields if fields is None else fields | order_fields(parse_order_by(order_by))
+
+        with self._reading() as view:
+            documents = (view.document(row, decoded_fields) for row in view.matching_rows(filters))
+            documents = list(order_documents(documents, order_by, limit, after))
+
+        if fields is None:
+            return [convert_document_to_book(document) for document in documents]
+        return [BookView(document, fields) for document in documents]
+
+    def count_books(self, filters: BookFilters | None = None) -> int:
+        with self._reading() as view:
+            if filters is None:
+                return view.count
+
+            count = self._indexed_count(filters)
+            if count is not None:
+                return count
+
+            return sum(1 for _ in view.matching_rows(filters))
+
+    def exists(self, filters: BookFilters | None = None) -> bool:
+        with self._reading() as view:
+            return next(view.matching_rows(filters), None) is not None
+
+    def iter_books(self, filters: BookFilters | None = None) -> Iterator[Book]:
+        yield from map(convert_document_to_book, self.iter_documents(filters))
+
+    def iter_documents(self, filters: BookFilters | None = None) -> Iterator[dict]:
+        # Документы декодируются сразу: при смене поколения старое представление освобождается
+        with self._reading() as view:
+            documents = [view.document(row) for row in view.matching_rows(filters)]
+
+        yield from documents
+
+    def get_book_by_oid(self, oid: str) -> Book:
+        with self._reading() as view:
+            row = view.row_of(oid)
+
+            if row is None:
+                raise BookNotFoundException(oid)
+
+            return convert_document_to_book(view.document(row))
+
+    def add_book(self, book: Book) -> None:
+        raise ReadOnlyRepositoryException('add_book')
+
+    def add_books(self, books: Iterable[Book]) -> None:
+        raise ReadOnlyRepositoryException('add_books')
+
+    def update_book(self, book: Book) -> None:
+        raise ReadOnlyRepositoryException('update_book')
+
+    def delete_book(self, oid: str) -> None:
+        raise ReadOnlyRepositoryException('delete_book')
+
+    def clear(self) -> None:
+        raise ReadOnlyRepositoryException('clear')
+
+    def begin(self) -> None:
+        # Каждое чтение и так видит целостное поколение каталога
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from core.domain.entities.books import Book
+from core.domain.exceptions.base import ApplicationException
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.converters.books import convert_book_to_document
+from core.infra.exceptions.books import UnsupportedBooksFileFormatException
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.base import BaseBooksRepository
+
+
+"""Потоковый импорт и экспорт каталога книг в CSV/JSONL.
+
+Файл читается кусками по chunk_size строк, проверка Title/Author/Year выполняется в пуле процессов,
+а каждый корректный кусок сохраняется в репозиторий одной записью (add_books). В работе одновременно
+находится не больше 2 * max_workers кусков, поэтому память не зависит от размера входного файла.
+"""
+
+
+CSV_FORMAT = 'csv'
+JSONL_FORMAT = 'jsonl'
+
+CSV_COLUMNS = ('oid', 'Title', 'Author', 'Year', 'Status')
+
+_TRUE_VALUES = {'true', '1', 'yes', 'да', 'в наличии'}
+_FALSE_VALUES = {'false', '0', 'no', 'нет', 'нет в наличии'}
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    chunks: int = 0
+
+
+@dataclass(frozen=True)
+class RejectedRow:
+    line: int
+    reason: str
+    row: dict
+
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        return CSV_FORMAT
+
+    if extension in ('.jsonl', '.ndjson'):
+        return JSONL_FORMAT
+
+    raise UnsupportedBooksFileFormatException(path)
+
+
+def read_rows(file: IO[str], file_format: str) -> Iterator[tuple[int, dict]]:
+    """Построчно читает файл, отдавая пары (номер строки, строка)"""
+    if file_format == CSV_FORMAT:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            row = {'__raw__': line.rstrip('\n'), '__error__': f'Invalid JSON: {error.msg}'}
+        yield line_number, row
+
+
+def _parse_status(value) -> bool:
+    if value is None or value == '':
+        return True
+
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_VALUES:
+            return True
+        if lowered in _FALSE_VALUES:
+            return False
+
+    # Некорректное значение уйдет в Status и будет отклонено его валидацией
+    return value
+
+
+def _as_str(value) -> str | None:
+    return None if value is None else str(value).strip()
+
+
+def row_to_book(row: dict) -> Book:
+    """Собирает книгу из строки файла. Ключи сравниваются без учета регистра"""
+    if '__error__' in row:
+        raise ValueError(row['__error__'])
+
+    normalized = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+
+    book = Book(
+        title=Title(_as_str(normalized.get('title'))),
+        author=Author(_as_str(normalized.get('author'))),
+        year=Year(_as_str(normalized.get('year'))),
+        status=Status(_parse_status(normalized.get('status'))),
+    )
+
+    oid = _as_str(normalized.get('oid'))
+    if oid:
+        book.oid = oid
+
+    return book
+
+
+def validate_rows(rows: list[tuple[int, dict]]) -> tuple[list[Book], list[RejectedRow]]:
+    """Проверяет кусок строк. Выполняется в дочернем процессе, поэтому объявлена на уровне модуля"""
+    books: list[Book] = []
+    rejected: list[RejectedRow] = []
+
+    for line, row in rows:
+        try:
+            books.append(row_to_book(row))
+        except (ApplicationException, ValueError) as error:
+            rejected.append(RejectedRow(line=line, reason=str(error), row=row))
+
+    return books, rejected
+
+
+def _chunked(rows: Iterable[tuple[int, dict]], chunk_size: int) -> Iterator[list[tuple[int, dict]]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def import_books(
+        repository: BaseBooksRepository,
+        path: str,
+        errors_path: str,
+        chunk_size: int = 1000,
+        max_workers: int | None = None,
+) -> ImportReport:
+    """
+        Импортирует книги из CSV/JSONL файла в репозиторий.
+
+        Отклоненные строки вместе с причиной пишутся в errors_path в формате JSONL:
+        {"line": <номер строки>, "reason": <причина>, "row": <исходная строка>}.
+    """
+    file_format = detect_format(path)
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    report = ImportReport()
+
+    def commit(future: Future, errors_file: IO[str]) -> None:
+        books, rejected = future.result()
+
+        if books:
+            repository.add_books(books)
+
+        for rejected_row in rejected:
+            errors_file.write(json.dumps(
+                {'line': rejected_row.line, 'reason': rejected_row.reason, 'row': rejected_row.row},
+                ensure_ascii=False
+            ) + '\n')
+
+        report.imported += len(books)
+        report.rejected += len(rejected)
+        report.chunks += 1
+
+    with open(path, 'r', encoding='utf-8', newline='') as source, \
+            open(errors_path, 'w', encoding='utf-8') as errors_file, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: deque[Future] = deque()
+
+        for chunk in _chunked(read_rows(source, file_format), chunk_size):
+            in_flight.append(executor.submit(validate_rows, chunk))
+
+            # Куски сохраняются в порядке чтения, а не завершения, чтобы импорт был детерминированным
+            if len(in_flight) >= max_in_flight:
+                commit(in_flight.popleft(), errors_file)
+
+        while in_flight:
+            commit(in_flight.popleft(), errors_file)
+
+    return report
+
+
+def export_books(repository: BaseBooksRepository, path: str, filters: BookFilters | None = None) -> int:
+    """Потоково выгружает книги из репозитория в CSV/JSONL файл. Возвращает количество выгруженных книг"""
+    file_format = detect_format(path)
+    exported = 0
+
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        if file_format == CSV_FORMAT:
+            writer = csv.writer(target)
+            writer.writerow(CSV_COLUMNS)
+
+        for book in repository.iter_books(filters):
+            document = convert_book_to_document(book)
+
+            if file_format == CSV_FORMAT:
+                writer.writerow((
+                    document['oid'], document['title'], document['author'], document['year'], document['status']
+                ))
+            else:
+                target.write(json.dumps(document, ensure_ascii=False) + '\n')
+
+            exported += 1
+
+    return exported
@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+
+from core.infra.exceptions.books import MerkleDepthMismatchException
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.indexes.persistence import index_path, load_index_by_checksum
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.files import file_checksum
+
+
+"""Односторонняя синхронизация каталогов по деревьям хешей.
+
+Деревья источника и приемника сравниваются от корня, спуск идет только в узлы с разными хешами.
+В различающихся корзинах сравниваются хеши книг, и приемник получает минимальный набор операций:
+добавление книг, которых у него нет, обновление книг с другим содержимым и удаление книг,
+которых нет в источнике. Операции выполняются через BaseBooksRepository одной транзакцией.
+
+Если к репозиторию подключен MerkleIndex нужной глубины, используется он, и работа пропорциональна
+количеству различий. Иначе дерево строится по сохраненным документам каталога (iter_documents) на время
+синхронизации, книги при этом не создаются. Из источника в любом случае берутся только различающиеся книги.
+
+Дерево json каталога, сохраненное рядом с ним (persist_indexes), читается persisted_merkle_index без разбора
+самого каталога, и одинаковые каталоги сравниваются без его загрузки. Но книги из различающихся корзин
+берутся из репозитория источника, а json каталог загружается только целиком, поэтому при различиях
+синхронизация с ним стоит O(размер каталога) по памяти и времени разбора.
+"""
+
+
+@dataclass
+class CatalogDiff:
+    """
+    Различия каталогов.
+
+    Атрибуты:
+    - added: oid книг, которые есть только в источнике.
+    - updated: oid книг с разным содержимым.
+    - deleted: oid книг, которые есть только в приемнике.
+    - compared_nodes: Сколько узлов деревьев пришлось сравнить.
+    """
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    compared_nodes: int = 0
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.updated) + len(self.deleted)
+
+
+def merkle_index_of(repository: BaseBooksRepository, depth: int = 12) -> MerkleIndex:
+    """Подключенный к репозиторию MerkleIndex глубины depth или новое дерево по сохраненным документам каталога"""
+    for index in repository.indexes:
+        if isinstance(index, MerkleIndex) and index.depth == depth:
+            return index
+
+    index = MerkleIndex(depth)
+    index.rebuild(repository.iter_documents())
+    return index
+
+
+def persisted_merkle_index(catalog_path: str, depth: int = 12) -> MerkleIndex | None:
+    """
+        Дерево json каталога из файла индекса, сохраненного рядом с ним, или None, если файла нет
+        или он построен не по текущему содержимому каталога. Каталог не разбирается, только читается его crc32.
+    """
+    checksum = file_checksum(catalog_path)
+    if checksum is None:
+        return None
+
+    index = MerkleIndex(depth)
+    if not load_index_by_checksum(index, index_path(catalog_path, index), checksum) or index.depth != depth:
+        return None
+
+    return index
+
+
+def diff_catalogs(source: MerkleIndex, target: MerkleIndex) -> CatalogDiff:
+    if source.depth != target.depth:
+        raise MerkleDepthMismatchException(source.depth, target.depth)
+
+    diff = CatalogDiff()
+    nodes = [1]
+
+    while nodes:
+        node = nodes.pop()
+        diff.compared_nodes += 1
+
+        if source.node(node) == target.node(node):
+            continue
+
+        if not source.is_leaf(node):
+            nodes.extend((2 * node, 2 * node + 1))
+            continue
+
+        source_bucket, target_bucket = source.bucket(node), target.bucket(node)
+        for oid, digest in source_bucket.items():
+            target_digest = target_bucket.get(oid)
+            if target_digest is None:
+                diff.added.append(oid)
+            elif target_digest != digest:
+                diff.updated.append(oid)
+        diff.deleted.extend(oid for oid in target_bucket if oid not in source_bucket)
+
+    return diff
+
+
+def sync_catalogs(source: BaseBooksRepository, target: BaseBooksRepository, depth: int = 12) -> CatalogDiff:
+    """
+        Приводит target к содержимому source и возвращает примененные различия.
+        Приемник заблокирован транзакцией от сравнения до записи, при ошибке изменения откатываются.
+    """
+    source_index = merkle_index_of(source, depth)
+
+    target.begin()
+    try:
+        diff = diff_catalogs(source_index, merkle_index_of(target, depth))
+
+        target.add_books(source.get_book_by_oid(oid) for oid in diff.added)
+
+        for oid in diff.updated:
+            book = source.get_book_by_oid(oid)
+            # Содержимое берется из источника, а версия - из приемника, чтобы условная запись прошла
+            book.version = target.get_book_by_oid(oid).version
+            target.update_book(book)
+
+        for oid in diff.deleted:
+            target.delete_book(oid)
+    except BaseException:
+        target.rollback()
+        raise
+
+    target.commit()
+
+    return diff
@@ -1,10 +1,23 @@
+import os
 from dataclasses import dataclass
+from datetime import datetime
 
 from core.domain.entities.books import Book
 from core.domain.values.books import Title, Author, Year, Status
+from core.infra.duplicates.books import find_duplicates
+from core.infra.exceptions.books import BookNotFoundException, CatalogNotFoundException
 from core.infra.filters.books import BookFilters
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.indexes.lazy import LazyIndex
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.indexes.prefix import PrefixIndex
+from core.infra.indexes.recency import RecencyIndex
 from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.transfer.books import ImportReport, import_books, export_books
+from core.infra.transfer.sync import CatalogDiff, diff_catalogs, persisted_merkle_index, sync_catalogs
 from core.logic.commands.base import BaseCommand, BaseCommandHandler
+from core.logic.unit_of_work import UnitOfWork
 
 
 """Команды для книг, а так же их Handlers"""
@@ -12,7 +25,12 @@ from core.logic.commands.base import BaseCommand, BaseCommandHandler
 
 @dataclass(frozen=True)
 class GetBooksCommand(BaseCommand):
-    ...
+    fields: tuple[str, ...] | None = None  # Проекция: вместо Book возвращаются ленивые BookView
+
+
+@dataclass(frozen=True)
+class GetBookCommand(BaseCommand):
+    oid: str
 
 
 @dataclass(frozen=True)
@@ -32,6 +50,44 @@ class FindBookCommand(BaseCommand):
     title: str | None = None
     author: str | None = None
     year: str | None = None
+    fields: tuple[str, ...] | None = None
+    order_by: str | None = None  # Например '-year,title'
+    limit: int | None = None
+    after: str | None = None  # Курсор следующей страницы из book_cursor
+
+
+@dataclass(frozen=True)
+class CountBooksCommand(BaseCommand):
+    title: str | None = None
+    author: str | None = None
+    year: str | None = None
+    status: bool | None = None
+
+
+@dataclass(frozen=True)
+class BookExistsCommand(CountBooksCommand):
+    ...
+
+
+@dataclass(frozen=True)
+class FuzzyFindBookCommand(BaseCommand):
+    query: str
+    limit: int = 10
+    field: str | None = None  # 'title', 'author' или None - оба поля
+    min_similarity: float = 0.3
+
+
+@dataclass(frozen=True)
+class CompleteBookFieldCommand(BaseCommand):
+    prefix: str
+    field: str = 'author'  # 'title' или 'author'
+    limit: int = 10
+
+
+@dataclass(frozen=True)
+class GetLatestBooksCommand(BaseCommand):
+    limit: int = 10
+    since: datetime | None = None
 
 
 @dataclass(frozen=True)
@@ -39,12 +95,51 @@ class UpdateBookStatusCommand(BaseCommand):
     oid: str
 
 
+@dataclass(frozen=True)
+class ImportBooksCommand(BaseCommand):
+    path: str
+    errors_path: str
+    chunk_size: int = 1000
+    max_workers: int | None = None
+
+
+@dataclass(frozen=True)
+class ExportBooksCommand(BaseCommand):
+    path: str
+
+
+@dataclass(frozen=True)
+class SyncCatalogCommand(BaseCommand):
+    """
+    Синхронизация репозитория с json каталогом source_path.
+
+    Одинаковые каталоги сравниваются по сохраненному рядом с источником дереву хешей без разбора источника.
+    Но json каталог читается только целиком, поэтому при любых различиях источник загружается полностью:
+    память и время разбора O(размер источника), хотя записываются только различающиеся книги.
+    """
+    source_path: str  # json каталог, содержимое которого переносится в репозиторий
+
+
+@dataclass(frozen=True)
+class FindDuplicateBooksCommand(BaseCommand):
+    threshold: float = 0.7  # Наименьшая оценка похожести названия и автора (коэффициент Жаккара триграмм)
+    limit: int | None = None  # Сколько кластеров вернуть, от самых больших
+
+
 @dataclass(frozen=True)
 class GetBooksCommandHandler(BaseCommandHandler[GetBooksCommand, list[Book]]):
     book_repository: BaseBooksRepository
 
     def handle(self, command: GetBooksCommand) -> list[Book]:
-        return self.book_repository.get_books()
+        return self.book_repository.get_books(fields=command.fields)
+
+
+@dataclass(frozen=True)
+class GetBookCommandHandler(BaseCommandHandler[GetBookCommand, Book]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: GetBookCommand) -> Book:
+        return self.book_repository.get_book_by_oid(command.oid)
 
 
 @dataclass(frozen=True)
@@ -82,7 +177,81 @@ class FindBookCommandHandler(BaseCommandHandler[FindBookCommand, list[Book]]):
             year=command.year
         )
 
-        return self.book_repository.get_books(filters=filters)
+        return self.book_repository.get_books(
+            filters=filters,
+            fields=command.fields,
+            order_by=command.order_by,
+            limit=command.limit,
+            after=command.after,
+        )
+
+
+@dataclass(frozen=True)
+class CountBooksCommandHandler(BaseCommandHandler[CountBooksCommand, int]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: CountBooksCommand) -> int:
+        filters = BookFilters(title=command.title, author=command.author, year=command.year, status=command.status)
+        return self.book_repository.count_books(filters)
+
+
+@dataclass(frozen=True)
+class BookExistsCommandHandler(BaseCommandHandler[BookExistsCommand, bool]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: BookExistsCommand) -> bool:
+        filters = BookFilters(title=command.title, author=command.author, year=command.year, status=command.status)
+        return self.book_repository.exists(filters)
+
+
+@dataclass(frozen=True)
+class FuzzyFindBookCommandHandler(BaseCommandHandler[FuzzyFindBookCommand, list[tuple[Book, float]]]):
+    book_repository: BaseBooksRepository
+    fuzzy_index: LazyIndex[TrigramIndex]
+
+    def handle(self, command: FuzzyFindBookCommand) -> list[tuple[Book, float]]:
+        """Книги с похожестью, по убыванию похожести"""
+        matches = self.fuzzy_index.get().search(
+            command.query,
+            limit=command.limit,
+            fields=(command.field,) if command.field else None,
+            min_similarity=command.min_similarity,
+        )
+
+        books = []
+        for match in matches:
+            try:
+                books.append((self.book_repository.get_book_by_oid(match.oid), match.score))
+            except BookNotFoundException:
+                # Книгу удалили между поиском по индексу и чтением
+                continue
+
+        return books
+
+
+@dataclass(frozen=True)
+class CompleteBookFieldCommandHandler(BaseCommandHandler[CompleteBookFieldCommand, list[str]]):
+    prefix_index: LazyIndex[PrefixIndex]
+
+    def handle(self, command: CompleteBookFieldCommand) -> list[str]:
+        return self.prefix_index.get().complete(command.prefix, command.field, limit=command.limit)
+
+
+@dataclass(frozen=True)
+class GetLatestBooksCommandHandler(BaseCommandHandler[GetLatestBooksCommand, list[Book]]):
+    book_repository: BaseBooksRepository
+    recency_index: LazyIndex[RecencyIndex]
+
+    def handle(self, command: GetLatestBooksCommand) -> list[Book]:
+        """Последние добавленные книги, начиная с самой новой"""
+        books = []
+        for oid in self.recency_index.get().latest(command.limit, since=command.since):
+            try:
+                books.append(self.book_repository.get_book_by_oid(oid))
+            except BookNotFoundException:
+                continue
+
+        return books
 
 
 @dataclass(frozen=True)
@@ -90,9 +259,80 @@ class UpdateBookStatusCommandHandler(BaseCommandHandler[UpdateBookStatusCommand,
     book_repository: BaseBooksRepository
 
     def handle(self, command: UpdateBookStatusCommand) -> Book:
-        book = self.book_repository.get_book_by_oid(command.oid)
-        book.status = Status(not book.status.as_generic_type())
+        with UnitOfWork(self.book_repository):
+            book = self.book_repository.get_book_by_oid(command.oid)
+            book.status = Status(not book.status.as_generic_type())
 
-        self.book_repository.update_book(book)
+            self.book_repository.update_book(book)
 
         return book
+
+
+@dataclass(frozen=True)
+class ImportBooksCommandHandler(BaseCommandHandler[ImportBooksCommand, ImportReport]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: ImportBooksCommand) -> ImportReport:
+        return import_books(
+            self.book_repository,
+            path=command.path,
+            errors_path=command.errors_path,
+            chunk_size=command.chunk_size,
+            max_workers=command.max_workers,
+        )
+
+
+@dataclass(frozen=True)
+class ExportBooksCommandHandler(BaseCommandHandler[ExportBooksCommand, int]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: ExportBooksCommand) -> int:
+        return export_books(self.book_repository, path=command.path)
+
+
+@dataclass(frozen=True)
+class SyncCatalogCommandHandler(BaseCommandHandler[SyncCatalogCommand, CatalogDiff]):
+    book_repository: BaseBooksRepository
+    merkle_index: LazyIndex[MerkleIndex]
+
+    def handle(self, command: SyncCatalogCommand) -> CatalogDiff:
+        """
+            Приводит репозиторий к содержимому каталога source_path. Дерево источника сохраняется рядом с ним.
+            Если сохраненное дерево совпадает с деревом репозитория, источник не загружается. Иначе json
+            каталог источника загружается целиком (O(размер каталога)), а записи затрагивают только различия.
+        """
+        if not os.path.exists(command.source_path):
+            raise CatalogNotFoundException(command.source_path)
+
+        target_index = self.merkle_index.get()
+        source_index = persisted_merkle_index(command.source_path, target_index.depth)
+        if source_index is not None:
+            diff = diff_catalogs(source_index, target_index)
+            if not diff:
+                return diff
+
+        source = MemoryJsonBooksRepository(command.source_path, persist_indexes=True)
+        try:
+            source.attach_index(MerkleIndex(target_index.depth))
+            return sync_catalogs(source, self.book_repository, target_index.depth)
+        finally:
+            # close сохраняет и дерево источника для следующей синхронизации
+            source.close()
+
+
+@dataclass(frozen=True)
+class FindDuplicateBooksCommandHandler(BaseCommandHandler[FindDuplicateBooksCommand, list[list[tuple[Book, float]]]]):
+    book_repository: BaseBooksRepository
+
+    def handle(self, command: FindDuplicateBooksCommand) -> list[list[tuple[Book, float]]]:
+        """Кластеры вероятных дублей: книги с оценкой похожести на первую книгу кластера"""
+        views = self.book_repository.get_books(fields=('title', 'author'))
+        clusters = find_duplicates(
+            ((view.oid, view.title.as_generic_type(), view.author.as_generic_type()) for view in views),
+            threshold=command.threshold,
+        )
+
+        return [
+            [(self.book_repository.get_book_by_oid(oid), score) for oid, score in zip(cluster.oids, cluster.scores)]
+            for cluster in clusters[:command.limit]
+        ]
@@ -1,9 +1,22 @@
+import os
 from functools import lru_cache
 
 from punq import Container, Scope
 
+from core.domain.entities.ids import set_oid_format
+from core.infra.changes.books import ChangeFeed
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.indexes.lazy import LazyIndex
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.indexes.prefix import PrefixIndex
+from core.infra.indexes.recency import RecencyIndex
 from core.infra.repositories.base import BaseBooksRepository
 from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.memory import InMemoryBooksRepository
+from core.infra.repositories.pool import CatalogRepositoryPool
+from core.infra.repositories.records import RecordStoreBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
 from core.logic.commands.books import (
     AddBookCommandHandler,
     DeleteBookCommandHandler,
@@ -12,9 +25,31 @@ from core.logic.commands.books import (
     AddBookCommand,
     DeleteBookCommand,
     FindBookCommand,
-    UpdateBookStatusCommand, GetBooksCommandHandler, GetBooksCommand
+    UpdateBookStatusCommand, GetBooksCommandHandler, GetBooksCommand,
+    GetBookCommandHandler,
+    GetBookCommand,
+    ImportBooksCommandHandler,
+    ExportBooksCommandHandler,
+    ImportBooksCommand,
+    ExportBooksCommand,
+    FuzzyFindBookCommandHandler,
+    FuzzyFindBookCommand,
+    CompleteBookFieldCommandHandler,
+    CompleteBookFieldCommand,
+    GetLatestBooksCommandHandler,
+    GetLatestBooksCommand,
+    CountBooksCommandHandler,
+    CountBooksCommand,
+    BookExistsCommandHandler,
+    BookExistsCommand,
+    SyncCatalogCommandHandler,
+    SyncCatalogCommand,
+    FindDuplicateBooksCommandHandler,
+    FindDuplicateBooksCommand,
 )
-from core.logic.mediator import Mediator
+from core.logic.dispatcher import CommandDispatcher
+from core.logic.mediator import Mediator, CatalogMediator
+from core.logic.unit_of_work import UnitOfWork
 from core.settings.config import Config
 
 
@@ -23,12 +58,14 @@ def init_container():
     return _init_container()
 
 
-def _init_container(test_mode: bool = False) -> Container:
+def _init_container(test_mode: bool = False, books_repository: BaseBooksRepository | None = None) -> Container:
     """
         Инициализирует контейнер с необходимыми зависимостями и конфигурациями.
 
         Параметры:
             test_mode (bool, optional): Указывает, инициализируется ли контейнер в режиме тестирования. По умолчанию False.
+            books_repository (BaseBooksRepository, optional): Готовый репозиторий книг вместо
+                создаваемого init_books_json_repository. Используется для контейнеров отдельных каталогов пула.
 
         Возвращает:
             Container: Инициализированный контейнер с зарегистрированными зависимостями и конфигурациями.
@@ -42,29 +79,121 @@ def _init_container(test_mode: bool = False) -> Container:
             - FindBookCommandHandler: Обработчик для команды FindBookCommand.
             - UpdateBookStatusCommandHandler: Обработчик для команды UpdateBookStatusCommand.
             - GetBooksCommandHandler: Обработчик для команды GetBooksCommand.
+            - GetBookCommandHandler: Обработчик для команды GetBookCommand.
+            - ImportBooksCommandHandler: Обработчик для команды ImportBooksCommand.
+            - ExportBooksCommandHandler: Обработчик для команды ExportBooksCommand.
+            - FuzzyFindBookCommandHandler: Обработчик для команды FuzzyFindBookCommand.
+            - CompleteBookFieldCommandHandler: Обработчик для команды CompleteBookFieldCommand.
+            - GetLatestBooksCommandHandler: Обработчик для команды GetLatestBooksCommand.
+            - CountBooksCommandHandler: Обработчик для команды CountBooksCommand.
+            - BookExistsCommandHandler: Обработчик для команды BookExistsCommand.
+            - SyncCatalogCommandHandler: Обработчик для команды SyncCatalogCommand.
+            - FindDuplicateBooksCommandHandler: Обработчик для команды FindDuplicateBooksCommand.
+            - UnitOfWork: Единица работы над репозиторием книг (новый экземпляр при каждом resolve).
 
-            Также регистрируются две фабрики:
-            - init_books_json_repository: Фабричная функция, которая инициализирует экземпляр MemoryJsonBooksRepository с
-              соответствующим путем к базе данных в зависимости от режима тестирования.
+            Также регистрируются фабрики:
+            - init_books_json_repository: Фабричная функция, которая инициализирует экземпляр MemoryJsonBooksRepository
+              с путем к базе данных из Config (или ShardedJsonBooksRepository, если Config.books_storage == 'sharded',
+              и RecordStoreBooksRepository с кэшем размером Config.record_cache_budget, если Config.books_storage == 'records').
+              В режиме тестирования создается InMemoryBooksRepository без файла, поэтому у каждого контейнера
+              свой каталог и тесты не мешают друг другу.
+              К json и тестовому репозиторию подключается BitmapIndex по статусу и году, если включен Config.bitmap_indexes.
+              При Config.persist_indexes индексы json репозитория загружаются из файлов рядом с каталогом
+              и сохраняются в них при завершении.
+              К любому репозиторию подключается лента изменений ChangeFeed.
+            - init_change_feed: Фабричная функция, которая создает ChangeFeed с файлом Config.change_feed_path
+              (в режиме тестирования - только в памяти) и буфером на Config.change_feed_buffer_size изменений.
+            - LazyIndex[TrigramIndex], LazyIndex[PrefixIndex], LazyIndex[RecencyIndex], LazyIndex[MerkleIndex]:
+              вторичные индексы для нечеткого поиска, автодополнения, выборки последних добавленных книг
+              и синхронизации каталогов (SyncCatalogCommand). Обработчики команд получают LazyIndex, поэтому
+              создание Mediator индексы не строит: индекс строится по каталогу и подключается к репозиторию
+              при первой команде, которой он нужен, и дальше обновляется при записях.
+            - init_trigram_index, init_prefix_index, init_recency_index, init_merkle_index: Фабричные функции,
+              которые возвращают сам индекс, построив его через LazyIndex.
+
+            Формат идентификаторов новых книг (uuid4 или uuid7) выбирается по Config.book_id_format.
             - init_mediator: Фабричная функция, которая инициализирует экземпляр Mediator и регистрирует необходимые обработчики команд.
+            - init_dispatcher: Фабричная функция, которая создает CommandDispatcher поверх Mediator
+              с размером пула и очереди из Config.
+            - init_catalog_pool: Фабричная функция, которая создает CatalogRepositoryPool каталогов
+              в Config.catalogs_directory с бюджетом памяти Config.catalogs_memory_budget. Каталоги открываются
+              как json репозитории с настройками отложенной записи и BitmapIndex из Config, в режиме
+              тестирования - как InMemoryBooksRepository.
+            - init_catalog_mediator: Фабричная функция, которая создает CatalogMediator поверх пула. Mediator
+              каталога берется из отдельного контейнера, в котором зарегистрирован репозиторий этого каталога.
 
             Затем контейнер возвращается для дальнейшего использования в приложении.
     """
     container = Container()
 
     container.register(Config, instance=Config(), scope=Scope.singleton)
+    set_oid_format(container.resolve(Config).book_id_format)
+
     container.register(AddBookCommandHandler)
     container.register(DeleteBookCommandHandler)
     container.register(FindBookCommandHandler)
     container.register(UpdateBookStatusCommandHandler)
     container.register(GetBooksCommandHandler)
+    container.register(GetBookCommandHandler)
+    container.register(ImportBooksCommandHandler)
+    container.register(ExportBooksCommandHandler)
+    container.register(FuzzyFindBookCommandHandler)
+    container.register(CompleteBookFieldCommandHandler)
+    container.register(GetLatestBooksCommandHandler)
+    container.register(CountBooksCommandHandler)
+    container.register(BookExistsCommandHandler)
+    container.register(SyncCatalogCommandHandler)
+    container.register(FindDuplicateBooksCommandHandler)
+    container.register(UnitOfWork)
+
+    if books_repository is not None:
+        container.register(BaseBooksRepository, instance=books_repository, scope=Scope.singleton)
 
     def init_books_json_repository() -> BaseBooksRepository:
         config: Config = container.resolve(Config)
-        repo = MemoryJsonBooksRepository(config.json_database_path if not test_mode else config.test_database_path)
+
+        if test_mode:
+            repo = InMemoryBooksRepository()
+        elif config.books_storage == 'sharded':
+            repo = ShardedJsonBooksRepository(config.sharded_database_path, config.shard_count)
+        elif config.books_storage == 'records':
+            repo = RecordStoreBooksRepository(config.records_database_path, config.record_cache_budget)
+        else:
+            repo = MemoryJsonBooksRepository(
+                config.json_database_path,
+                flush_delay=config.flush_delay,
+                flush_every=config.flush_every,
+                persist_indexes=config.persist_indexes,
+            )
+
+        if config.bitmap_indexes and isinstance(repo, MemoryJsonBooksRepository):
+            repo.attach_index(BitmapIndex())
+
+        # Лента подключается до первой записи, чтобы в нее попали все изменения
+        repo.attach_feed(container.resolve(ChangeFeed))
 
         return repo
 
+    def init_change_feed() -> ChangeFeed:
+        config: Config = container.resolve(Config)
+
+        return ChangeFeed(config.change_feed_path if not test_mode else None, config.change_feed_buffer_size)
+
+    def init_lazy_index(factory) -> LazyIndex:
+        return LazyIndex(container.resolve(BaseBooksRepository), factory)
+
+    def init_trigram_index() -> TrigramIndex:
+        return container.resolve(LazyIndex[TrigramIndex]).get()
+
+    def init_prefix_index() -> PrefixIndex:
+        return container.resolve(LazyIndex[PrefixIndex]).get()
+
+    def init_recency_index() -> RecencyIndex:
+        return container.resolve(LazyIndex[RecencyIndex]).get()
+
+    def init_merkle_index() -> MerkleIndex:
+        return container.resolve(LazyIndex[MerkleIndex]).get()
+
     def init_mediator() -> Mediator:
         mediator = Mediator()
 
@@ -73,10 +202,78 @@ def _init_container(test_mode: bool = False) -> Container:
         mediator.register_command(FindBookCommand, [container.resolve(FindBookCommandHandler)])
         mediator.register_command(UpdateBookStatusCommand, [container.resolve(UpdateBookStatusCommandHandler)])
         mediator.register_command(GetBooksCommand, [container.resolve(GetBooksCommandHandler)])
+        mediator.register_command(GetBookCommand, [container.resolve(GetBookCommandHandler)])
+        mediator.register_command(ImportBooksCommand, [container.resolve(ImportBooksCommandHandler)])
+        mediator.register_command(ExportBooksCommand, [container.resolve(ExportBooksCommandHandler)])
+        mediator.register_command(FuzzyFindBookCommand, [container.resolve(FuzzyFindBookCommandHandler)])
+        mediator.register_command(CompleteBookFieldCommand, [container.resolve(CompleteBookFieldCommandHandler)])
+        mediator.register_command(GetLatestBooksCommand, [container.resolve(GetLatestBooksCommandHandler)])
+        mediator.register_command(CountBooksCommand, [container.resolve(CountBooksCommandHandler)])
+        mediator.register_command(BookExistsCommand, [container.resolve(BookExistsCommandHandler)])
+        mediator.register_command(SyncCatalogCommand, [container.resolve(SyncCatalogCommandHandler)])
+        mediator.register_command(FindDuplicateBooksCommand, [container.resolve(FindDuplicateBooksCommandHandler)])
 
         return mediator
 
-    container.register(BaseBooksRepository, factory=init_books_json_repository, scope=Scope.singleton)
+    def init_dispatcher() -> CommandDispatcher:
+        config: Config = container.resolve(Config)
+
+        return CommandDispatcher(
+            mediator=container.resolve(Mediator),
+            workers=config.dispatcher_workers,
+            max_queue_size=config.dispatcher_queue_size,
+        )
+
+    def open_catalog_repository(path: str) -> BaseBooksRepository:
+        config: Config = container.resolve(Config)
+
+        if test_mode:
+            repo = InMemoryBooksRepository()
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            repo = MemoryJsonBooksRepository(
+                path,
+                flush_delay=config.flush_delay,
+                flush_every=config.flush_every,
+                persist_indexes=config.persist_indexes,
+            )
+
+        if config.bitmap_indexes:
+            repo.attach_index(BitmapIndex())
+
+        return repo
+
+    def init_catalog_pool() -> CatalogRepositoryPool:
+        config: Config = container.resolve(Config)
+
+        return CatalogRepositoryPool(
+            config.catalogs_directory,
+            memory_budget=config.catalogs_memory_budget,
+            open_repository=open_catalog_repository,
+        )
+
+    def init_catalog_mediator() -> CatalogMediator:
+        return CatalogMediator(
+            pool=container.resolve(CatalogRepositoryPool),
+            mediator_factory=lambda repo: _init_container(test_mode, books_repository=repo).resolve(Mediator),
+        )
+
+    container.register(ChangeFeed, factory=init_change_feed, scope=Scope.singleton)
+    if books_repository is None:
+        container.register(BaseBooksRepository, factory=init_books_json_repository, scope=Scope.singleton)
+    for index_type in (TrigramIndex, PrefixIndex, RecencyIndex, MerkleIndex):
+        container.register(
+            LazyIndex[index_type],
+            factory=lambda index_type=index_type: init_lazy_index(index_type),
+            scope=Scope.singleton,
+        )
+    container.register(TrigramIndex, factory=init_trigram_index, scope=Scope.singleton)
+    container.register(PrefixIndex, factory=init_prefix_index, scope=Scope.singleton)
+    container.register(RecencyIndex, factory=init_recency_index, scope=Scope.singleton)
+    container.register(MerkleIndex, factory=init_merkle_index, scope=Scope.singleton)
     container.register(Mediator, factory=init_mediator, scope=Scope.singleton)
+    container.register(CommandDispatcher, factory=init_dispatcher, scope=Scope.singleton)
+    container.register(CatalogRepositoryPool, factory=init_catalog_pool, scope=Scope.singleton)
+    container.register(CatalogMediator, factory=init_catalog_mediator, scope=Scope.singleton)
 
     return container
@@ -0,0 +1,237 @@
+import itertools
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Iterable, Type
+
+from core.logic.commands.base import BaseCommand, CR
+from core.logic.commands.books import (
+    GetBooksCommand,
+    GetBookCommand,
+    FindBookCommand,
+    AddBookCommand,
+    DeleteBookCommand,
+    UpdateBookStatusCommand,
+    ImportBooksCommand,
+    ExportBooksCommand,
+    FuzzyFindBookCommand,
+    CompleteBookFieldCommand,
+    GetLatestBooksCommand,
+    CountBooksCommand,
+    BookExistsCommand,
+    SyncCatalogCommand,
+    FindDuplicateBooksCommand,
+)
+from core.logic.exceptions.mediator import CommandQueueFullException, DispatcherShutdownException
+from core.logic.mediator import Mediator
+
+
+class CommandPriority(IntEnum):
+    """Классы приоритета: меньшее значение обслуживается раньше"""
+    READ = 0
+    WRITE = 1
+    BULK = 2
+
+
+DEFAULT_PRIORITIES: dict[Type[BaseCommand], CommandPriority] = {
+    GetBookCommand: CommandPriority.READ,
+    GetBooksCommand: CommandPriority.READ,
+    FindBookCommand: CommandPriority.READ,
+    FuzzyFindBookCommand: CommandPriority.READ,
+    CompleteBookFieldCommand: CommandPriority.READ,
+    GetLatestBooksCommand: CommandPriority.READ,
+    CountBooksCommand: CommandPriority.READ,
+    BookExistsCommand: CommandPriority.READ,
+    AddBookCommand: CommandPriority.WRITE,
+    DeleteBookCommand: CommandPriority.WRITE,
+    UpdateBookStatusCommand: CommandPriority.WRITE,
+    ImportBooksCommand: CommandPriority.BULK,
+    ExportBooksCommand: CommandPriority.BULK,
+    SyncCatalogCommand: CommandPriority.BULK,
+    FindDuplicateBooksCommand: CommandPriority.BULK,
+}
+
+
+@dataclass
+class CommandTypeStats:
+    """Статистика одного типа команд. Время в секундах"""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_service: float = 0.0
+    max_service: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.completed if self.completed else 0.0
+
+    @property
+    def avg_service(self) -> float:
+        return self.total_service / self.completed if self.completed else 0.0
+
+
+@dataclass(order=True)
+class _QueuedCommand:
+    # Номер поступления, отложенный на aging_window номеров за каждую ступень приоритета
+    rank: float
+    sequence: int
+    command: BaseCommand = field(compare=False)
+    future: Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+_STOP = object()
+
+
+@dataclass(eq=False)
+class CommandDispatcher:
+    """
+    Диспетчер команд перед Mediator: ограниченная очередь, пул потоков-обработчиков и приоритеты.
+
+    Атрибуты:
+    - mediator: Mediator, которому передаются команды.
+    - workers: Количество потоков-обработчиков.
+    - max_queue_size: Размер очереди. При переполнении submit ждет свободного места
+      (reject_when_full=False, обратное давление) или сразу выбрасывает CommandQueueFullException.
+    - priorities: Классы приоритета по типам команд. Чтения (GetBookCommand, FindBookCommand, ...)
+      обгоняют записи, записи обгоняют массовые операции. Внутри класса соблюдается порядок поступления.
+    - aging_window: Старение. Команду класса приоритета p могут обогнать не больше p * aging_window
+      команд, поступивших после нее, поэтому непрерывный поток чтений не задерживает массовые операции
+      бесконечно.
+
+    Методы:
+    - submit(self, command, timeout=None) -> Future: Ставит команду в очередь.
+    - dispatch(self, command, timeout=None) -> list: Ставит команду в очередь и ждет результат.
+    - stats(self) -> dict[Type[BaseCommand], CommandTypeStats]: Статистика по типам команд.
+    - shutdown(self, wait=True) -> None: Останавливает обработчики после выполнения поставленных команд.
+    """
+    mediator: Mediator
+    workers: int = 4
+    max_queue_size: int = 1000
+    reject_when_full: bool = False
+    priorities: dict[Type[BaseCommand], CommandPriority] = field(default_factory=lambda: dict(DEFAULT_PRIORITIES))
+    default_priority: CommandPriority = CommandPriority.WRITE
+    aging_window: int = 100
+
+    def __post_init__(self) -> None:
+        self._queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=self.max_queue_size)
+        self._sequence = itertools.count()
+        self._stats: dict[Type[BaseCommand], CommandTypeStats] = {}
+        self._stats_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._max_depth = 0
+        self._shutdown = False
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'command-dispatcher-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _stats_for(self, command_type: Type[BaseCommand]) -> CommandTypeStats:
+        if command_type not in self._stats:
+            self._stats[command_type] = CommandTypeStats()
+        return self._stats[command_type]
+
+    def priority_of(self, command: BaseCommand) -> CommandPriority:
+        return self.priorities.get(command.__class__, self.default_priority)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def max_queue_depth(self) -> int:
+        return self._max_depth
+
+    def submit(self, command: BaseCommand, timeout: float | None = None) -> Future:
+        if self._shutdown:
+            raise DispatcherShutdownException()
+
+        self._ensure_started()
+
+        future: Future = Future()
+        sequence = next(self._sequence)
+        item = _QueuedCommand(
+            rank=sequence + self.priority_of(command) * self.aging_window,
+            sequence=sequence,
+            command=command,
+            future=future,
+            enqueued_at=time.perf_counter(),
+        )
+
+        try:
+            self._queue.put(item, block=not self.reject_when_full, timeout=timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats_for(command.__class__).rejected += 1
+            raise CommandQueueFullException(command.__class__)
+
+        with self._stats_lock:
+            self._stats_for(command.__class__).submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+
+        return future
+
+    def dispatch(self, command: BaseCommand, timeout: float | None = None) -> Iterable[CR]:
+        return self.submit(command, timeout=timeout).result()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item.command is _STOP:
+                return
+
+            if not item.future.set_running_or_notify_cancel():
+                continue
+
+            started = time.perf_counter()
+            try:
+                result: Any = self.mediator.handle_command(item.command)
+            except BaseException as error:
+                failed = True
+                item.future.set_exception(error)
+            else:
+                failed = False
+                item.future.set_result(result)
+            finished = time.perf_counter()
+
+            with self._stats_lock:
+                stats = self._stats_for(item.command.__class__)
+                wait, service = started - item.enqueued_at, finished - started
+                stats.completed += 1
+                stats.failed += failed
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                stats.total_service += service
+                stats.max_service = max(stats.max_service, service)
+
+    def stats(self) -> dict[Type[BaseCommand], CommandTypeStats]:
+        with self._stats_lock:
+            return {command_type: CommandTypeStats(**vars(stats)) for command_type, stats in self._stats.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._shutdown = True
+
+        for _ in self._threads:
+            # Стоп-сигнал обслуживается последним, поэтому сначала выполнятся уже поставленные команды
+            self._queue.put(_QueuedCommand(math.inf, next(self._sequence), _STOP, Future(), 0.0))
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
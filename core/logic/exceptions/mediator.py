@@ -10,3 +10,19 @@ class CommandHandlersNotRegisteredException(LogicException):
     @property
     def message(self) -> str:
         return f'Command handlers for "{self.command_type}" are not registered'
+
+
+@dataclass(eq=False)
+class CommandQueueFullException(LogicException):
+    command_type: type
+
+    @property
+    def message(self) -> str:
+        return f'Command queue is full, "{self.command_type}" was rejected'
+
+
+@dataclass(eq=False)
+class DispatcherShutdownException(LogicException):
+    @property
+    def message(self) -> str:
+        return 'Command dispatcher is shut down'
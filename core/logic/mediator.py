@@ -1,7 +1,10 @@
+import threading
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Iterable, Type
+from typing import Callable, Iterable, Type
 
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.pool import CatalogRepositoryPool
 from core.logic.commands.base import BaseCommandHandler, CT, CR, BaseCommand
 from core.logic.exceptions.mediator import CommandHandlersNotRegisteredException
 
@@ -52,4 +55,43 @@ class Mediator:
         if not handlers:
             raise CommandHandlersNotRegisteredException(command_type)
 
-        return [handler.handle(command) for handler in handlers]
\ No newline at end of file
+        return [handler.handle(command) for handler in handlers]
+
+
+@dataclass(eq=False)
+class CatalogMediator:
+    """
+    Маршрутизация команд по каталогам пула.
+
+    Атрибуты:
+    - pool: Пул репозиториев каталогов.
+    - mediator_factory: Создает Mediator, обработчики которого работают с переданным репозиторием каталога.
+
+    У каждого открытого каталога свой Mediator (со своими обработчиками и индексами). Он создается
+    при первой команде каталогу и забывается, когда пул закрывает каталог.
+
+    Методы:
+    - handle_command(self, catalog_id: str, command: BaseCommand) -> Iterable[CR]:
+        Обрабатывает команду Mediator-ом каталога catalog_id. Каталог не закрывается до конца обработки.
+    """
+    pool: CatalogRepositoryPool
+    mediator_factory: Callable[[BaseBooksRepository], Mediator]
+
+    _mediators: dict[str, Mediator] = field(default_factory=dict, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self) -> None:
+        self.pool.on_evict(self._forget)
+
+    def _forget(self, catalog_id: str, repository: BaseBooksRepository) -> None:
+        with self._lock:
+            self._mediators.pop(catalog_id, None)
+
+    def handle_command(self, catalog_id: str, command: BaseCommand) -> Iterable[CR]:
+        with self.pool.lease(catalog_id) as repository:
+            with self._lock:
+                mediator = self._mediators.get(catalog_id)
+                if mediator is None:
+                    mediator = self._mediators[catalog_id] = self.mediator_factory(repository)
+
+            return mediator.handle_command(command)
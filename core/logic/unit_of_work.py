@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+
+from core.infra.repositories.base import BaseBooksRepository
+
+
+@dataclass(eq=False)
+class UnitOfWork:
+    """
+    Единица работы: группирует несколько команд в одну транзакцию хранилища.
+
+    Все чтения и записи внутри блока with работают с одним загруженным снимком каталога.
+    При успешном выходе изменения сохраняются одной записью, при исключении - отменяются.
+    Шардированный каталог сохраняет изменения нескольких шардов через журнал: сбой процесса
+    посреди записи не оставит сохраненной только часть из них.
+
+    Пример:
+        with container.resolve(UnitOfWork):
+            mediator.handle_command(UpdateBookStatusCommand(first_oid))
+            mediator.handle_command(UpdateBookStatusCommand(second_oid))
+    """
+    book_repository: BaseBooksRepository
+
+    def __enter__(self) -> 'UnitOfWork':
+        self.book_repository.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.book_repository.commit()
+        else:
+            self.book_repository.rollback()
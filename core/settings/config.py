@@ -1,3 +1,44 @@
 class Config:
     json_database_path = 'books.json'
-    test_database_path = 'test_books.json'
+
+    # Формат идентификаторов новых книг: 'uuid4' - случайные, 'uuid7' - упорядоченные по времени создания
+    book_id_format = 'uuid4'
+
+    # 'json' - один файл json_database_path, 'sharded' - директория sharded_database_path с shard_count шардами,
+    # 'records' - файл записей records_database_path для каталогов больше памяти, в памяти держится
+    # не больше record_cache_budget байт документов
+    books_storage = 'json'
+    sharded_database_path = 'books_shards'
+    shard_count = 8
+    records_database_path = 'books.records'
+    record_cache_budget = 64 * 2 ** 20
+
+    # Каталоги нескольких библиотек: файлы <catalogs_directory>/<id каталога>.json открываются по запросу,
+    # давно не использованные закрываются, когда оценка памяти открытых каталогов превышает
+    # catalogs_memory_budget байт (None - без ограничения)
+    catalogs_directory = 'catalogs'
+    catalogs_memory_budget = 256 * 2 ** 20
+
+    # Отложенная запись json репозитория: сброс после flush_every изменений или через flush_delay секунд
+    flush_every = 1
+    flush_delay = None
+
+    # Битовые индексы по статусу и году для json репозитория
+    bitmap_indexes = True
+
+    # Сохранение индексов json репозитория в файлы рядом с каталогом для быстрого перезапуска
+    persist_indexes = True
+
+    # Лента изменений каталога: файл для чтения другими процессами (None - только в памяти)
+    # и сколько последних изменений хранится в памяти для подписчиков.
+    # Файл только дописывается и не обрезается, поэтому включается, когда его кто-то читает (tail_changes)
+    change_feed_path = None
+    change_feed_buffer_size = 10000
+
+    # Диспетчер команд: количество потоков-обработчиков и размер очереди
+    dispatcher_workers = 4
+    dispatcher_queue_size = 1000
+
+    # Постраничный вывод книг в консоли: книг на странице и вид по умолчанию ('full' или 'compact')
+    cli_page_size = 20
+    cli_layout = 'full'
@@ -0,0 +1,154 @@
+import io
+
+import pytest
+
+from core.application.menu_items import utils
+from core.application.menu_items.utils import BookPager, BookRenderer, COMPACT_LAYOUT, FULL_LAYOUT, print_books
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+
+
+class CountingOutput(io.StringIO):
+    """Вывод, который считает вызовы write"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        self.writes += 1
+        return super().write(text)
+
+
+def _make_books(count: int) -> list[Book]:
+    return [
+        Book(title=Title(f'Книга {number}'), author=Author(f'Автор {number}'), year=Year('2001'))
+        for number in range(count)
+    ]
+
+
+def test_page_slicing():
+    books = _make_books(45)
+    pager = BookPager(books, page_size=20, output=CountingOutput(), book_renderer=BookRenderer())
+
+    assert pager.page_count == 3
+    assert 'Книга 0\n' in pager.render_page() and 'Книга 19\n' in pager.render_page()
+    assert 'Книга 20\n' not in pager.render_page()
+
+    pager.jump(3)
+    assert pager.render_page().count('ID: ') == 5
+    assert 'Книга 44\n' in pager.render_page()
+
+
+def test_navigation_stays_within_pages():
+    pager = BookPager(_make_books(45), page_size=20, output=CountingOutput(), book_renderer=BookRenderer())
+
+    pager.prev()
+    assert pager.page == 0
+
+    pager.next()
+    pager.next()
+    pager.next()
+    assert pager.page == 2
+
+    pager.jump(0)
+    assert pager.page == 0
+    pager.jump(100)
+    assert pager.page == 2
+    pager.jump(2)
+    assert pager.page == 1
+
+
+def test_empty_catalog_has_one_page():
+    pager = BookPager([], page_size=20, output=CountingOutput(), book_renderer=BookRenderer())
+
+    assert pager.page_count == 1
+    pager.next()
+    assert pager.page == 0
+
+
+def test_compact_and_full_layout():
+    book = _make_books(1)[0]
+    renderer = BookRenderer()
+
+    full = renderer.render(book, FULL_LAYOUT)
+    compact = renderer.render(book, COMPACT_LAYOUT)
+
+    assert f'ID: {book.oid}\n' in full and 'Название: Книга 0\n' in full and 'Статус: В наличии\n' in full
+    assert compact.count('\n') == 1 and compact.startswith(book.oid) and 'Книга 0' in compact
+    assert renderer.render_many([book], COMPACT_LAYOUT).startswith('ID')
+
+    pager = BookPager([book], output=CountingOutput(), book_renderer=renderer)
+    pager.toggle_layout()
+    assert pager.layout == COMPACT_LAYOUT
+    assert pager.render_page() == renderer.render_many([book], COMPACT_LAYOUT)
+
+
+def test_cache_is_invalidated_when_book_changes():
+    book = _make_books(1)[0]
+    renderer = BookRenderer()
+
+    renderer.render(book)
+    assert renderer.render(book) is renderer.render(book)
+    assert (renderer.hits, renderer.misses) == (2, 1)
+
+    book.status = Status(False)
+    assert 'Статус: Нет в наличии' in renderer.render(book)
+    assert renderer.misses == 2
+
+
+def test_cache_is_bounded():
+    renderer = BookRenderer(max_cache_size=2)
+    first, second, third = _make_books(3)
+
+    for book in (first, second, third, first):
+        renderer.render(book)
+
+    assert renderer.misses == 4
+
+
+def test_one_buffered_write_per_page():
+    output = CountingOutput()
+    pager = BookPager(_make_books(45), page_size=20, output=output, book_renderer=BookRenderer())
+
+    pager.write_all()
+    assert output.writes == 3
+    assert output.getvalue().count('ID: ') == 45
+
+    output.writes = 0
+    pager.write_page()
+    assert output.writes == 1
+
+
+def test_interactive_navigation():
+    output = CountingOutput()
+    pager = BookPager(_make_books(45), page_size=20, output=output, book_renderer=BookRenderer())
+    answers = iter(['n', '3', 'p', 't', 'x'])
+
+    pager.interact(read=lambda prompt: next(answers))
+
+    assert output.writes == 5
+    assert pager.page == 1
+    assert pager.layout == COMPACT_LAYOUT
+
+
+def test_interactive_next_on_last_page_exits():
+    output = CountingOutput()
+    pager = BookPager(_make_books(25), page_size=20, output=output, book_renderer=BookRenderer())
+
+    pager.interact(read=lambda prompt: 'n')
+
+    assert output.writes == 2
+    assert pager.page == 1
+
+
+@pytest.mark.parametrize('page_size, writes', [(20, 3), (50, 1)])
+def test_print_books_writes_pages_when_redirected(monkeypatch, page_size, writes):
+    output = CountingOutput()
+    monkeypatch.setattr(utils.sys, 'stdin', io.StringIO())
+    monkeypatch.setattr(utils.sys, 'stdout', output)
+
+    print_books(_make_books(45), page_size=page_size, layout=COMPACT_LAYOUT)
+
+    assert output.writes == writes
+    assert output.getvalue().count('Книга') == 45
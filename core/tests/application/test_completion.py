@@ -0,0 +1,101 @@
+import io
+from contextlib import contextmanager
+
+import pytest
+from punq import Container
+
+# Меню импортируется, как в приложении: через base, который подключает элементы меню из app
+from core.application.menu_items.base import get_menu_items
+from core.application.menu_items import app, utils
+from core.application.menu_items.app import AddBookMenuItem, input_with_completion
+from core.application.menu_items.utils import completion, make_completer
+from core.domain.exceptions.books import BookYearNotNumericException
+from core.domain.values.books import Title, Author, Year
+from core.logic.commands.books import AddBookCommand
+from core.logic.mediator import Mediator
+
+
+def _drive(completer, text: str) -> list[str]:
+    """Вызывает completer так же, как readline: state = 0, 1, 2, ... до первого None"""
+    matches, state = [], 0
+    while (match := completer(text, state)) is not None:
+        matches.append(match)
+        state += 1
+    return matches
+
+
+def test_completer_returns_matches_by_state_until_none():
+    requests = []
+
+    def complete(text: str) -> list[str]:
+        requests.append(text)
+        return [f'{text}ов', f'{text}ин']
+
+    completer = make_completer(complete)
+
+    assert _drive(completer, 'Пушк') == ['Пушков', 'Пушкин']
+    assert _drive(completer, 'Лерм') == ['Лермов', 'Лермин']
+    # Варианты запрашиваются один раз на каждое нажатие Tab (state = 0)
+    assert requests == ['Пушк', 'Лерм']
+
+
+def test_completer_without_matches_returns_none():
+    assert _drive(make_completer(lambda text: []), 'абв') == []
+
+
+def test_completion_is_disabled_without_terminal(monkeypatch):
+    monkeypatch.setattr(utils.sys, 'stdin', io.StringIO())
+    if utils.readline is not None:
+        previous = utils.readline.get_completer()
+
+    with completion(lambda text: ['unused']):
+        if utils.readline is not None:
+            assert utils.readline.get_completer() is previous
+
+
+@pytest.fixture()
+def captured_completion(monkeypatch, container: Container) -> list:
+    """input_with_completion с контейнером теста. Каждый вызов input() дописывает варианты дополнения 'Мих'"""
+    monkeypatch.setattr(app, 'init_container', lambda: container)
+    completions = []
+    complete_functions = []
+
+    @contextmanager
+    def fake_completion(complete):
+        complete_functions.append(complete)
+        yield
+
+    def fake_input(*args) -> str:
+        completions.append(_drive(make_completer(complete_functions[-1]), 'Мих') if complete_functions else None)
+        complete_functions.clear()
+        return 'value'
+
+    monkeypatch.setattr(app, 'completion', fake_completion)
+    monkeypatch.setattr('builtins.input', fake_input)
+
+    return completions
+
+
+def test_input_with_completion_routes_field(captured_completion, mediator: Mediator):
+    mediator.handle_command(AddBookCommand('Михаил Строгов', 'Жюль Верн', '1876'))
+    mediator.handle_command(AddBookCommand('Тихий Дон', 'Михаил Шолохов', '1928'))
+
+    assert input_with_completion('author') == 'value'
+    assert input_with_completion('title') == 'value'
+    assert input_with_completion() == 'value'
+
+    assert captured_completion == [['Михаил Шолохов'], ['Михаил Строгов'], None]
+
+
+def test_add_book_menu_completes_title_and_author_only(captured_completion, mediator: Mediator):
+    mediator.handle_command(AddBookCommand('Михаил Строгов', 'Михаил Шолохов', '1928'))
+    assert AddBookMenuItem in get_menu_items()
+    menu_item = AddBookMenuItem()
+
+    menu_item._init_book_param(Title)
+    menu_item._init_book_param(Author)
+    # 'value' - некорректный год, важен только выбор поля для дополнения
+    with pytest.raises(BookYearNotNumericException):
+        menu_item._init_book_param(Year)
+
+    assert captured_completion == [['Михаил Строгов'], ['Михаил Шолохов'], None]
@@ -1,6 +1,11 @@
+from typing import Callable
+
+from faker import Faker
 from punq import Container
 from pytest import fixture
 
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
 from core.infra.repositories.base import BaseBooksRepository
 from core.logic.container import _init_container
 from core.logic.mediator import Mediator
@@ -19,3 +24,18 @@ def books_repository(container) -> BaseBooksRepository:
 @fixture()
 def mediator(container) -> Mediator:
     return container.resolve(Mediator)
+
+
+@fixture()
+def make_book() -> Callable[..., Book]:
+    """Фабрика книг со случайными названием и автором. Год случайный, если не задан"""
+    fake = Faker()
+
+    def make(year: str | None = None) -> Book:
+        return Book(
+            title=Title(fake.text(max_nb_chars=100)),
+            author=Author(fake.name()),
+            year=Year(year or fake.year()),
+        )
+
+    return make
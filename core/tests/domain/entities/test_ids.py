@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime, timezone, timedelta
+
+from core.domain.entities.books import Book
+from core.domain.entities.ids import (
+    uuid7,
+    oid_to_int,
+    int_to_oid,
+    oid_created_at,
+    set_oid_format,
+    is_time_ordered,
+)
+from core.domain.values.books import Title, Author, Year
+
+
+def test_uuid7_is_monotonic_and_sortable_as_string():
+    values = [uuid7() for _ in range(10000)]
+
+    assert all(value.version == 7 and value.variant == uuid.RFC_4122 for value in values)
+    assert [value.int for value in values] == sorted({value.int for value in values})
+    assert [str(value) for value in values] == sorted(str(value) for value in values)
+
+
+def test_oid_conversions():
+    oid = str(uuid7())
+    legacy_oid = str(uuid.uuid4())
+
+    assert int_to_oid(oid_to_int(oid)) == oid
+    assert int_to_oid(oid_to_int(legacy_oid)) == legacy_oid
+    assert oid_to_int('not-a-uuid') is None
+
+    assert is_time_ordered(oid_to_int(oid))
+    assert not is_time_ordered(oid_to_int(legacy_oid))
+
+    assert abs(oid_created_at(oid) - datetime.now(timezone.utc)) < timedelta(seconds=5)
+    assert oid_created_at(legacy_oid) is None
+
+
+def test_set_oid_format():
+    set_oid_format('uuid7')
+    try:
+        book = Book(title=Title('Книга'), author=Author('Автор'), year=Year('2000'))
+        assert uuid.UUID(book.oid).version == 7
+    finally:
+        set_oid_format('uuid4')
+
+    book = Book(title=Title('Книга'), author=Author('Автор'), year=Year('2000'))
+    assert uuid.UUID(book.oid).version == 4
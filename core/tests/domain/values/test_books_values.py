@@ -15,6 +15,7 @@ from core.domain.exceptions.books import (
     BookAuthorIsEmptyException
 )
 
+from core.domain.values.base import ValueObjectCache
 from core.domain.values.books import Title, Author, Year, Status
 
 
@@ -95,3 +96,28 @@ def test_status_empty_fail():
 def test_status_must_be_boolean_fail():
     with pytest.raises(BookStatusMustBeBooleanException):
         Status(1)
+
+
+def test_value_cache_shares_instances():
+    cache = ValueObjectCache(max_size=2)
+
+    author = cache.get(Author, 'Лев Толстой')
+    assert cache.get(Author, 'Лев Толстой') is author
+    assert isinstance(cache.get(Year, '2006'), Year)
+    assert isinstance(cache.get(Author, '2006'), Author)
+
+    # Самое давно использованное значение вытеснено
+    assert len(cache) == 2
+    assert cache.get(Author, 'Лев Толстой') is not author
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_value_cache_validates():
+    cache = ValueObjectCache()
+    cache.get(Status, True)
+
+    with pytest.raises(BookStatusMustBeBooleanException):
+        cache.get(Status, 1)
+
+    with pytest.raises(BookAuthorIsEmptyException):
+        cache.get(Author, '')
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from core.domain.values.books import Title, Status
+from core.infra.changes.books import ADDED, CLEARED, DELETED, UPDATED, ChangeFeed, tail_changes
+from core.infra.exceptions.books import BookVersionConflictException, ChangeFeedGapException
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.memory import InMemoryBooksRepository
+
+
+def test_repository_changes_are_numbered_in_commit_order(make_book):
+    feed = ChangeFeed()
+    repository = InMemoryBooksRepository()
+    repository.attach_feed(feed)
+
+    book = make_book()
+    repository.add_book(book)
+    book.status = Status(False)
+    repository.update_book(book)
+
+    repository.begin()
+    repository.delete_book(book.oid)
+    assert feed.last_sequence == 2
+    repository.rollback()
+
+    repository.begin()
+    repository.delete_book(book.oid)
+    repository.commit()
+    repository.clear()
+
+    changes = feed.read()
+    assert [(change.sequence, change.type) for change in changes] == [
+        (1, ADDED), (2, UPDATED), (3, DELETED), (4, CLEARED),
+    ]
+    assert changes[1].document['status'] is False
+    assert changes[2].oid == book.oid and changes[2].document is None
+    assert feed.read(after=2, limit=1) == [changes[2]]
+
+
+def test_write_behind_changes_reach_feed_after_flush(tmp_path, make_book):
+    path = str(tmp_path / 'books.json')
+    first, second = make_book(), make_book()
+    MemoryJsonBooksRepository(path).add_books([first, second])
+
+    feed = ChangeFeed()
+    ours, theirs = MemoryJsonBooksRepository(path, flush_every=None), MemoryJsonBooksRepository(path)
+    ours.attach_feed(feed)
+
+    for book in (ours.get_book_by_oid(first.oid), ours.get_book_by_oid(second.oid)):
+        book.status = Status(False)
+        ours.update_book(book)
+    assert feed.last_sequence == 0
+
+    theirs_copy = theirs.get_book_by_oid(first.oid)
+    theirs_copy.title = Title('Saved first')
+    theirs.update_book(theirs_copy)
+
+    with pytest.raises(BookVersionConflictException):
+        ours.flush()
+
+    # Изменение первой книги не сохранилось, поэтому в ленте только вторая
+    assert [(change.type, change.oid) for change in feed.read()] == [(UPDATED, second.oid)]
+
+
+def test_subscription_resumes_without_gaps():
+    feed = ChangeFeed()
+    feed.publish([(None, {'oid': 'a'}), (None, {'oid': 'b'})])
+
+    with feed.subscribe(after=1) as subscription:
+        feed.publish([({'oid': 'a'}, None)])
+
+        assert [subscription.get(timeout=1).sequence for _ in range(2)] == [2, 3]
+        assert subscription.get(timeout=0.01) is None
+
+    assert subscription.get() is None
+
+
+def test_lagging_subscription_is_closed_and_resumes():
+    feed = ChangeFeed()
+    subscription = feed.subscribe(max_pending=2)
+
+    feed.publish([(None, {'oid': 'a'}), (None, {'oid': 'b'})])
+    feed.publish([(None, {'oid': 'c'})])
+
+    # Запись не ждет потребителя: подписка закрыта, уже доставленные изменения дочитываются
+    assert subscription.overflowed
+    assert [change.oid for change in subscription] == ['a', 'b']
+
+    with feed.subscribe(after=2) as resumed:
+        assert resumed.get(timeout=1).oid == 'c'
+
+
+def test_file_feed_survives_restart_and_torn_tail(tmp_path):
+    path = str(tmp_path / 'books.changes')
+    feed = ChangeFeed(path, buffer_size=2)
+    feed.publish([(None, {'oid': str(number)}) for number in range(5)])
+    feed.close()
+
+    with open(path, 'ab') as file:
+        file.write(b'{"sequence": 6, "ty')
+
+    reopened = ChangeFeed(path, buffer_size=2)
+    assert reopened.last_sequence == 5
+    reopened.publish([(None, {'oid': '5'})])
+
+    assert [change.oid for change in reopened.read(after=3)] == ['3', '4', '5']
+    reopened.close()
+
+    with pytest.raises(ChangeFeedGapException):
+        memory_feed = ChangeFeed(buffer_size=2)
+        memory_feed.publish([(None, {'oid': str(number)}) for number in range(5)])
+        memory_feed.read(after=1)
+
+
+def test_tail_changes_follows_file(tmp_path):
+    path = str(tmp_path / 'books.changes')
+    feed = ChangeFeed(path)
+    feed.publish([(None, {'oid': 'a'}), (None, {'oid': 'b'})])
+
+    stop = threading.Event()
+    changes = tail_changes(path, after=1, poll_interval=0.01, stop=stop)
+
+    assert next(changes).oid == 'b'
+    feed.publish([({'oid': 'b'}, None)])
+    assert next(changes).type == DELETED
+
+    stop.set()
+    assert list(changes) == []
+    feed.close()
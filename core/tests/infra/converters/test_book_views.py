@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.converters.books import BookView, projection
+from core.infra.exceptions.books import BookFieldNotProjectedException, UnknownBookFieldException
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
+from core.infra.repositories.shared_memory import SharedMemoryCatalogPublisher, SharedMemoryBooksRepository
+
+
+DOCUMENT = {'oid': '1', 'title': 'Война и мир', 'author': 'Лев Толстой', 'year': '1869', 'status': True, 'version': 2}
+
+
+def test_view_is_lazy():
+    view = BookView(dict(DOCUMENT))
+
+    assert view._title is None
+    assert view.title == Title('Война и мир')
+    assert view._author is None
+    assert view.title is view.title
+    assert view.version == 2
+    assert view.to_book() == Book(
+        oid='1', title=Title('Война и мир'), author=Author('Лев Толстой'), year=Year('1869'), status=Status(True),
+    )
+
+
+def test_projection():
+    fields = projection(['title'])
+    view = BookView({'oid': '1', 'title': 'Война и мир'}, fields)
+
+    assert fields == {'oid', 'title'}
+    assert view.oid == '1'
+    assert view.title.as_generic_type() == 'Война и мир'
+
+    with pytest.raises(BookFieldNotProjectedException):
+        view.author
+
+    with pytest.raises(UnknownBookFieldException):
+        projection(['isbn'])
+
+
+BOOKS = [
+    Book(title=Title('Война и мир'), author=Author('Лев Толстой'), year=Year('1869')),
+    Book(title=Title('Анна Каренина'), author=Author('Лев Толстой'), year=Year('1877'), status=Status(False)),
+]
+
+
+@pytest.mark.parametrize('repository_factory', [
+    lambda tmp_path: MemoryJsonBooksRepository(str(tmp_path / 'books.json')),
+    lambda tmp_path: ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=2, max_workers=1),
+])
+def test_get_books_with_projection(tmp_path, repository_factory):
+    repository = repository_factory(tmp_path)
+    repository.add_books(BOOKS)
+
+    views = repository.get_books(BookFilters(author='толстой', status=False), fields=['title'])
+
+    assert [(view.oid, view.title.as_generic_type()) for view in views] == [(BOOKS[1].oid, 'Анна Каренина')]
+
+
+def test_shared_memory_projection():
+    publisher = SharedMemoryCatalogPublisher(f'books_{uuid.uuid4().hex[:8]}')
+    try:
+        publisher.publish(BOOKS)
+        repository = SharedMemoryBooksRepository(publisher.name)
+
+        views = repository.get_books(BookFilters(year='1869'), fields=['title', 'status'])
+
+        assert [(view.oid, view.title.as_generic_type(), view.status.as_generic_type()) for view in views] == [
+            (BOOKS[0].oid, 'Война и мир', True),
+        ]
+        assert views[0]._document.keys() == {'oid', 'title', 'status'}
+
+        repository.close()
+    finally:
+        publisher.close()
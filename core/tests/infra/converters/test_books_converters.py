@@ -11,7 +11,8 @@ def test_convert_document_to_book():
         'title': 'title',
         'author': 'author',
         'year': '2020',
-        'status': True
+        'status': True,
+        'version': 3
     }
 
     book = convert_document_to_book(document)
@@ -21,6 +22,7 @@ def test_convert_document_to_book():
     assert book.author.as_generic_type() == document['author']
     assert book.year.as_generic_type() == document['year']
     assert book.status.as_generic_type() == document['status']
+    assert book.version == document['version']
     assert document == convert_book_to_document(book)
 
 
@@ -34,4 +36,17 @@ def test_convert_book_to_document():
     assert document['author'] == book.author.as_generic_type()
     assert document['year'] == book.year.as_generic_type()
     assert document['status'] == book.status.as_generic_type()
+    assert document['version'] == book.version == 0
     assert book == convert_document_to_book(document)
+
+
+def test_convert_document_without_version_to_book():
+    document = {
+        'oid': '123',
+        'title': 'title',
+        'author': 'author',
+        'year': '2020',
+        'status': True
+    }
+
+    assert convert_document_to_book(document).version == 0
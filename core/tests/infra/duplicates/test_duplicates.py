@@ -0,0 +1,59 @@
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.duplicates.books import book_shingles, find_duplicates, minhash_signature
+from core.logic.commands.books import FindDuplicateBooksCommand
+from core.logic.mediator import Mediator
+
+
+BOOKS = [
+    ('1', 'Война и мир', 'Лев Толстой'),
+    ('2', 'Война и мир.', 'Л. Толстой'),
+    ('3', 'Война и миръ', 'Лев Толстой'),
+    ('4', 'Анна Каренина', 'Лев Толстой'),
+    ('5', 'Мастер и Маргарита', 'Михаил Булгаков'),
+    ('6', 'Мастер и маргарита', 'Михаил Булгаков'),
+    ('7', 'Преступление и наказание', 'Федор Достоевский'),
+]
+
+
+def test_signature_agreement_estimates_jaccard():
+    first, second = book_shingles('Война и мир', 'Лев Толстой'), book_shingles('Война и миръ', 'Лев Толстой')
+    jaccard = len(first & second) / len(first | second)
+
+    agreement = sum(
+        left == right for left, right in zip(minhash_signature(first, 256), minhash_signature(second, 256))
+    ) / 256
+
+    assert abs(agreement - jaccard) < 0.15
+    assert minhash_signature(first) == minhash_signature(set(first))
+
+
+def test_clusters_of_probable_duplicates():
+    clusters = find_duplicates(BOOKS, threshold=0.6)
+
+    assert [set(cluster.oids) for cluster in clusters] == [{'1', '2', '3'}, {'5', '6'}]
+    assert clusters[1].scores[0] == 1.0
+    assert all(cluster.similarity >= 0.6 for cluster in clusters)
+
+
+def test_chain_of_similar_books_is_not_one_cluster():
+    # Соседние тома похожи друг на друга, но первый и последний - уже нет
+    clusters = find_duplicates([
+        ('1', 'Война и мир', 'Лев Толстой'),
+        ('2', 'Война и мир, том первый', 'Лев Толстой'),
+        ('3', 'Война и мир, том первый. Часть вторая', 'Лев Толстой'),
+    ], threshold=0.7)
+
+    assert len(clusters) == 1
+    assert len(clusters[0].oids) == 2
+    assert all(score >= 0.7 for score in clusters[0].scores)
+
+def test_find_duplicate_books_command(mediator: Mediator, books_repository):
+    books_repository.add_books([
+        Book(title=Title(title), author=Author(author), year=Year('1869'), oid=oid) for oid, title, author in BOOKS
+    ])
+
+    clusters, *_ = mediator.handle_command(FindDuplicateBooksCommand(threshold=0.6, limit=1))
+
+    assert len(clusters) == 1
+    assert {book.oid for book, _ in clusters[0]} == {'1', '2', '3'}
@@ -0,0 +1,142 @@
+import random
+
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.exceptions.books import InvalidBookCursorException, UnknownBookFieldException
+from core.infra.filters.books import BookFilters
+from core.infra.filters.ordering import parse_order_by, order_documents, book_cursor, BookOrder
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
+from core.logic.commands.books import FindBookCommand
+from core.logic.mediator import Mediator
+
+
+def _documents(count: int) -> list[dict]:
+    rng = random.Random(7)
+    return [
+        {
+            'oid': f'{number:04d}',
+            'title': rng.choice(['Альфа', 'бета', 'Гамма']),
+            'author': rng.choice(['Автор', 'автор 2']),
+            'year': str(rng.randint(1990, 1995)),
+            'status': rng.random() < 0.5,
+        }
+        for number in range(count)
+    ]
+
+
+def _full_sort(documents: list[dict]) -> list[dict]:
+    # -year, title без учета регистра, затем oid
+    by_title = sorted(documents, key=lambda document: (document['title'].casefold(), document['oid']))
+    return sorted(by_title, key=lambda document: document['year'], reverse=True)
+
+
+def test_parse_order_by():
+    assert parse_order_by('-year, title') == (BookOrder('year', True), BookOrder('title'))
+    assert parse_order_by(['author']) == (BookOrder('author'),)
+    assert parse_order_by(None) == ()
+
+    with pytest.raises(UnknownBookFieldException):
+        parse_order_by('isbn')
+
+
+def test_order_and_top_k():
+    documents = _documents(200)
+    expected = _full_sort(documents)
+
+    assert order_documents(documents, '-year,title') == expected
+    assert order_documents(documents, '-year,title', limit=7) == expected[:7]
+    assert list(order_documents(documents, limit=3)) == documents[:3]
+
+
+def test_cursor_pages_are_stable_under_writes():
+    documents = _documents(50)
+    seen = []
+    after = None
+
+    while True:
+        page = order_documents(documents, '-year,title', limit=10, after=after)
+        if not page:
+            break
+        seen.extend(document['oid'] for document in page)
+        after = book_cursor(_as_book(page[-1]), '-year,title')
+
+        # Между страницами книги добавляются и удаляются: уже отданные не повторяются
+        documents = [document for document in documents if document['oid'] != page[0]['oid']]
+        documents.append({**documents[0], 'oid': f'new-{len(seen)}'})
+
+    assert len(seen) == len(set(seen))
+    # Удалялись только уже отданные книги, поэтому исходные книги отданы все
+    assert {document['oid'] for document in _documents(50)} <= set(seen)
+
+
+def _as_book(document: dict) -> Book:
+    return Book(
+        oid=document['oid'],
+        title=Title(document['title']),
+        author=Author(document['author']),
+        year=Year(document['year']),
+        status=Status(document['status']),
+    )
+
+
+def test_invalid_cursor():
+    cursor = book_cursor(_as_book(_documents(1)[0]), 'title')
+
+    with pytest.raises(InvalidBookCursorException):
+        order_documents(_documents(5), 'year', after=cursor)
+
+    with pytest.raises(InvalidBookCursorException):
+        order_documents(_documents(5), 'title', after='garbage')
+
+
+@pytest.mark.parametrize('repository_factory', [
+    lambda tmp_path: MemoryJsonBooksRepository(str(tmp_path / 'books.json')),
+    lambda tmp_path: ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=3, max_workers=1),
+])
+def test_repository_pagination(tmp_path, repository_factory):
+    repository = repository_factory(tmp_path)
+    books = [_as_book(document) for document in _documents(30)]
+    repository.add_books(books)
+
+    expected = [document['oid'] for document in _full_sort(_documents(30)) if document['status']]
+    filters = BookFilters(status=True)
+
+    first = repository.get_books(filters, order_by='-year,title', limit=5)
+    second = repository.get_books(
+        filters, fields=['title'], order_by='-year,title', limit=5, after=book_cursor(first[-1], '-year,title'),
+    )
+
+    assert [book.oid for book in first + second] == expected[:10]
+
+
+@pytest.mark.parametrize('repository_factory', [
+    lambda tmp_path: MemoryJsonBooksRepository(str(tmp_path / 'books.json')),
+    lambda tmp_path: ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=3, max_workers=1),
+])
+def test_repository_cursor_without_order(tmp_path, repository_factory):
+    repository = repository_factory(tmp_path)
+    books = [_as_book(document) for document in _documents(30)]
+    repository.add_books(books)
+
+    # Курсор без порядка означает порядок по oid по всему каталогу, а не внутри каждого шарда
+    rest = repository.get_books(after=book_cursor(books[9], None))
+
+    assert [book.oid for book in rest] == sorted(book.oid for book in books)[10:]
+
+
+def test_find_book_command_order(mediator: Mediator, books_repository):
+    books = [
+        Book(title=Title('Книга Б'), author=Author('Автор'), year=Year('2001')),
+        Book(title=Title('книга а'), author=Author('Автор'), year=Year('2001')),
+        Book(title=Title('Книга В'), author=Author('Автор'), year=Year('1999')),
+    ]
+    books_repository.add_books(books)
+
+    found, *_ = mediator.handle_command(FindBookCommand(author='автор', order_by='-year,title', limit=2))
+
+    assert [book.oid for book in found] == [books[1].oid, books[0].oid]
+
+    books_repository.clear()
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters, match_document
+from core.infra.filters.planner import QueryPlanner, INDEX_ACCESS, SCAN_ACCESS
+from core.infra.indexes.base import BaseBooksIndex
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+def _books(count: int) -> list[Book]:
+    rng = random.Random(3)
+    words = ['код', 'мир', 'война', 'алгоритмы', 'сеть', 'данные', 'история', 'море']
+    return [
+        Book(
+            title=Title(' '.join(rng.sample(words, 2)).capitalize() + f' {number}'),
+            author=Author(f'Автор {number % 50}'),
+            year=Year(str(1950 + number % 70)),
+            status=Status(number % 4 != 0),
+        )
+        for number in range(count)
+    ]
+
+
+@pytest.fixture()
+def repository(tmp_path) -> MemoryJsonBooksRepository:
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'), planner=QueryPlanner(seed=1))
+    repository.add_books(_books(3000))
+    repository.attach_index(BitmapIndex())
+    repository.attach_index(TrigramIndex())
+    return repository
+
+
+def test_predicates_from_most_selective(repository: MemoryJsonBooksRepository):
+    plan = repository.explain(BookFilters(status=True, year='2000', author='автор 1'))
+
+    assert [name for name, _ in plan.predicates] == ['year', 'author', 'status']
+    assert plan.actual_rows == repository.count_books(BookFilters(status=True, year='2000', author='автор 1'))
+
+
+def test_access_path_choice(repository: MemoryJsonBooksRepository):
+    # Редкий год: кандидатов из битовых карт намного меньше, чем книг
+    plan = repository.explain(BookFilters(year='2000'))
+    assert plan.access == INDEX_ACCESS
+    assert [type(index) for index in plan.indexes] == [BitmapIndex]
+    assert plan.actual_candidates == plan.actual_rows == 43
+    assert 'индексы BitmapIndex' in str(plan)
+
+    # Три четверти каталога: просмотр дешевле, чем доставать документы по oid
+    plan = repository.explain(BookFilters(status=True))
+    assert plan.access == SCAN_ACCESS
+    assert plan.actual_candidates == 3000
+
+
+class FixedIndex(BaseBooksIndex):
+    """Индекс с заранее заданными кандидатами"""
+
+    def __init__(self, oids: list[str]) -> None:
+        self.oids = oids
+
+    def add(self, document: dict) -> None:
+        ...
+
+    def remove(self, document: dict) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def estimate(self, filters: BookFilters) -> int | None:
+        return len(self.oids)
+
+    def candidates(self, filters: BookFilters) -> list[str] | None:
+        return self.oids
+
+
+def test_index_intersection():
+    documents = {
+        str(number): {'oid': str(number), 'title': '', 'author': 'автор', 'year': '2000', 'status': True}
+        for number in range(20000)
+    }
+    by_tens = FixedIndex([oid for oid in documents if int(oid) % 10 == 0])
+    by_hundreds = FixedIndex([oid for oid in documents if int(oid) // 10 % 10 == 0])
+    useless = FixedIndex(list(documents))
+
+    plan = QueryPlanner(seed=1).plan(BookFilters(author='автор'), documents, [useless, by_tens, by_hundreds])
+
+    # Каждый индекс отдает десятую часть каталога, а их пересечение - сотую
+    assert plan.access == INDEX_ACCESS
+    assert set(plan.indexes) == {by_tens, by_hundreds}
+    assert plan.estimated_candidates == 200
+    assert len(plan.candidate_oids()) == 200
+
+
+def test_planned_results_match_full_scan(repository: MemoryJsonBooksRepository):
+    documents = list(repository._read_view().values())
+    rng = random.Random(5)
+
+    for _ in range(50):
+        filters = BookFilters(
+            title=rng.choice([None, 'код', 'ода', 'Мир 1', 'я', 'сеть данные']),
+            author=rng.choice([None, 'автор 4', 'ВТОР']),
+            year=rng.choice([None, '1999', '2000', '1890']),
+            status=rng.choice([None, True, False]),
+        )
+        expected = sorted(document['oid'] for document in documents if match_document(document, filters))
+
+        assert sorted(book.oid for book in repository.get_books(filters)) == expected
+        assert repository.count_books(filters) == len(expected)
+
+
+def test_small_catalog_is_scanned(tmp_path):
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'))
+    repository.attach_index(BitmapIndex())
+    repository.add_books(_books(10))
+
+    plan = repository.explain(BookFilters(year='1950'))
+
+    assert plan.access == SCAN_ACCESS
+    assert plan.actual_rows == 1
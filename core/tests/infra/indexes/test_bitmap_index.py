@@ -0,0 +1,77 @@
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.bitmap import BitmapIndex, iter_bits
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+BOOKS = [
+    Book(title=Title('Хакеры. Полный Root'), author=Author('Александр Чубарьян'), year=Year('2006')),
+    Book(title=Title('Алгоритмы'), author=Author('Стивен Скиена'), year=Year('2011')),
+    Book(title=Title('Совершенный код'), author=Author('Стив Макконнелл'), year=Year('2006'), status=Status(False)),
+    Book(title=Title('Чистый код'), author=Author('Роберт Мартин'), year=Year('2006')),
+]
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b1011 | 1 << 70 | 1 << 1000)) == [0, 1, 3, 70, 1000]
+
+
+def _oids(books: list[Book]) -> list[str]:
+    return sorted(book.oid for book in books)
+
+
+@pytest.fixture()
+def repository(tmp_path) -> MemoryJsonBooksRepository:
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'))
+    repository.add_books(BOOKS[:3])
+    repository.attach_index(BitmapIndex())
+    return repository
+
+
+def test_filters_use_bitmaps(repository: MemoryJsonBooksRepository):
+    index, = repository.indexes
+
+    assert index.count(BookFilters(year='2006', status=True)) == 1
+    assert index.count(BookFilters(year='2006')) == 2
+    assert index.count(BookFilters(year='1999')) == 0
+    assert index.count(BookFilters(title='код')) is None
+    assert index.candidates(BookFilters(title='код')) is None
+
+    repository.add_book(BOOKS[3])
+    assert _oids(repository.get_books(BookFilters(year='2006', status=True))) == _oids([BOOKS[0], BOOKS[3]])
+    assert _oids(repository.iter_books(BookFilters(year='2006', title='код'))) == _oids([BOOKS[2], BOOKS[3]])
+
+    book = repository.get_book_by_oid(BOOKS[2].oid)
+    book.status = Status(True)
+    repository.update_book(book)
+    assert index.count(BookFilters(status=False)) == 0
+
+    repository.delete_book(BOOKS[0].oid)
+    assert _oids(repository.get_books(BookFilters(year='2006', status=True))) == _oids(BOOKS[2:])
+    assert index.count() == 3
+
+
+def test_rows_are_reused(repository: MemoryJsonBooksRepository):
+    index, = repository.indexes
+
+    repository.delete_book(BOOKS[1].oid)
+    repository.add_book(BOOKS[3])
+
+    assert len(index._oids) == 3
+    assert index.count(BookFilters(year='2011')) == 0
+    assert index.candidates(BookFilters(year='2006')) == [BOOKS[0].oid, BOOKS[3].oid, BOOKS[2].oid]
+
+
+def test_transaction_reads_skip_index(repository: MemoryJsonBooksRepository):
+    repository.begin()
+    repository.add_book(BOOKS[3])
+
+    assert len(repository.get_books(BookFilters(year='2006', status=True))) == 2
+
+    repository.rollback()
+
+    assert len(repository.get_books(BookFilters(year='2006', status=True))) == 1
@@ -0,0 +1,122 @@
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.filters.books import BookFilters, match_document
+from core.infra.indexes.fuzzy import TrigramIndex, normalize_text
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
+from core.logic.commands.books import FuzzyFindBookCommand
+from core.logic.mediator import Mediator
+
+
+def _book(title: str, author: str) -> Book:
+    return Book(title=Title(title), author=Author(author), year=Year('2000'))
+
+
+BOOKS = [
+    _book('Преступление и наказание', 'Фёдор Достоевский'),
+    _book('Братья Карамазовы', 'Фёдор Достоевский'),
+    _book('Война и мир', 'Лев Толстой'),
+    _book('Мастер и Маргарита', 'Михаил Булгаков'),
+]
+
+
+def test_normalize_text():
+    assert normalize_text('  Фёдор  Михайлович, ДОСТОЕВСКИЙ!') == 'федор михайлович достоевский'
+
+
+@pytest.mark.parametrize('repository_factory', [
+    lambda tmp_path: MemoryJsonBooksRepository(str(tmp_path / 'books.json')),
+    lambda tmp_path: ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=2, max_workers=1),
+])
+def test_index_follows_repository(tmp_path, repository_factory):
+    repository = repository_factory(tmp_path)
+    repository.add_books(BOOKS[:3])
+
+    index = TrigramIndex()
+    repository.attach_index(index)
+
+    matches = index.search('Достаевский', fields=['author'])
+    assert sorted(match.oid for match in matches) == sorted([BOOKS[0].oid, BOOKS[1].oid])
+    assert all(match.field == 'author' for match in matches)
+
+    repository.add_book(BOOKS[3])
+    assert index.search('Михаил Булкагов')[0].oid == BOOKS[3].oid
+
+    repository.delete_book(BOOKS[0].oid)
+    assert [match.oid for match in index.search('Достаевский')] == [BOOKS[1].oid]
+
+    repository.begin()
+    repository.delete_book(BOOKS[1].oid)
+    repository.rollback()
+    assert [match.oid for match in index.search('Достаевский')] == [BOOKS[1].oid]
+
+    repository.begin()
+    repository.delete_book(BOOKS[1].oid)
+    assert index.search('Достаевский')  # До commit индекс отражает последнее зафиксированное состояние
+    repository.commit()
+    assert index.search('Достаевский') == []
+
+    repository.clear()
+    assert len(index) == 0
+
+
+def test_ranking_and_limit():
+    index = TrigramIndex()
+    index.rebuild({
+        'oid': book.oid,
+        'title': book.title.as_generic_type(),
+        'author': book.author.as_generic_type(),
+    } for book in BOOKS)
+
+    matches = index.search('Война и мир', limit=1)
+    assert [match.oid for match in matches] == [BOOKS[2].oid]
+    assert matches[0].score == 1.0
+
+    assert index.search('zzz') == []
+    assert index.search('Маргарита', min_similarity=0.9) == []
+
+
+def test_removed_values_are_compacted():
+    index = TrigramIndex(fields=['author'])
+    documents = [{'oid': str(number), 'author': f'Автор {number}'} for number in range(20)]
+    index.rebuild(documents)
+
+    for document in documents[:15]:
+        index.remove(document)
+
+    assert len(index) == 5
+    assert [match.oid for match in index.search('Автор 17', limit=1)] == ['17']
+
+
+def test_fuzzy_find_book_command(mediator: Mediator, books_repository):
+    books_repository.add_books(BOOKS)
+
+    results, *_ = mediator.handle_command(FuzzyFindBookCommand('Толстый Лев', limit=3))
+
+    assert results[0][0] == BOOKS[2]
+    assert results[0][1] > 0.3
+
+    books_repository.clear()
+
+
+def test_substring_candidates():
+    index = TrigramIndex()
+    documents = [{'oid': book.oid, 'title': book.title.value, 'author': book.author.value} for book in BOOKS]
+    index.rebuild(documents)
+
+    for title, author in [('каза', None), ('Мастер и', 'булг'), ('рамазов', 'фёдор'), ('ор', None), (None, 'толстой')]:
+        filters = BookFilters(title=title, author=author)
+        candidates = index.candidates(filters)
+
+        if candidates is None:
+            # В подстроке нет ни одной триграммы
+            assert (title or '').strip() == 'ор'
+            continue
+
+        expected = {document['oid'] for document in documents if match_document(document, filters)}
+        assert expected <= set(candidates)
+        assert index.estimate(filters) >= len(expected)
+
+    assert index.candidates(BookFilters(title='квантовая')) == []
@@ -0,0 +1,95 @@
+import os
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.indexes.persistence import index_path
+from core.infra.indexes.prefix import PrefixIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+
+
+BOOKS = [
+    Book(title=Title('Преступление и наказание'), author=Author('Фёдор Достоевский'), year=Year('1866')),
+    Book(title=Title('Братья Карамазовы'), author=Author('Фёдор Достоевский'), year=Year('1880')),
+    Book(title=Title('Война и мир'), author=Author('Лев Толстой'), year=Year('1869'), status=Status(False)),
+]
+
+
+def _open(path: str) -> tuple[MemoryJsonBooksRepository, TrigramIndex, BitmapIndex, PrefixIndex]:
+    repository = MemoryJsonBooksRepository(path, persist_indexes=True)
+    indexes = TrigramIndex(), BitmapIndex(), PrefixIndex()
+    for index in indexes:
+        repository.attach_index(index)
+    return repository, *indexes
+
+
+def _forbid_rebuild(monkeypatch) -> None:
+    def rebuild(self, documents):
+        raise AssertionError('Индекс должен загрузиться из файла')
+
+    for index_type in (TrigramIndex, BitmapIndex, PrefixIndex):
+        monkeypatch.setattr(index_type, 'rebuild', rebuild)
+
+
+def test_indexes_load_from_files(tmp_path, monkeypatch):
+    path = str(tmp_path / 'books.json')
+    repository, *_ = _open(path)
+    repository.add_books(BOOKS)
+    repository.save_indexes()
+
+    for index_type in (TrigramIndex, BitmapIndex, PrefixIndex):
+        assert os.path.exists(index_path(path, index_type()))
+
+    _forbid_rebuild(monkeypatch)
+    repository, fuzzy, bitmap, prefix = _open(path)
+
+    assert fuzzy.search('Достаевский', fields=['author'])[0].oid in {BOOKS[0].oid, BOOKS[1].oid}
+    assert bitmap.count(BookFilters(status=False)) == 1
+    assert prefix.complete('фё', 'author') == ['Фёдор Достоевский']
+
+    # Загруженные индексы продолжают обновляться записями
+    repository.delete_book(BOOKS[2].oid)
+    assert bitmap.count(BookFilters(status=False)) == 0
+
+
+def test_stale_index_files_are_rebuilt(tmp_path):
+    path = str(tmp_path / 'books.json')
+    repository, *_ = _open(path)
+    repository.add_books(BOOKS[:2])
+    repository.save_indexes()
+
+    # Каталог изменился без сохранения индексов
+    MemoryJsonBooksRepository(path).add_book(BOOKS[2])
+
+    with open(index_path(path, PrefixIndex()), 'wb') as file:
+        file.write(b'not a pickle')
+
+    repository, fuzzy, bitmap, prefix = _open(path)
+
+    assert bitmap.count() == 3
+    assert [match.oid for match in fuzzy.search('Война и мир')][:1] == [BOOKS[2].oid]
+    assert prefix.complete('л', 'author') == ['Лев Толстой']
+
+
+def test_unsaved_changes_are_not_persisted(tmp_path):
+    path = str(tmp_path / 'books.json')
+    repository = MemoryJsonBooksRepository(path, flush_every=None, persist_indexes=True)
+    repository.attach_index(BitmapIndex())
+    repository.attach_index(BitmapIndex())
+    repository.add_books(BOOKS)
+
+    repository.begin()
+    repository.save_indexes()
+    repository.rollback()
+    assert not os.path.exists(index_path(path, BitmapIndex()))
+
+    # save_indexes сбрасывает отложенные записи, поэтому индексы соответствуют файлу каталога
+    repository.save_indexes()
+    assert os.path.exists(index_path(path, BitmapIndex(), 1))
+
+    reopened = MemoryJsonBooksRepository(path, persist_indexes=True)
+    index = BitmapIndex()
+    reopened.attach_index(index)
+    assert index.count(BookFilters(year='1869')) == 1
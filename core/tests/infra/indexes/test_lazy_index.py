@@ -0,0 +1,44 @@
+from faker import Faker
+from punq import Container
+
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.indexes.lazy import LazyIndex
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.indexes.prefix import PrefixIndex
+from core.infra.indexes.recency import RecencyIndex
+from core.infra.repositories.base import BaseBooksRepository
+from core.logic.commands.books import AddBookCommand, FuzzyFindBookCommand, CompleteBookFieldCommand
+from core.logic.mediator import Mediator
+
+INDEX_TYPES = (TrigramIndex, PrefixIndex, RecencyIndex, MerkleIndex)
+
+
+def _attached(repository: BaseBooksRepository) -> set[type]:
+    return {type(index) for index in repository.indexes}
+
+
+def test_mediator_does_not_build_indexes(container: Container, books_repository: BaseBooksRepository):
+    container.resolve(Mediator)
+
+    assert not _attached(books_repository) & set(INDEX_TYPES)
+    assert not any(container.resolve(LazyIndex[index_type]).built for index_type in INDEX_TYPES)
+
+
+def test_index_is_built_by_first_command_and_kept_up_to_date(
+        container: Container,
+        mediator: Mediator,
+        books_repository: BaseBooksRepository,
+):
+    mediator.handle_command(AddBookCommand('Мастер и Маргарита', 'Михаил Булгаков', '1967'))
+
+    (matches,) = mediator.handle_command(FuzzyFindBookCommand('Маргарита'))
+    assert [book.title.as_generic_type() for book, _ in matches] == ['Мастер и Маргарита']
+    assert TrigramIndex in _attached(books_repository)
+    assert PrefixIndex not in _attached(books_repository)
+
+    # Индекс строится один раз и дальше обновляется записями
+    mediator.handle_command(AddBookCommand(Faker().text(max_nb_chars=50), 'Михаил Шолохов', '1940'))
+    (completions,) = mediator.handle_command(CompleteBookFieldCommand('Михаил', 'author'))
+    assert completions == ['Михаил Булгаков', 'Михаил Шолохов']
+    assert container.resolve(TrigramIndex) is container.resolve(LazyIndex[TrigramIndex]).get()
+    assert sum(isinstance(index, TrigramIndex) for index in books_repository.indexes) == 1
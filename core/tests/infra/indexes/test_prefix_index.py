@@ -0,0 +1,49 @@
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.indexes.prefix import PrefixIndex
+from core.logic.commands.books import CompleteBookFieldCommand
+from core.logic.mediator import Mediator
+
+
+def _document(oid: str, title: str, author: str) -> dict:
+    return {'oid': oid, 'title': title, 'author': author}
+
+
+def test_complete_prefix():
+    index = PrefixIndex()
+    index.rebuild([
+        _document('1', 'Братья Карамазовы', 'Фёдор Достоевский'),
+        _document('2', 'Бесы', 'Фёдор Достоевский'),
+        _document('3', 'Белая гвардия', 'Михаил Булгаков'),
+        _document('4', 'Война и мир', 'Лев Толстой'),
+    ])
+
+    assert index.complete('б', 'title') == ['Белая гвардия', 'Бесы', 'Братья Карамазовы']
+    assert index.complete('Бе', 'title', limit=1) == ['Белая гвардия']
+    assert index.complete('федор', 'author') == ['Фёдор Достоевский']
+    assert index.complete('я', 'author') == []
+
+    index.add(_document('5', 'Ёлка', 'ФЁДОР ДОСТОЕВСКИЙ'))
+    index.remove(_document('1', 'Братья Карамазовы', 'Фёдор Достоевский'))
+    assert index.complete('бр', 'title') == []
+    assert index.complete('ел', 'title') == ['Ёлка']
+
+    index.remove(_document('2', 'Бесы', 'Фёдор Достоевский'))
+    assert index.complete('ф', 'author') == ['ФЁДОР ДОСТОЕВСКИЙ']
+
+    index.remove(_document('5', 'Ёлка', 'ФЁДОР ДОСТОЕВСКИЙ'))
+    assert index.complete('ф', 'author') == []
+
+
+def test_complete_book_field_command(mediator: Mediator, books_repository):
+    book = Book(title=Title('Мастер и Маргарита'), author=Author('Михаил Булгаков'), year=Year('1967'))
+    books_repository.add_book(book)
+
+    completions, *_ = mediator.handle_command(CompleteBookFieldCommand('миха'))
+    assert completions == ['Михаил Булгаков']
+
+    books_repository.add_book(Book(title=Title('Мастерская'), author=Author('Кто-то'), year=Year('2000')))
+    completions, *_ = mediator.handle_command(CompleteBookFieldCommand('мастер', field='title'))
+    assert completions == ['Мастер и Маргарита', 'Мастерская']
+
+    books_repository.clear()
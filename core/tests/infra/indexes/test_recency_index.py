@@ -0,0 +1,55 @@
+import time
+import uuid
+from datetime import datetime, timezone
+
+from core.domain.entities.books import Book
+from core.domain.entities.ids import new_time_ordered_oid
+from core.domain.values.books import Title, Author, Year
+from core.infra.indexes.recency import RecencyIndex
+from core.logic.commands.books import GetLatestBooksCommand
+from core.logic.mediator import Mediator
+
+
+def _document(oid: str) -> dict:
+    return {'oid': oid}
+
+
+def test_latest_and_since():
+    legacy = [str(uuid.uuid4()) for _ in range(3)]
+    first = [new_time_ordered_oid() for _ in range(3)]
+    time.sleep(0.002)
+    moment = datetime.now(timezone.utc)
+    second = [new_time_ordered_oid() for _ in range(2)]
+
+    index = RecencyIndex()
+    # Порядок поступления uuid7 не важен, uuid4 упорядочены по поступлению
+    index.rebuild(map(_document, [*legacy, *reversed(second), *first]))
+
+    assert index.latest(2) == second[::-1]
+    assert index.latest(7) == [*second[::-1], *first[::-1], legacy[2], legacy[1]]
+    assert index.latest(10, since=moment) == second[::-1]
+
+    newest = new_time_ordered_oid()
+    index.add(_document(newest))
+    index.remove(_document(second[1]))
+    index.remove(_document(legacy[2]))
+
+    assert index.latest(3) == [newest, second[0], first[2]]
+    assert index.latest(10)[-2:] == [legacy[1], legacy[0]]
+    assert len(index) == 7
+
+
+def test_get_latest_books_command(mediator: Mediator, books_repository):
+    books = [
+        Book(oid=new_time_ordered_oid(), title=Title(f'Книга {number}'), author=Author('Автор'), year=Year('2000'))
+        for number in range(5)
+    ]
+    books_repository.add_books(books[:3])
+    mediator.handle_command(GetLatestBooksCommand())  # Индекс строится при первом обращении
+    books_repository.add_books(books[3:])
+
+    latest, *_ = mediator.handle_command(GetLatestBooksCommand(limit=2))
+
+    assert latest == [books[4], books[3]]
+
+    books_repository.clear()
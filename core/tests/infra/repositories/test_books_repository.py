@@ -1,10 +1,15 @@
+import time
+
 import pytest
 from faker import Faker
 
 from core.domain.entities.books import Book
 from core.domain.values.books import Title, Author, Year, Status
+from core.infra.exceptions.books import BookVersionConflictException
 from core.infra.filters.books import BookFilters
+from core.infra.indexes.bitmap import BitmapIndex
 from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.books import MemoryJsonBooksRepository
 
 
 def test_add_book(
@@ -258,3 +263,141 @@ def test_get_books_many_filters(
     assert found_books[0].year.as_generic_type() == book.year.as_generic_type()
 
     books_repository.clear()
+
+
+def test_write_behind_coalesces_by_count(tmp_path):
+    path = str(tmp_path / 'books.json')
+    repository = MemoryJsonBooksRepository(path, flush_every=5)
+
+    books = [
+        Book(
+            title=Title(Faker().text(max_nb_chars=100)),
+            author=Author(Faker().name()),
+            year=Year(Faker().year()),
+        )
+        for _ in range(12)
+    ]
+    for book in books:
+        repository.add_book(book)
+
+    assert repository.metrics.logical_writes == 12
+    assert repository.metrics.physical_writes == 2
+    assert repository.dirty_oids == {books[10].oid, books[11].oid}
+    assert len(MemoryJsonBooksRepository(path).get_books()) == 10
+
+    repository.update_book(books[0])
+    repository.delete_book(books[1].oid)
+    repository.flush()
+
+    assert repository.metrics.physical_writes == 3
+    assert repository.metrics.absorbed == {5: 2, 4: 1}
+    assert not repository.dirty_oids
+    assert len(MemoryJsonBooksRepository(path).get_books()) == 11
+
+
+def test_write_behind_flushes_after_delay(tmp_path):
+    path = str(tmp_path / 'books.json')
+    repository = MemoryJsonBooksRepository(path, flush_delay=0.05, flush_every=None)
+
+    book = Book(
+        title=Title(Faker().text(max_nb_chars=100)),
+        author=Author(Faker().name()),
+        year=Year(Faker().year()),
+    )
+    repository.add_book(book)
+    repository.update_book(book)
+
+    assert not MemoryJsonBooksRepository(path).get_books()
+
+    time.sleep(0.2)
+
+    assert MemoryJsonBooksRepository(path).get_books() == [book]
+    assert repository.metrics.absorbed == {2: 1}
+
+
+def test_update_book_version_conflict(
+        books_repository: BaseBooksRepository
+):
+    book = Book(
+        title=Title(Faker().text(max_nb_chars=100)),
+        author=Author(Faker().name()),
+        year=Year(Faker().year()),
+    )
+    books_repository.add_book(book)
+
+    first_reader = books_repository.get_book_by_oid(book.oid)
+    second_reader = books_repository.get_book_by_oid(book.oid)
+
+    first_reader.status = Status(False)
+    books_repository.update_book(first_reader)
+
+    assert first_reader.version == 1
+    assert books_repository.get_book_by_oid(book.oid).version == 1
+
+    second_reader.title = Title(Faker().text(max_nb_chars=100))
+    with pytest.raises(BookVersionConflictException):
+        books_repository.update_book(second_reader)
+
+    stored_book = books_repository.get_book_by_oid(book.oid)
+
+    assert stored_book.status.as_generic_type() is False
+    assert stored_book.title == book.title
+
+    books_repository.clear()
+
+
+def test_count_and_exists_without_books(tmp_path, monkeypatch):
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'))
+    repository.attach_index(BitmapIndex())
+    repository.add_books([
+        Book(title=Title('Совершенный код'), author=Author('Стив Макконнелл'), year=Year('2004')),
+        Book(title=Title('Код'), author=Author('Чарльз Петцольд'), year=Year('2004'), status=Status(False)),
+        Book(title=Title('Чистый код'), author=Author('Роберт Мартин'), year=Year('2008')),
+    ])
+
+    # Подсчет и проверка существования не создают книги
+    monkeypatch.setattr('core.infra.repositories.books.convert_document_to_book', None)
+
+    assert repository.count_books() == 3
+    assert repository.count_books(BookFilters(year='2004')) == 2
+    assert repository.count_books(BookFilters(year='2004', status=True)) == 1
+    assert repository.count_books(BookFilters(title='код', status=False)) == 1
+    assert repository.count_books(BookFilters(author='мартин')) == 1
+    assert repository.exists(BookFilters(author='петцольд', year='2004'))
+    assert not repository.exists(BookFilters(year='1999'))
+
+    # Внутри транзакции видны ее незафиксированные изменения
+    repository.begin()
+    repository.clear()
+    assert repository.count_books(BookFilters(year='2004')) == 0
+    assert not repository.exists()
+    repository.rollback()
+
+    assert repository.exists()
+
+
+def test_writes_do_not_copy_catalog(tmp_path, monkeypatch):
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'), flush_every=None)
+    books = [
+        Book(title=Title(f'Книга {index}'), author=Author('Автор'), year=Year('2006'))
+        for index in range(200)
+    ]
+    repository.add_books(books)
+
+    copies = []
+    publish = repository._publish
+    monkeypatch.setattr(repository, '_publish', lambda: (copies.append(1), publish()))
+
+    # Запись публикует только свои документы, каталог копируется, когда их набралось больше, чем книг
+    for book in books:
+        repository.update_book(book)
+    assert not copies
+
+    snapshot = repository._read_view()
+    assert repository._read_view() is snapshot
+    assert {book.version for book in repository.get_books()} == {1}
+
+    for book in books:
+        repository.update_book(book)
+    assert len(copies) == 1
+    assert {book.version for book in repository.get_books()} == {2}
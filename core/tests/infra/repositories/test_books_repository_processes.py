@@ -0,0 +1,91 @@
+import multiprocessing
+
+import pytest
+
+from core.domain.values.books import Title, Status
+from core.infra.exceptions.books import BookVersionConflictException
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
+
+
+def _toggle_status(repository, oid: str, updates: int) -> int:
+    """Библиотекарь в отдельном процессе: читает книгу, меняет и записывает, повторяя при конфликте версий"""
+    conflicts = 0
+    for _ in range(updates):
+        while True:
+            book = repository.get_book_by_oid(oid)
+            book.status = Status(not book.status.as_generic_type())
+            try:
+                repository.update_book(book)
+                break
+            except BookVersionConflictException:
+                conflicts += 1
+
+    return conflicts
+
+
+def _json_librarian(path: str, oid: str, updates: int) -> int:
+    return _toggle_status(MemoryJsonBooksRepository(path), oid, updates)
+
+
+def _sharded_librarian(directory: str, oid: str, updates: int) -> int:
+    return _toggle_status(ShardedJsonBooksRepository(directory, max_workers=1), oid, updates)
+
+
+@pytest.mark.parametrize('librarian', [_json_librarian, _sharded_librarian])
+def test_librarians_in_separate_processes_do_not_lose_updates(tmp_path, librarian, make_book):
+    if librarian is _json_librarian:
+        location = str(tmp_path / 'books.json')
+        repository = MemoryJsonBooksRepository(location)
+    else:
+        location = str(tmp_path / 'shards')
+        repository = ShardedJsonBooksRepository(location, shard_count=2, max_workers=1)
+    book = make_book()
+    repository.add_book(book)
+    processes, updates = 4, 25
+
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        pool.starmap(librarian, [(location, book.oid, updates)] * processes)
+
+    # Каждая успешная условная запись увеличила версию на 1, ни одна не затерла другую
+    assert repository.get_book_by_oid(book.oid).version == processes * updates
+
+
+def test_write_behind_reports_book_saved_by_another_process(tmp_path, make_book):
+    path = str(tmp_path / 'books.json')
+    first, second = make_book(), make_book()
+    MemoryJsonBooksRepository(path).add_books([first, second])
+
+    # Отдельные репозитории на одном файле ведут себя как разные процессы
+    ours = MemoryJsonBooksRepository(path, flush_every=None)
+    theirs = MemoryJsonBooksRepository(path)
+
+    for book in (ours.get_book_by_oid(first.oid), ours.get_book_by_oid(second.oid)):
+        book.status = Status(False)
+        ours.update_book(book)
+
+    theirs_copy = theirs.get_book_by_oid(first.oid)
+    theirs_copy.title = Title('Saved first')
+    theirs.update_book(theirs_copy)
+
+    with pytest.raises(BookVersionConflictException):
+        ours.flush()
+
+    stored = MemoryJsonBooksRepository(path)
+    assert stored.get_book_by_oid(first.oid).title.as_generic_type() == 'Saved first'
+    assert stored.get_book_by_oid(first.oid).status.as_generic_type() is True
+    assert stored.get_book_by_oid(second.oid).status.as_generic_type() is False
+    assert ours.get_book_by_oid(first.oid) == stored.get_book_by_oid(first.oid)
+
+
+def test_write_picks_up_changes_saved_by_another_process(tmp_path, make_book):
+    path = str(tmp_path / 'books.json')
+    ours, theirs = MemoryJsonBooksRepository(path, flush_every=None), MemoryJsonBooksRepository(path)
+    mine, their_book = make_book(), make_book()
+
+    ours.add_book(mine)
+    theirs.add_book(their_book)
+    ours.flush()
+
+    stored = MemoryJsonBooksRepository(path)
+    assert {book.oid for book in stored.get_books()} == {mine.oid, their_book.oid}
@@ -0,0 +1,134 @@
+import threading
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.filters.books import BookFilters
+from core.infra.filters.planner import INDEX_ACCESS
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.logic.unit_of_work import UnitOfWork
+
+
+def _run_threads(targets: list) -> list[BaseException]:
+    errors: list[BaseException] = []
+
+    def guarded(target):
+        try:
+            target()
+        except BaseException as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=guarded, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return errors
+
+
+def test_concurrent_writers_and_readers_stay_consistent(tmp_path, make_book):
+    path = str(tmp_path / 'books.json')
+    repository = MemoryJsonBooksRepository(path, flush_every=25)
+    writers, books_per_writer = 4, 50
+    writers_done = threading.Event()
+
+    def write():
+        for _ in range(books_per_writer):
+            repository.add_book(make_book())
+
+    def read():
+        seen = 0
+        while not writers_done.is_set():
+            count = len(repository.get_books())
+            assert count >= seen
+            seen = count
+
+    readers = [read for _ in range(3)]
+
+    def write_all():
+        try:
+            assert not _run_threads([write for _ in range(writers)])
+        finally:
+            writers_done.set()
+
+    assert not _run_threads([write_all, *readers])
+
+    repository.flush()
+
+    assert len(repository.get_books()) == writers * books_per_writer
+    assert len(MemoryJsonBooksRepository(path).get_books()) == writers * books_per_writer
+
+
+def test_readers_never_see_half_applied_transaction(tmp_path, make_book):
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'), flush_every=None)
+    first, second = make_book(), make_book()
+    repository.add_books([first, second])
+    toggles_done = threading.Event()
+
+    def toggle_pair():
+        try:
+            for _ in range(200):
+                with UnitOfWork(repository):
+                    for oid in (first.oid, second.oid):
+                        book = repository.get_book_by_oid(oid)
+                        book.status = Status(not book.status.as_generic_type())
+                        repository.update_book(book)
+        finally:
+            toggles_done.set()
+
+    def read():
+        while not toggles_done.is_set():
+            statuses = {book.oid: book.status.as_generic_type() for book in repository.get_books()}
+            assert statuses[first.oid] == statuses[second.oid]
+
+    assert not _run_threads([toggle_pair, read, read])
+    assert [book.version for book in repository.get_books()] == [200, 200]
+
+
+class _PausingTrigramIndex(TrigramIndex):
+    """Индекс, который после обновления ждет сигнала, пока писатель еще держит блокировку"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.updated, self.resume = threading.Event(), threading.Event()
+
+    def update(self, old_document: dict, new_document: dict) -> None:
+        super().update(old_document, new_document)
+        self.updated.set()
+        self.resume.wait(timeout=5)
+
+
+def test_index_reader_waits_for_snapshot_of_same_generation(tmp_path, make_book):
+    repository = MemoryJsonBooksRepository(str(tmp_path / 'books.json'), flush_every=None)
+    repository.add_books([make_book() for _ in range(200)])
+    book = Book(title=Title('Alpha'), author=Author('Somebody'), year=Year('2000'))
+    repository.add_book(book)
+    index = _PausingTrigramIndex()
+    repository.attach_index(index)
+    assert repository.explain(BookFilters(title='omega')).access == INDEX_ACCESS
+
+    found: dict[str, int] = {}
+
+    def rename():
+        renamed = repository.get_book_by_oid(book.oid)
+        renamed.title = Title('Omega')
+        repository.update_book(renamed)
+
+    def read():
+        index.updated.wait(timeout=5)
+        # Индекс уже знает новое название, снимок еще нет: ответ должен соответствовать одному поколению
+        found['omega'] = len(repository.get_books(BookFilters(title='omega')))
+        found['alpha'] = len(repository.get_books(BookFilters(title='alpha')))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    writer = threading.Thread(target=rename)
+    writer.start()
+    index.updated.wait(timeout=5)
+    reader.join(timeout=0.2)
+    index.resume.set()
+    writer.join()
+    reader.join()
+
+    assert found == {'omega': 1, 'alpha': 0}
@@ -0,0 +1,143 @@
+import json
+import os
+
+import pytest
+from faker import Faker
+
+from core.infra.exceptions.books import InvalidCatalogIdException
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.pool import CatalogRepositoryPool, MEMORY_FACTOR
+from core.logic.commands.books import AddBookCommand, GetBooksCommand
+from core.logic.container import _init_container
+from core.logic.mediator import CatalogMediator, Mediator
+
+
+def _write_catalog(directory, catalog_id: str, size: int) -> None:
+    """Файл каталога примерно size байт, чтобы оценка памяти была предсказуемой"""
+    with open(os.path.join(directory, f'{catalog_id}.json'), 'w') as file:
+        json.dump({}, file)
+        file.write(' ' * (size - 2))
+
+
+def test_catalogs_are_opened_on_demand_and_isolated(tmp_path, make_book):
+    pool = CatalogRepositoryPool(str(tmp_path))
+    book = make_book()
+
+    with pool.lease('first') as repository:
+        repository.add_book(book)
+
+    with pool.lease('second') as repository:
+        assert repository.get_books() == []
+
+    with pool.lease('first') as repository:
+        assert repository.get_books() == [book]
+
+    assert pool.stats.opened == 2
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.json')) == ['first.json', 'second.json']
+
+
+def test_invalid_catalog_id_fails(tmp_path):
+    pool = CatalogRepositoryPool(str(tmp_path))
+
+    for catalog_id in ('../books', '', 'a' * 65, 'with space'):
+        with pytest.raises(InvalidCatalogIdException):
+            with pool.lease(catalog_id):
+                pass
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_catalog_is_evicted(tmp_path):
+    for catalog_id in ('a', 'b', 'c'):
+        _write_catalog(tmp_path, catalog_id, 1000)
+    pool = CatalogRepositoryPool(str(tmp_path), memory_budget=2 * 1000 * MEMORY_FACTOR)
+    evicted = []
+    pool.on_evict(lambda catalog_id, repository: evicted.append(catalog_id))
+
+    for catalog_id in ('a', 'b', 'a', 'c'):
+        with pool.lease(catalog_id):
+            pass
+
+    assert evicted == ['b']
+    assert pool.is_open('a') and pool.is_open('c') and not pool.is_open('b')
+    assert pool.stats.evictions == 1
+    assert pool.stats.resident_bytes <= pool.memory_budget
+
+
+def test_leased_catalog_is_not_evicted(tmp_path, make_book):
+    for catalog_id in ('a', 'b'):
+        _write_catalog(tmp_path, catalog_id, 1000)
+    pool = CatalogRepositoryPool(str(tmp_path), memory_budget=1000 * MEMORY_FACTOR)
+
+    with pool.lease('a') as first:
+        with pool.lease('b'):
+            # Бюджет превышен, но оба каталога используются
+            assert pool.stats.open_catalogs == 2
+        assert not pool.is_open('b')
+
+        first.add_book(make_book())
+        assert pool.is_open('a')
+
+
+def test_attached_indexes_count_towards_catalog_memory(tmp_path, make_book):
+    pool = CatalogRepositoryPool(str(tmp_path))
+    with pool.lease('library') as repository:
+        repository.add_books([make_book() for _ in range(50)])
+    documents_bytes = os.path.getsize(tmp_path / 'library.json') * MEMORY_FACTOR
+    assert pool.stats.resident_bytes == documents_bytes
+
+    index = TrigramIndex()
+    with pool.lease('library') as repository:
+        # Так подключается индекс, который строится при первой команде, которой он нужен
+        repository.attach_index(index)
+    assert pool.stats.resident_bytes == documents_bytes + index.memory_size()
+
+    pool.memory_budget = documents_bytes + 1
+    with pool.lease('library'):
+        pass
+    assert not pool.is_open('library')
+
+
+def test_evicted_catalog_flushes_pending_writes(tmp_path, make_book):
+    pool = CatalogRepositoryPool(
+        str(tmp_path),
+        memory_budget=0,
+        open_repository=lambda path: MemoryJsonBooksRepository(path, flush_every=None),
+    )
+    book = make_book()
+
+    with pool.lease('library') as repository:
+        repository.add_book(book)
+        assert repository.dirty_oids
+
+    assert not pool.is_open('library')
+    assert MemoryJsonBooksRepository(str(tmp_path / 'library.json')).get_book_by_oid(book.oid) == book
+
+
+def test_catalog_mediator_routes_commands_by_catalog_id(tmp_path):
+    pool = CatalogRepositoryPool(str(tmp_path), memory_budget=0)
+    mediator = CatalogMediator(
+        pool=pool,
+        mediator_factory=lambda repository: _init_container(True, books_repository=repository).resolve(Mediator),
+    )
+
+    mediator.handle_command('first', AddBookCommand(Faker().text(max_nb_chars=100), Faker().name(), Faker().year()))
+    (first_books,) = mediator.handle_command('first', GetBooksCommand())
+    (second_books,) = mediator.handle_command('second', GetBooksCommand())
+
+    assert len(first_books) == 1
+    assert second_books == []
+    # Каталоги закрывались после каждой команды, и Mediator закрытых каталогов забыт
+    assert pool.stats.opened == 3
+    assert not mediator._mediators
+
+
+def test_container_registers_catalog_mediator(container):
+    mediator = container.resolve(CatalogMediator)
+
+    mediator.handle_command('library', AddBookCommand(Faker().text(max_nb_chars=100), Faker().name(), Faker().year()))
+    (books,) = mediator.handle_command('library', GetBooksCommand())
+
+    assert len(books) == 1
+    assert container.resolve(CatalogRepositoryPool) is mediator.pool
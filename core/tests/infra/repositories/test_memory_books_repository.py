@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from core.infra.exceptions.books import BookNotFoundException
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.memory import InMemoryBooksRepository
+
+
+def test_repositories_do_not_share_catalog_or_touch_disk(tmp_path, monkeypatch, make_book):
+    monkeypatch.chdir(tmp_path)
+
+    registered = []
+    monkeypatch.setattr('atexit.register', lambda *args: registered.append(args))
+
+    first, second = InMemoryBooksRepository(), InMemoryBooksRepository()
+    book = make_book()
+    first.add_book(book)
+    first.flush()
+
+    assert first.get_book_by_oid(book.oid) == book
+    with pytest.raises(BookNotFoundException):
+        second.get_book_by_oid(book.oid)
+    assert not os.listdir(tmp_path)
+    # Каталогу без файла нечего сохранять при выходе интерпретатора
+    assert not registered
+
+
+def test_rollback_restores_catalog(make_book):
+    repository = InMemoryBooksRepository()
+    book = make_book()
+    repository.add_book(book)
+
+    repository.begin()
+    repository.delete_book(book.oid)
+    repository.add_book(make_book())
+    repository.rollback()
+
+    assert repository.get_books() == [book]
+
+
+def test_test_container_uses_in_memory_repository(books_repository: BaseBooksRepository):
+    assert isinstance(books_repository, InMemoryBooksRepository)
@@ -0,0 +1,233 @@
+import os
+import threading
+from dataclasses import replace
+
+import pytest
+
+from core.domain.values.books import Title, Status
+from core.infra.converters.books import convert_book_to_document
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    BookVersionConflictException,
+    CorruptedRecordException,
+    TransactionRolledBackException,
+)
+from core.infra.filters.books import BookFilters
+from core.infra.indexes.bitmap import BitmapIndex
+from core.infra.indexes.fuzzy import TrigramIndex
+from core.infra.repositories.records import RecordStoreBooksRepository, document_size
+
+
+@pytest.fixture()
+def records_path(tmp_path) -> str:
+    return str(tmp_path / 'books.records')
+
+
+@pytest.fixture()
+def record_repository(records_path) -> RecordStoreBooksRepository:
+    repository = RecordStoreBooksRepository(records_path)
+    yield repository
+    repository.close()
+
+
+def test_point_operations_and_reopen(
+        record_repository: RecordStoreBooksRepository,
+        records_path: str,
+        make_book,
+):
+    books = [make_book() for _ in range(10)]
+    record_repository.add_books(books)
+
+    books[0].status = Status(False)
+    record_repository.update_book(books[0])
+    record_repository.delete_book(books[1].oid)
+
+    with pytest.raises(BookNotFoundException):
+        record_repository.get_book_by_oid(books[1].oid)
+    with pytest.raises(BookVersionConflictException):
+        record_repository.update_book(replace(books[0], version=books[0].version - 1))
+
+    reopened = RecordStoreBooksRepository(records_path)
+    try:
+        assert reopened.count_books() == 9
+        assert reopened.get_book_by_oid(books[0].oid).status.value is False
+        assert {book.oid for book in reopened.get_books()} == {book.oid for book in books[2:]} | {books[0].oid}
+    finally:
+        reopened.close()
+
+
+def test_cache_stays_within_budget(records_path: str, make_book):
+    books = [make_book() for _ in range(50)]
+    budget = 10 * max(document_size(convert_book_to_document(book)) for book in books)
+    repository = RecordStoreBooksRepository(records_path, memory_budget=budget)
+    try:
+        repository.add_books(books)
+        for book in books:
+            repository.get_book_by_oid(book.oid)
+        repository.get_book_by_oid(books[-1].oid)
+
+        stats = repository.cache_stats
+        assert stats.resident_bytes <= budget
+        assert stats.evictions > 0
+        assert stats.stored_records == 50
+        assert stats.hits >= 1
+        assert 0 < stats.hit_ratio < 1
+    finally:
+        repository.close()
+
+
+def test_scan_does_not_touch_cache(record_repository: RecordStoreBooksRepository, make_book):
+    record_repository.add_books([make_book() for _ in range(20)])
+    record_repository._cache.clear()
+
+    assert len(record_repository.get_books()) == 20
+    assert record_repository.count_books(BookFilters(year='0999')) == 0
+
+    stats = record_repository.cache_stats
+    assert stats.resident_records == 0
+    assert stats.hits == stats.misses == 0
+
+
+def test_scan_sees_catalog_at_start(record_repository: RecordStoreBooksRepository, make_book):
+    books = [make_book() for _ in range(5)]
+    record_repository.add_books(books)
+
+    scan = record_repository.iter_books()
+    first = next(scan)
+
+    later = make_book()
+    record_repository.add_book(later)
+    for book in books:
+        if book.oid != first.oid:
+            book.status = Status(False)
+            record_repository.update_book(book)
+
+    rest = list(scan)
+    assert {book.oid for book in rest} | {first.oid} == {book.oid for book in books}
+    assert all(book.status.value for book in rest)
+
+
+def test_transaction_rollback_and_commit(record_repository: RecordStoreBooksRepository, make_book):
+    book = make_book()
+    record_repository.add_book(book)
+
+    record_repository.begin()
+    record_repository.delete_book(book.oid)
+    assert not record_repository.exists()
+    record_repository.rollback()
+
+    assert record_repository.exists()
+
+    record_repository.begin()
+    record_repository.clear()
+    record_repository.add_book(make_book())
+    record_repository.commit()
+
+    assert record_repository.count_books() == 1
+
+
+def test_nested_rollback_prevents_partial_commit(record_repository: RecordStoreBooksRepository, make_book):
+    book = make_book()
+    record_repository.add_book(book)
+
+    record_repository.begin()
+    record_repository.delete_book(book.oid)
+    record_repository.begin()
+    record_repository.rollback()
+    record_repository.add_book(make_book())
+
+    with pytest.raises(TransactionRolledBackException):
+        record_repository.commit()
+
+    assert [stored.oid for stored in record_repository.get_books()] == [book.oid]
+
+
+def test_reads_do_not_wait_for_open_transaction(record_repository: RecordStoreBooksRepository, make_book):
+    book = make_book()
+    record_repository.add_book(book)
+    found = {}
+
+    def read():
+        found['book'] = record_repository.get_book_by_oid(book.oid)
+        found['count'] = len(record_repository.get_books())
+
+    record_repository.begin()
+    try:
+        record_repository.delete_book(book.oid)
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=5)
+        # Другой поток видит последнее зафиксированное состояние, не дожидаясь commit
+        assert not reader.is_alive()
+        assert found == {'book': book, 'count': 1}
+    finally:
+        record_repository.commit()
+
+    assert not record_repository.exists()
+
+
+def test_truncated_tail_is_ignored(record_repository: RecordStoreBooksRepository, records_path: str, make_book):
+    book = make_book()
+    record_repository.add_book(book)
+    record_repository.close()
+
+    with open(records_path, 'ab') as file:
+        file.write(b'{"oid": "broken", "ti')
+
+    reopened = RecordStoreBooksRepository(records_path)
+    try:
+        assert [stored.oid for stored in reopened.get_books()] == [book.oid]
+        reopened.add_book(make_book())
+        assert reopened.count_books() == 2
+    finally:
+        reopened.close()
+
+
+def test_compaction_keeps_live_records(record_repository: RecordStoreBooksRepository, monkeypatch, make_book):
+    monkeypatch.setattr('core.infra.repositories.records._COMPACT_MIN_BYTES', 0)
+
+    book = make_book()
+    record_repository.add_book(book)
+    for _ in range(10):
+        book.status = Status(not book.status.value)
+        record_repository.update_book(book)
+
+    with open(record_repository.path_to_file, 'rb') as file:
+        assert len(file.readlines()) <= 2
+    assert record_repository.get_book_by_oid(book.oid).version == book.version
+
+
+def test_index_counts(record_repository: RecordStoreBooksRepository, make_book):
+    record_repository.attach_index(BitmapIndex())
+    record_repository.add_books([make_book('2001') for _ in range(3)] + [make_book('2002')])
+
+    assert record_repository.count_books(BookFilters(year='2001')) == 3
+    assert record_repository.get_books(BookFilters(year='2002'), limit=1)[0].year.value == '2002'
+
+
+def test_duplicate_oid_in_batch_updates_index_once(record_repository: RecordStoreBooksRepository, make_book):
+    index = TrigramIndex()
+    record_repository.attach_index(index)
+    book = replace(make_book(), title=Title('Преступление и наказание'))
+    renamed = replace(book, title=Title('Братья Карамазовы'))
+
+    record_repository.add_books([book, renamed])
+
+    # Вторая копия заменяет первую из этого же пакета, и индекс забывает прежнее название
+    assert index.search('Преступление и наказание') == []
+    assert [match.oid for match in index.search('Братья Карамазовы')] == [book.oid]
+
+
+def test_corrupted_record_is_not_truncated(record_repository: RecordStoreBooksRepository, records_path: str, make_book):
+    first, second = make_book(), make_book()
+    record_repository.add_book(first)
+    with open(records_path, 'ab') as file:
+        file.write(b'{"oid": "broken", "ti\n')
+    record_repository.add_book(second)
+    record_repository.close()
+    size = os.path.getsize(records_path)
+
+    # Записи после поврежденной не отбрасываются вместе с ней
+    with pytest.raises(CorruptedRecordException):
+        RecordStoreBooksRepository(records_path)
+    assert os.path.getsize(records_path) == size
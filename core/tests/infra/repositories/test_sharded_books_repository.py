@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    BookVersionConflictException,
+    ShardCountMismatchException,
+)
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.files import FileLock, write_json
+from core.infra.repositories.sharded import (
+    JOURNAL_DIRECTORY,
+    ShardedJsonBooksRepository,
+    _staged_path,
+    reshard_books_catalog,
+    shard_index,
+    shard_path,
+)
+
+
+@pytest.fixture()
+def sharded_repository(tmp_path) -> ShardedJsonBooksRepository:
+    repository = ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=4, max_workers=2)
+    yield repository
+    repository.close()
+
+
+def test_point_operations_touch_one_shard(
+        sharded_repository: ShardedJsonBooksRepository,
+        make_book
+):
+    book = make_book()
+    sharded_repository.add_book(book)
+
+    index = shard_index(book.oid, sharded_repository.shard_count)
+
+    for other in range(sharded_repository.shard_count):
+        with open(shard_path(sharded_repository.directory, other)) as file:
+            assert (book.oid in json.load(file)) == (other == index)
+
+    assert sharded_repository.get_book_by_oid(book.oid) == book
+
+    sharded_repository.delete_book(book.oid)
+
+    with pytest.raises(BookNotFoundException):
+        sharded_repository.get_book_by_oid(book.oid)
+
+
+def test_parallel_filtered_get_books(
+        sharded_repository: ShardedJsonBooksRepository,
+        make_book
+):
+    books = [make_book() for _ in range(20)]
+    sharded_repository.add_books(books)
+
+    assert len(sharded_repository.get_books()) == 20
+    assert len(list(sharded_repository.iter_books())) == 20
+
+    target = books[7]
+    found_books = sharded_repository.get_books(filters=BookFilters(
+        title=target.title.as_generic_type(),
+        author=target.author.as_generic_type(),
+    ))
+
+    assert found_books == [target]
+    assert sharded_repository.count_books() == 20
+    assert sharded_repository.count_books(BookFilters(author=target.author.as_generic_type())) >= 1
+    assert sharded_repository.exists(BookFilters(title=target.title.as_generic_type()))
+    assert not sharded_repository.exists(BookFilters(year='0999'))
+
+
+def test_reshard_catalog(tmp_path, make_book):
+    source = MemoryJsonBooksRepository(str(tmp_path / 'books.json'))
+    books = [make_book() for _ in range(15)]
+    source.add_books(books)
+
+    directory = str(tmp_path / 'shards')
+
+    assert reshard_books_catalog(str(tmp_path / 'books.json'), directory, 3) == 15
+    assert reshard_books_catalog(directory, directory, 5) == 15
+
+    with pytest.raises(ShardCountMismatchException):
+        ShardedJsonBooksRepository(directory, shard_count=3)
+
+    repository = ShardedJsonBooksRepository(directory, max_workers=1)
+
+    assert repository.shard_count == 5
+    assert sorted(book.oid for book in repository.get_books()) == sorted(book.oid for book in books)
+
+
+def _books_in_shards(repository: ShardedJsonBooksRepository, make_book) -> tuple[Book, Book, Book]:
+    """Две книги одного шарда и книга другого шарда"""
+    books = [make_book() for _ in range(50)]
+    first = books[0]
+    index = shard_index(first.oid, repository.shard_count)
+    same = next(book for book in books[1:] if shard_index(book.oid, repository.shard_count) == index)
+    other = next(book for book in books[1:] if shard_index(book.oid, repository.shard_count) != index)
+    return first, same, other
+
+
+def test_write_locks_only_its_shard(sharded_repository: ShardedJsonBooksRepository, make_book):
+    first, same, other = _books_in_shards(sharded_repository, make_book)
+    index = shard_index(first.oid, sharded_repository.shard_count)
+    written = threading.Event()
+
+    def write_same_shard():
+        sharded_repository.add_book(same)
+        written.set()
+
+    # Отдельный объект блокировки ведет себя как другой процесс, пишущий этот шард
+    with FileLock(f'{shard_path(sharded_repository.directory, index)}.lock'):
+        sharded_repository.add_book(other)
+        writer = threading.Thread(target=write_same_shard)
+        writer.start()
+        assert not written.wait(0.2)
+
+    writer.join()
+    assert sharded_repository.count_books() == 2
+
+
+def test_transaction_checks_versions_at_commit(tmp_path, make_book):
+    directory = str(tmp_path / 'shards')
+    ours = ShardedJsonBooksRepository(directory, shard_count=4, max_workers=1)
+    theirs = ShardedJsonBooksRepository(directory, max_workers=1)
+    first, same, other = _books_in_shards(ours, make_book)
+    ours.add_books([first, same, other])
+
+    ours.begin()
+    ours.delete_book(first.oid)
+    # Открытая транзакция не задерживает запись в тот же шард из другого процесса
+    theirs_copy = theirs.get_book_by_oid(same.oid)
+    theirs_copy.title = Title('Saved by theirs')
+    theirs.update_book(theirs_copy)
+    ours.commit()
+
+    assert sorted(book.oid for book in theirs.get_books()) == sorted([same.oid, other.oid])
+    assert theirs.get_book_by_oid(same.oid).title.value == 'Saved by theirs'
+
+    ours.begin()
+    ours.delete_book(other.oid)
+    ours_copy = ours.get_book_by_oid(same.oid)
+    ours_copy.title = Title('Saved by ours')
+    ours.update_book(ours_copy)
+    theirs.update_book(theirs.get_book_by_oid(same.oid))
+
+    with pytest.raises(BookVersionConflictException):
+        ours.commit()
+
+    # Конфликт отменяет всю транзакцию, в том числе запись в другой шард
+    assert sorted(book.oid for book in theirs.get_books()) == sorted([same.oid, other.oid])
+    assert theirs.get_book_by_oid(same.oid).title.value == 'Saved by theirs'
+
+
+def test_interrupted_transaction_is_completed_on_open(tmp_path, monkeypatch, make_book):
+    directory = str(tmp_path / 'shards')
+    repository = ShardedJsonBooksRepository(directory, shard_count=4, max_workers=1)
+    first, _, other = _books_in_shards(repository, make_book)
+    repository.add_books([first, other])
+
+    def crash(*args):
+        raise KeyboardInterrupt()
+
+    # Процесс падает после записи журнала, но до переноса файлов на место шардов
+    monkeypatch.setattr('core.infra.repositories.sharded._move_staged_shards', crash)
+    repository.begin()
+    repository.delete_book(first.oid)
+    repository.delete_book(other.oid)
+    with pytest.raises(KeyboardInterrupt):
+        repository.commit()
+    monkeypatch.undo()
+
+    assert len(repository.get_books()) == 2
+    assert not ShardedJsonBooksRepository(directory, max_workers=1).get_books()
+    assert os.listdir(os.path.join(directory, JOURNAL_DIRECTORY)) == []
+
+
+def test_uncommitted_staged_shard_is_discarded(tmp_path, make_book):
+    directory = str(tmp_path / 'shards')
+    repository = ShardedJsonBooksRepository(directory, shard_count=4, max_workers=1)
+    book = make_book()
+    repository.add_book(book)
+    index = shard_index(book.oid, repository.shard_count)
+
+    # Процесс упал, записав новый шард, но не журнал
+    write_json(_staged_path(directory, 'interrupted', index), {})
+
+    repository.update_book(book)
+
+    assert repository.get_book_by_oid(book.oid).version == 1
+    assert os.listdir(os.path.join(directory, JOURNAL_DIRECTORY)) == []
@@ -0,0 +1,110 @@
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year, Status
+from core.infra.exceptions.books import (
+    BookNotFoundException,
+    ReadOnlyRepositoryException,
+    SharedCatalogNotPublishedException,
+)
+from core.infra.filters.books import BookFilters
+from core.infra.repositories.shared_memory import SharedMemoryCatalogPublisher, SharedMemoryBooksRepository
+
+
+BOOKS = [
+    Book(title=Title('Хакеры. Полный Root'), author=Author('Александр Чубарьян'), year=Year('2006')),
+    Book(title=Title('Алгоритмы. Руководство по разработке'), author=Author('Стивен С. Скиена'), year=Year('2011')),
+    Book(title=Title('Совершенный код'), author=Author('Стив Макконнелл'), year=Year('2006'), status=Status(False)),
+    Book(title=Title('Old Book'), author=Author('Somebody'), year=Year('0999')),
+]
+
+
+@pytest.fixture()
+def publisher() -> SharedMemoryCatalogPublisher:
+    publisher = SharedMemoryCatalogPublisher(f'books_{uuid.uuid4().hex[:8]}')
+    yield publisher
+    publisher.close()
+
+
+def _count_in_child(name: str, year: str) -> int:
+    repository = SharedMemoryBooksRepository(name)
+    try:
+        return len(repository.get_books(BookFilters(year=year)))
+    finally:
+        repository.close()
+
+
+def test_read_published_catalog(publisher: SharedMemoryCatalogPublisher):
+    publisher.publish(BOOKS)
+    repository = SharedMemoryBooksRepository(publisher.name)
+
+    assert repository.get_books() == BOOKS
+    assert repository.get_book_by_oid(BOOKS[1].oid) == BOOKS[1]
+    assert repository.get_book_by_oid(BOOKS[3].oid).year.as_generic_type() == '0999'
+    assert repository.get_books(BookFilters(title='хакеры')) == [BOOKS[0]]
+    assert repository.get_books(BookFilters(author='сти')) == [BOOKS[1], BOOKS[2]]
+    assert repository.get_books(BookFilters(title='о', author='макконнелл', year='2006')) == [BOOKS[2]]
+    assert repository.get_books(BookFilters(year='2006', status=True)) == [BOOKS[0]]
+    assert repository.get_books(BookFilters(year='20')) == []
+    assert repository.count_books() == 4
+    assert repository.count_books(BookFilters(year='2006')) == 2
+    assert repository.exists(BookFilters(author='макконнелл', status=False))
+    assert not repository.exists(BookFilters(title='хакеры', year='2011'))
+
+    with pytest.raises(BookNotFoundException):
+        repository.get_book_by_oid('missing')
+
+    with pytest.raises(ReadOnlyRepositoryException):
+        repository.add_book(BOOKS[0])
+
+    repository.close()
+
+
+def test_reader_follows_generations(publisher: SharedMemoryCatalogPublisher):
+    publisher.publish(BOOKS[:1])
+    repository = SharedMemoryBooksRepository(publisher.name)
+
+    assert len(repository.get_books()) == 1
+
+    assert publisher.publish(BOOKS) == 2
+    assert repository.generation == 2
+    assert len(repository.get_books()) == 4
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(_count_in_child, publisher.name, '2006').result() == 2
+
+    repository.close()
+
+
+def test_empty_substring_matches_every_book(publisher: SharedMemoryCatalogPublisher):
+    publisher.publish(BOOKS)
+    repository = SharedMemoryBooksRepository(publisher.name)
+
+    assert repository.get_books(BookFilters(title='')) == BOOKS
+    assert repository.count_books(BookFilters(author='', year='2006')) == 2
+
+    repository.close()
+
+
+def test_view_in_use_is_not_released_on_new_generation(publisher: SharedMemoryCatalogPublisher):
+    publisher.publish(BOOKS[:1])
+    repository = SharedMemoryBooksRepository(publisher.name)
+
+    with repository._reading() as old_view:
+        publisher.publish(BOOKS)
+        # Другой поток переходит на новое поколение, пока этот еще читает старое
+        assert repository.count_books() == 4
+        assert old_view.retired
+        assert old_view.document(0)['oid'] == BOOKS[0].oid
+
+    assert not old_view.sections
+
+    repository.close()
+
+
+def test_not_published_fail():
+    with pytest.raises(SharedCatalogNotPublishedException):
+        SharedMemoryBooksRepository(f'books_{uuid.uuid4().hex[:8]}')
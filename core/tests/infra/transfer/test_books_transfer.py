@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from faker import Faker
+
+from core.domain.entities.books import Book
+from core.domain.values.books import Title, Author, Year
+from core.infra.exceptions.books import UnsupportedBooksFileFormatException
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.transfer.books import import_books, export_books, validate_rows
+
+
+def test_validate_rows():
+    books, rejected = validate_rows([
+        (2, {'Title': 'Хакеры. Полный Root', 'Author': 'Александр Чубарьян', 'Year': '2006'}),
+        (3, {'Title': 'a', 'Author': 'Автор', 'Year': '2006'}),
+        (4, {'title': 'Title', 'author': 'Author', 'year': 'abcd', 'status': 'false'}),
+        (5, {'Title': 'Title', 'Author': 'Author', 'Year': '2001', 'Status': 'False'}),
+    ])
+
+    assert len(books) == 2
+    assert books[0].title.as_generic_type() == 'Хакеры. Полный Root'
+    assert books[1].status.as_generic_type() is False
+    assert [row.line for row in rejected] == [3, 4]
+    assert 'at least 3 characters' in rejected[0].reason
+    assert 'numeric' in rejected[1].reason
+
+
+def test_import_books_csv(
+        books_repository: BaseBooksRepository,
+        tmp_path
+):
+    source = tmp_path / 'books.csv'
+    errors = tmp_path / 'errors.jsonl'
+
+    rows = ['Title,Author,Year']
+    rows += [f'{Faker().text(max_nb_chars=50)},{Faker().name()},{Faker().year()}'.replace('\n', ' ') for _ in range(25)]
+    rows += ['No year,Some Author,', 'ab,Some Author,2001']
+    source.write_text('\n'.join(rows) + '\n', encoding='utf-8')
+
+    report = import_books(books_repository, str(source), str(errors), chunk_size=4, max_workers=2)
+
+    assert report.imported == 25
+    assert report.rejected == 2
+    assert report.chunks == 7
+    assert len(books_repository.get_books()) == 25
+
+    rejected = [json.loads(line) for line in errors.read_text(encoding='utf-8').splitlines()]
+
+    assert [row['line'] for row in rejected] == [27, 28]
+    assert rejected[0]['row']['Title'] == 'No year'
+
+    books_repository.clear()
+
+
+def test_export_and_import_jsonl(
+        books_repository: BaseBooksRepository,
+        tmp_path
+):
+    books = [
+        Book(
+            title=Title(Faker().text(max_nb_chars=100)),
+            author=Author(Faker().name()),
+            year=Year(Faker().year()),
+        )
+        for _ in range(10)
+    ]
+    books_repository.add_books(books)
+
+    target = tmp_path / 'books.jsonl'
+
+    assert export_books(books_repository, str(target)) == 10
+
+    books_repository.clear()
+
+    report = import_books(books_repository, str(target), str(tmp_path / 'errors.jsonl'), chunk_size=3, max_workers=1)
+
+    assert report.imported == 10
+    assert report.rejected == 0
+    assert sorted(book.oid for book in books_repository.get_books()) == sorted(book.oid for book in books)
+
+    books_repository.clear()
+
+
+def test_unsupported_format_fail(
+        books_repository: BaseBooksRepository,
+        tmp_path
+):
+    with pytest.raises(UnsupportedBooksFileFormatException):
+        export_books(books_repository, str(tmp_path / 'books.xml'))
@@ -0,0 +1,105 @@
+from core.domain.entities.books import Book
+from core.domain.values.books import Status
+from core.infra.converters.books import convert_book_to_document
+from core.infra.indexes.merkle import MerkleIndex
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.memory import InMemoryBooksRepository
+from core.infra.transfer.sync import diff_catalogs, merkle_index_of, sync_catalogs
+from core.logic.commands.books import SyncCatalogCommand
+from core.logic.mediator import Mediator
+
+
+def _repository_with_tree(books: list[Book]) -> InMemoryBooksRepository:
+    repository = InMemoryBooksRepository()
+    repository.attach_index(MerkleIndex(depth=6))
+    repository.add_books(books)
+    return repository
+
+
+def test_incremental_tree_matches_rebuilt_tree(make_book):
+    books = [make_book() for _ in range(50)]
+    repository = _repository_with_tree(books[:40])
+    repository.add_books(books[40:])
+    repository.delete_book(books[0].oid)
+    books[1].status = Status(False)
+    repository.update_book(books[1])
+
+    index = repository.indexes[0]
+    rebuilt = merkle_index_of(InMemoryBooksRepository(), 6)
+    rebuilt.rebuild(convert_book_to_document(book) for book in repository.get_books())
+
+    assert index.root == rebuilt.root
+    assert len(index) == 49
+
+
+def test_tree_is_built_from_stored_documents(monkeypatch, make_book):
+    repository = InMemoryBooksRepository()
+    repository.add_books([make_book() for _ in range(10)])
+
+    def fail(*args, **kwargs):
+        raise AssertionError('books must not be created')
+
+    monkeypatch.setattr(repository, 'iter_books', fail)
+
+    assert len(merkle_index_of(repository, 6)) == 10
+
+def test_sync_applies_only_the_difference(make_book):
+    books = [make_book() for _ in range(200)]
+    source = _repository_with_tree(books)
+    target = _repository_with_tree(books)
+
+    source.delete_book(books[0].oid)
+    books[1].status = Status(False)
+    source.update_book(books[1])
+    new_book = make_book()
+    source.add_book(new_book)
+
+    diff = sync_catalogs(source, target, depth=6)
+
+    assert diff.added == [new_book.oid]
+    assert diff.updated == [books[1].oid]
+    assert diff.deleted == [books[0].oid]
+    assert diff.compared_nodes < 2 ** 7 - 1
+    assert target.get_book_by_oid(books[1].oid).status.value is False
+    assert target.indexes[0].root == source.indexes[0].root
+    assert len(diff_catalogs(source.indexes[0], target.indexes[0])) == 0
+
+
+def test_sync_catalog_command(tmp_path, mediator: Mediator, books_repository, make_book):
+    books = [make_book() for _ in range(5)]
+    books_repository.add_books(books[:3])
+    MemoryJsonBooksRepository(str(tmp_path / 'branch.json')).add_books(books[1:])
+
+    diff, *_ = mediator.handle_command(SyncCatalogCommand(source_path=str(tmp_path / 'branch.json')))
+
+    assert sorted(diff.added) == sorted(book.oid for book in books[3:])
+    assert diff.deleted == [books[0].oid]
+    assert {book.oid for book in books_repository.get_books()} == {book.oid for book in books[1:]}
+
+
+def test_sync_catalog_command_skips_loading_unchanged_source(
+        tmp_path, mediator: Mediator, books_repository, monkeypatch,
+        make_book,
+):
+    path = str(tmp_path / 'branch.json')
+    books = [make_book() for _ in range(5)]
+    MemoryJsonBooksRepository(path).add_books(books)
+    mediator.handle_command(SyncCatalogCommand(source_path=path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('source catalog must not be loaded')
+
+    # Сохраненное дерево источника совпадает с деревом репозитория, поэтому каталог не разбирается
+    with monkeypatch.context() as patch:
+        patch.setattr('core.logic.commands.books.MemoryJsonBooksRepository', fail)
+        diff, *_ = mediator.handle_command(SyncCatalogCommand(source_path=path))
+    assert len(diff) == 0
+
+    new_book = make_book()
+    MemoryJsonBooksRepository(path).add_book(new_book)
+    diff, *_ = mediator.handle_command(SyncCatalogCommand(source_path=path))
+
+    assert diff.added == [new_book.oid]
+    assert books_repository.count_books() == 6
+
+    books_repository.clear()
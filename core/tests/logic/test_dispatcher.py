@@ -0,0 +1,144 @@
+import threading
+from dataclasses import dataclass
+
+import pytest
+from faker import Faker
+
+from core.infra.repositories.base import BaseBooksRepository
+from core.logic.commands.base import BaseCommand, BaseCommandHandler
+from core.logic.commands.books import GetBookCommand, AddBookCommand, FindBookCommand
+from core.logic.dispatcher import CommandDispatcher, CommandPriority
+from core.logic.exceptions.mediator import CommandQueueFullException
+from core.logic.mediator import Mediator
+
+
+@dataclass(frozen=True)
+class BlockCommand(BaseCommand):
+    ...
+
+
+@dataclass(frozen=True)
+class RecordCommand(BaseCommand):
+    name: str
+
+
+@dataclass(frozen=True)
+class BulkRecordCommand(RecordCommand):
+    ...
+
+
+@dataclass(frozen=True)
+class BlockCommandHandler(BaseCommandHandler[BlockCommand, None]):
+    started: threading.Event
+    release: threading.Event
+
+    def handle(self, command: BlockCommand) -> None:
+        self.started.set()
+        self.release.wait(5)
+
+
+@dataclass(frozen=True)
+class RecordCommandHandler(BaseCommandHandler[RecordCommand, str]):
+    order: list
+
+    def handle(self, command: RecordCommand) -> str:
+        self.order.append(command.name)
+        return command.name
+
+
+def _start_blocked_dispatcher(**options) -> tuple[CommandDispatcher, threading.Event, list]:
+    """Диспетчер с одним обработчиком, занятым BlockCommand до release.set()"""
+    started, release, order = threading.Event(), threading.Event(), []
+
+    mediator = Mediator()
+    mediator.register_command(BlockCommand, [BlockCommandHandler(started, release)])
+    mediator.register_command(RecordCommand, [RecordCommandHandler(order)])
+    mediator.register_command(BulkRecordCommand, [RecordCommandHandler(order)])
+
+    dispatcher = CommandDispatcher(
+        mediator=mediator,
+        workers=1,
+        priorities={RecordCommand: CommandPriority.READ, BulkRecordCommand: CommandPriority.BULK},
+        **options,
+    )
+
+    dispatcher.submit(BlockCommand())
+    started.wait(5)
+
+    return dispatcher, release, order
+
+
+@pytest.fixture()
+def blocked_dispatcher():
+    dispatcher, release, order = _start_blocked_dispatcher(max_queue_size=3, reject_when_full=True)
+
+    yield dispatcher, release, order
+
+    release.set()
+    dispatcher.shutdown()
+
+
+def test_reads_overtake_bulk_writes(blocked_dispatcher):
+    dispatcher, release, order = blocked_dispatcher
+
+    futures = [
+        dispatcher.submit(BulkRecordCommand('bulk')),
+        dispatcher.submit(RecordCommand('first read')),
+        dispatcher.submit(RecordCommand('second read')),
+    ]
+
+    assert dispatcher.queue_depth == 3
+
+    release.set()
+
+    assert [future.result(5) for future in futures] == [['bulk'], ['first read'], ['second read']]
+    assert order == ['first read', 'second read', 'bulk']
+
+    stats = dispatcher.stats()
+
+    assert stats[RecordCommand].completed == 2
+    assert stats[BulkRecordCommand].max_wait >= stats[RecordCommand].max_wait
+    assert stats[BlockCommand].max_service > 0
+    assert dispatcher.max_queue_depth == 3
+
+
+def test_bulk_is_not_starved_by_reads():
+    dispatcher, release, order = _start_blocked_dispatcher(aging_window=2)
+
+    dispatcher.submit(BulkRecordCommand('bulk'))
+    for index in range(6):
+        dispatcher.submit(RecordCommand(f'read {index}'))
+
+    release.set()
+    dispatcher.shutdown()
+
+    # Массовую операцию обгоняют не больше BULK * aging_window = 4 чтений, поступивших после нее
+    assert order == ['read 0', 'read 1', 'read 2', 'bulk', 'read 3', 'read 4', 'read 5']
+
+
+def test_full_queue_rejects(blocked_dispatcher):
+    dispatcher, release, order = blocked_dispatcher
+
+    for index in range(3):
+        dispatcher.submit(RecordCommand(str(index)))
+
+    with pytest.raises(CommandQueueFullException):
+        dispatcher.submit(RecordCommand('rejected'))
+
+    assert dispatcher.stats()[RecordCommand].rejected == 1
+
+
+def test_dispatcher_from_container(
+    container,
+    books_repository: BaseBooksRepository
+):
+    dispatcher: CommandDispatcher = container.resolve(CommandDispatcher)
+
+    book, *_ = dispatcher.dispatch(AddBookCommand(Faker().text(max_nb_chars=100), Faker().name(), Faker().year()))
+
+    assert dispatcher.dispatch(GetBookCommand(book.oid)) == [book]
+    assert dispatcher.dispatch(FindBookCommand(title=book.title.as_generic_type())) == [[book]]
+    assert dispatcher.priority_of(GetBookCommand(book.oid)) is CommandPriority.READ
+
+    dispatcher.shutdown()
+    books_repository.clear()
@@ -5,7 +5,15 @@ from core.domain.entities.books import Book
 from core.domain.values.books import Title, Author, Year
 from core.infra.exceptions.books import BookNotFoundException
 from core.infra.repositories.base import BaseBooksRepository
-from core.logic.commands.books import GetBooksCommand, AddBookCommand, UpdateBookStatusCommand, DeleteBookCommand, FindBookCommand
+from core.logic.commands.books import (
+    GetBooksCommand,
+    AddBookCommand,
+    UpdateBookStatusCommand,
+    DeleteBookCommand,
+    FindBookCommand,
+    CountBooksCommand,
+    BookExistsCommand,
+)
 from core.logic.mediator import Mediator
 
 
@@ -128,6 +136,25 @@ def test_find_book_command(
     books_repository.clear()
 
 
+def test_count_and_exists_commands(
+    mediator: Mediator,
+    books_repository: BaseBooksRepository
+):
+    book = Book(
+        title=Title(Faker().text(max_nb_chars=100)),
+        author=Author(Faker().name()),
+        year=Year(Faker().year()),
+    )
+    books_repository.add_book(book)
+
+    assert mediator.handle_command(CountBooksCommand()) == [1]
+    assert mediator.handle_command(CountBooksCommand(year=book.year.as_generic_type(), status=True)) == [1]
+    assert mediator.handle_command(BookExistsCommand(author=book.author.as_generic_type())) == [True]
+    assert mediator.handle_command(BookExistsCommand(status=False)) == [False]
+
+    books_repository.clear()
+
+
 def test_delete_book_fail(
     mediator: Mediator,
     books_repository: BaseBooksRepository
@@ -0,0 +1,143 @@
+import pytest
+from faker import Faker
+from punq import Container
+
+from core.infra.exceptions.books import TransactionRolledBackException
+from core.infra.repositories.base import BaseBooksRepository
+from core.infra.repositories.books import MemoryJsonBooksRepository
+from core.infra.repositories.records import RecordStoreBooksRepository
+from core.infra.repositories.sharded import ShardedJsonBooksRepository
+from core.logic.commands.books import UpdateBookStatusCommand, AddBookCommand
+from core.logic.mediator import Mediator
+from core.logic.unit_of_work import UnitOfWork
+
+
+def test_unit_of_work_commits_with_single_save(
+    container: Container,
+    mediator: Mediator,
+    books_repository: BaseBooksRepository,
+    make_book
+):
+    books = [make_book() for _ in range(3)]
+    books_repository.add_books(books)
+    physical_writes = books_repository.metrics.physical_writes
+
+    with container.resolve(UnitOfWork):
+        for book in books:
+            mediator.handle_command(UpdateBookStatusCommand(book.oid))
+        mediator.handle_command(AddBookCommand(Faker().text(max_nb_chars=100), Faker().name(), Faker().year()))
+
+    assert books_repository.metrics.physical_writes == physical_writes + 1
+    assert len(books_repository.get_books()) == 4
+    assert all(not book.status.as_generic_type() for book in books_repository.get_books() if book in books)
+
+    books_repository.clear()
+
+
+def test_unit_of_work_rolls_back_on_exception(
+    container: Container,
+    mediator: Mediator,
+    books_repository: BaseBooksRepository,
+    make_book
+):
+    book = make_book()
+    books_repository.add_book(book)
+    physical_writes = books_repository.metrics.physical_writes
+
+    with pytest.raises(RuntimeError):
+        with container.resolve(UnitOfWork):
+            mediator.handle_command(UpdateBookStatusCommand(book.oid))
+            books_repository.delete_book(book.oid)
+            books_repository.add_book(make_book())
+            raise RuntimeError()
+
+    books = books_repository.get_books()
+
+    assert books_repository.metrics.physical_writes == physical_writes
+    assert books == [book]
+    assert books[0].status.as_generic_type() is True
+
+    books_repository.clear()
+
+
+def test_unit_of_work_sharded_repository(tmp_path, make_book):
+    repository = ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=4, max_workers=1)
+    book = make_book()
+    repository.add_book(book)
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(repository):
+            repository.delete_book(book.oid)
+            assert not repository.get_books()
+            raise RuntimeError()
+
+    assert repository.get_books() == [book]
+
+    new_book = make_book()
+    with UnitOfWork(repository):
+        repository.add_book(new_book)
+        repository.delete_book(book.oid)
+
+    assert repository.get_books() == [new_book]
+
+
+def test_nested_rollback_prevents_partial_commit(books_repository: BaseBooksRepository, make_book):
+    book = make_book()
+    books_repository.add_book(book)
+
+    with pytest.raises(TransactionRolledBackException):
+        with UnitOfWork(books_repository):
+            books_repository.delete_book(book.oid)
+
+            with pytest.raises(RuntimeError):
+                with UnitOfWork(books_repository):
+                    books_repository.add_book(make_book())
+                    raise RuntimeError()
+
+            # Изменения внешней транзакции до вложенной уже отменены, сохранить только эту запись нельзя
+            books_repository.add_book(make_book())
+
+    assert books_repository.get_books() == [book]
+
+    # После отмены транзакции репозиторий снова принимает записи
+    with UnitOfWork(books_repository):
+        books_repository.add_book(make_book())
+    assert len(books_repository.get_books()) == 2
+
+    books_repository.clear()
+
+
+def test_nested_rollback_prevents_partial_commit_sharded(tmp_path, make_book):
+    repository = ShardedJsonBooksRepository(str(tmp_path / 'shards'), shard_count=4, max_workers=1)
+    book = make_book()
+    repository.add_book(book)
+
+    with pytest.raises(TransactionRolledBackException):
+        with UnitOfWork(repository):
+            repository.delete_book(book.oid)
+            repository.begin()
+            repository.rollback()
+            repository.add_book(make_book())
+
+    assert repository.get_books() == [book]
+
+
+@pytest.mark.parametrize('repository_class', [
+    MemoryJsonBooksRepository, RecordStoreBooksRepository, ShardedJsonBooksRepository,
+])
+def test_rollback_restores_book_version(tmp_path, repository_class, make_book):
+    repository = repository_class(str(tmp_path / 'catalog'))
+    book = make_book()
+    repository.add_book(book)
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(repository):
+            repository.update_book(book)
+            assert book.version == 1
+            raise RuntimeError()
+
+    # Версия отмененной записи не остается у книги, и следующая запись не конфликтует
+    assert book.version == 0
+    repository.update_book(book)
+    assert repository.get_book_by_oid(book.oid).version == book.version == 1
+    repository.close()